@@ -0,0 +1,198 @@
+import pandas as pd
+import numpy as np
+from typing import List, Optional, Tuple
+from group_keys import GroupKeys, _densify
+from utils.instrumentation import traced, add_counts
+
+# Un épisode est identifié par ces colonnes ; ses frames sont ordonnées par `frame`
+EPISODE_KEYS = ['user', 'session_id', 'episode']
+# Attributs d'épisode disponibles pour les regroupements (by=...)
+EPISODE_ATTRIBUTES = ['world', 'level', 'outcome']
+N_ACTIONS = 256
+# Un n-gramme est codé exactement en base 256 dans un int64 (256 ** 6 = 2 ** 48)
+MAX_NGRAM = 6
+
+
+class ActionSequences:
+    """Flux d'actions de chaque épisode, mis bout à bout dans l'ordre des frames
+
+    Les frames sont triées une fois par (épisode, frame) ; `actions[i]` et
+    `episode[i]` donnent le code d'action et l'épisode de la i-ème frame du
+    flux. Segments, n-grammes et transitions sont calculés sur ce flux avec
+    des tranches décalées (vues sans copie) et np.bincount : une fenêtre qui
+    chevauche deux épisodes est simplement écartée.
+    """
+
+    def __init__(self, actions: np.ndarray, frames: np.ndarray, episode: np.ndarray, episodes: pd.DataFrame):
+        self.actions = actions
+        self.frames = frames
+        self.episode = episode
+        # Une ligne par épisode : clés, attributs et nombre de frames
+        self.episodes = episodes
+
+    @classmethod
+    @traced("ActionSequences.from_frames")
+    def from_frames(cls, frames: pd.DataFrame, index=None) -> "ActionSequences":
+        """Construit les flux à partir de la table des frames
+
+        Args:
+            index: FrameIndex de la table, pour réutiliser ses clés d'épisode
+        """
+        if index is not None:
+            keys = index.group_keys('frames', EPISODE_KEYS)
+        else:
+            keys = GroupKeys.from_frame(frames, EPISODE_KEYS)
+        actions = frames['action'].to_numpy()[keys.rows]
+        if len(actions) and (actions.min() < 0 or actions.max() >= N_ACTIONS):
+            raise ValueError("Les codes d'action doivent être compris entre 0 et 255")
+        frame_numbers = frames['frame'].to_numpy()[keys.rows]
+        order = np.lexsort((frame_numbers, keys.group))
+        add_counts(frames=len(order), episodes=keys.n_groups)
+
+        episodes = keys.key_frame()
+        for column in EPISODE_ATTRIBUTES:
+            if column in frames.columns:
+                episodes[column] = keys.first(frames[column])
+        episodes['frames'] = keys.size()
+        return cls(actions[order].astype(np.uint8), frame_numbers[order], keys.group[order], episodes)
+
+    def _groups(self, by: Optional[List[str]]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """(groupe de chaque épisode, -1 si un attribut manque ; une ligne par groupe)"""
+        if not by:
+            return np.zeros(len(self.episodes), dtype=np.int64), pd.DataFrame(index=[0])
+        keys = GroupKeys.from_frame(self.episodes, list(by))
+        episode_group = np.full(len(self.episodes), -1, dtype=np.int64)
+        episode_group[keys.rows] = keys.group
+        return episode_group, keys.key_frame()
+
+    def _windows(self, n: int) -> np.ndarray:
+        """Masque des fenêtres de n frames consécutives d'un même épisode (une par position de départ)"""
+        m = max(len(self.actions) - n + 1, 0)
+        return self.episode[:m] == self.episode[n - 1:n - 1 + m]
+
+    @traced("ActionSequences.runs")
+    def runs(self) -> pd.DataFrame:
+        """Segments d'entrée : plages de frames consécutives d'un épisode avec la même action"""
+        n = len(self.actions)
+        boundary = np.ones(n, dtype=bool)
+        boundary[1:] = (self.actions[1:] != self.actions[:-1]) | (self.episode[1:] != self.episode[:-1])
+        starts = np.flatnonzero(boundary)
+        episode_id = self.episode[starts]
+        segments = {'episode_id': episode_id}
+        for column in ('world', 'level'):
+            if column in self.episodes.columns:
+                segments[column] = self.episodes[column].to_numpy()[episode_id]
+        segments.update({
+            'start_frame': self.frames[starts],
+            'action': self.actions[starts],
+            'length': np.diff(np.append(starts, n))
+        })
+        return pd.DataFrame(segments)
+
+    def run_stats(self, by: Optional[List[str]] = ('world', 'level')) -> pd.DataFrame:
+        """Par groupe et par action : nombre de segments, frames, longueur moyenne et maximale"""
+        segments = self.runs()
+        episode_group, group_keys = self._groups(by)
+        group = episode_group[segments['episode_id'].to_numpy()]
+        valid = group >= 0
+        key = group[valid] * N_ACTIONS + segments['action'].to_numpy()[valid]
+        lengths = segments['length'].to_numpy()[valid]
+        size = len(group_keys) * N_ACTIONS
+        count = np.bincount(key, minlength=size)
+        total = np.bincount(key, weights=lengths, minlength=size)
+        longest = np.zeros(size, dtype=np.int64)
+        np.maximum.at(longest, key, lengths)
+
+        present = np.flatnonzero(count)
+        stats = group_keys.iloc[present // N_ACTIONS].reset_index(drop=True) if by else pd.DataFrame()
+        stats['action'] = (present % N_ACTIONS).astype(np.uint8)
+        stats['segments'] = count[present]
+        stats['frames'] = total[present].astype(np.int64)
+        stats['mean_length'] = total[present] / count[present]
+        stats['max_length'] = longest[present]
+        return stats
+
+    @traced("ActionSequences.top_ngrams")
+    def top_ngrams(self, n: int = 3, k: int = 10, by: Optional[List[str]] = ('world', 'level')) -> pd.DataFrame:
+        """Les k n-grammes d'actions les plus fréquents de chaque groupe
+
+        Chaque fenêtre de n actions est codée exactement par un hachage
+        polynomial en base 256, calculé par n tranches décalées du flux ;
+        les fenêtres qui chevauchent deux épisodes sont écartées. Les codes
+        sont renumérotés parmi ceux observés avant d'être combinés au groupe :
+        la clé (groupe, n-gramme) tient dans un int64 quel que soit le nombre
+        de groupes. `share` est la part du n-gramme parmi les fenêtres du groupe.
+        """
+        if not 1 <= n <= MAX_NGRAM:
+            raise ValueError(f"n doit être compris entre 1 et {MAX_NGRAM}")
+        valid = self._windows(n)
+        m = len(valid)
+        codes = np.zeros(m, dtype=np.int64)
+        for offset in range(n):
+            codes = codes * N_ACTIONS + self.actions[offset:offset + m]
+
+        episode_group, group_keys = self._groups(by)
+        group = episode_group[self.episode[:m]]
+        valid &= group >= 0
+        add_counts(windows=int(valid.sum()))
+        # Codes observés (triés) et rang de chaque fenêtre parmi eux
+        code_values, code_rank = _densify(codes[valid], N_ACTIONS ** n)
+        n_codes = max(len(code_values), 1)
+        keys, inverse = _densify(group[valid] * n_codes + code_rank, len(group_keys) * n_codes)
+        counts = np.bincount(inverse, minlength=len(keys))
+        totals = np.bincount(group[valid], minlength=len(group_keys))
+
+        # Tri par groupe puis par fréquence décroissante (code croissant à égalité)
+        key_group, key_code = keys // n_codes, code_values[keys % n_codes]
+        order = np.lexsort((key_code, -counts, key_group))
+        key_group, key_code, counts = key_group[order], key_code[order], counts[order]
+        rank = np.arange(len(order)) - np.searchsorted(key_group, key_group)
+        keep = rank < k
+        key_group, key_code, counts, rank = key_group[keep], key_code[keep], counts[keep], rank[keep]
+
+        top = group_keys.iloc[key_group].reset_index(drop=True) if by else pd.DataFrame(index=range(len(rank)))
+        top['rank'] = rank + 1
+        # Codes d'action du n-gramme, dans l'ordre des frames : "a1-a2-a3"
+        ngram = pd.Series(key_code // N_ACTIONS ** (n - 1)).astype(str)
+        for i in range(1, n):
+            ngram = ngram + '-' + pd.Series((key_code // N_ACTIONS ** (n - 1 - i)) % N_ACTIONS).astype(str)
+        top['ngram'] = ngram.to_numpy()
+        top['count'] = counts
+        top['share'] = counts / totals[key_group]
+        return top
+
+    @traced("ActionSequences.transition_matrix")
+    def transition_matrix(self, by: Optional[List[str]] = None,
+                          normalize: bool = False) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Transitions entre codes d'action d'une frame à la suivante d'un même épisode
+
+        Renvoie un tableau (groupes, 256, 256) — [g, a, b] compte les passages
+        de a à b dans le groupe g — et la table des groupes (un seul groupe sans
+        `by`). Avec normalize, chaque ligne est une loi de probabilité (zéros
+        pour une action jamais suivie).
+        """
+        valid = self._windows(2)
+        m = len(valid)
+        pairs = self.actions[:m].astype(np.int64) * N_ACTIONS + self.actions[1:1 + m]
+        episode_group, group_keys = self._groups(by)
+        group = episode_group[self.episode[:m]]
+        valid &= group >= 0
+        size = N_ACTIONS * N_ACTIONS
+        counts = np.bincount(group[valid] * size + pairs[valid], minlength=len(group_keys) * size)
+        counts = counts.reshape(len(group_keys), N_ACTIONS, N_ACTIONS)
+        if normalize:
+            totals = counts.sum(axis=2, keepdims=True)
+            counts = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+        return counts, group_keys
+
+    def transitions(self, by: Optional[List[str]] = None) -> pd.DataFrame:
+        """Transitions observées en format long : groupe, from_action, to_action, count, probability"""
+        counts, group_keys = self.transition_matrix(by)
+        totals = counts.sum(axis=2)
+        group, source, target = np.nonzero(counts)
+        table = group_keys.iloc[group].reset_index(drop=True) if by else pd.DataFrame(index=range(len(group)))
+        table['from_action'] = source.astype(np.uint8)
+        table['to_action'] = target.astype(np.uint8)
+        table['count'] = counts[group, source, target]
+        table['probability'] = table['count'].to_numpy() / totals[group, source]
+        return table
@@ -1,75 +1,154 @@
 import streamlit as st
 from data_loader import DataLoader
-from data_preprocessor import DataPreprocessor
+from frame_cache import FrameCache
+from data_preprocessor import DataPreprocessor, BUTTON_MASKS
 from difficulty_analyzer import DifficultyAnalyzer
+from frame_index import FrameIndex
 from visualization import DataVisualizer
 from pathlib import Path
 import pandas as pd
 
 st.set_page_config(page_title="Analyse Super Mario Bros", layout="wide")
 
+CACHE_DIR = Path(__file__).parent / "cache"
+VIEWS = ["🎮 Carte de difficulté", "🎯 Distribution des actions", "📈 Statistiques générales",
+         "📋 Niveaux", "📋 Actions", "📋 Épisodes", "🔎 Requêtes"]
+
+# Chaque étape est mémorisée par (chemin, empreinte du dataset, cache des frames) :
+# les étapes suivantes appellent les précédentes, qui ne sont calculées qu'une fois.
+# Les grosses tables passent par cache_resource (partagées, sans copie) et ne
+# doivent pas être modifiées ; les petits résultats par cache_data.
+
+@st.cache_resource(show_spinner=False)
+def get_loader(data_path: str) -> DataLoader:
+    """Chargeur du dataset, gardé pour réutiliser son manifeste"""
+    return DataLoader(data_path)
+
+def dataset_fingerprint(data_path: str) -> str:
+    """Re-parcourt le dataset et renvoie l'empreinte de son contenu"""
+    return get_loader(data_path).get_manifest(refresh=True).fingerprint()
+
+@st.cache_resource(show_spinner="Chargement des données...")
+def load_raw_data(data_path: str, fingerprint: str, use_cache: bool):
+    loader = get_loader(data_path)
+    cache = FrameCache(str(CACHE_DIR), str(loader.data_path)) if use_cache else None
+    raw_data = loader.load_data(cache=cache)
+    report = cache.report() if cache is not None and cache.enabled else None
+    return raw_data, report
+
+@st.cache_resource(show_spinner="Prétraitement...")
+def load_cleaned_data(data_path: str, fingerprint: str, use_cache: bool):
+    raw_data, _ = load_raw_data(data_path, fingerprint, use_cache)
+    return DataPreprocessor(raw_data).clean_data()
+
+@st.cache_resource(show_spinner="Indexation...")
+def get_index(data_path: str, fingerprint: str, use_cache: bool) -> FrameIndex:
+    return FrameIndex(load_cleaned_data(data_path, fingerprint, use_cache))
+
+def get_analyzer(data_path: str, fingerprint: str, use_cache: bool) -> DifficultyAnalyzer:
+    return DifficultyAnalyzer(load_cleaned_data(data_path, fingerprint, use_cache),
+                              index=get_index(data_path, fingerprint, use_cache))
+
+@st.cache_data(show_spinner="Statistiques des épisodes...")
+def get_episode_stats(data_path: str, fingerprint: str, use_cache: bool) -> pd.DataFrame:
+    return DataPreprocessor(load_cleaned_data(data_path, fingerprint, use_cache),
+                            index=get_index(data_path, fingerprint, use_cache)).calculate_episode_stats()
+
+@st.cache_data(show_spinner="Analyse de la difficulté...")
+def get_difficulty_data(data_path: str, fingerprint: str, use_cache: bool) -> pd.DataFrame:
+    analyzer = get_analyzer(data_path, fingerprint, use_cache)
+    return analyzer.categorize_difficulty(analyzer.calculate_level_metrics())
+
+@st.cache_data(show_spinner="Analyse des actions...")
+def get_action_metrics(data_path: str, fingerprint: str, use_cache: bool) -> pd.DataFrame:
+    return get_analyzer(data_path, fingerprint, use_cache).analyze_player_actions()
+
+def get_visualizer(data_path: str, fingerprint: str, use_cache: bool, keys) -> DataVisualizer:
+    """Visualiseur limité aux métriques demandées, pour ne calculer que celles-ci"""
+    stages = {
+        'level_metrics': get_difficulty_data,
+        'action_metrics': get_action_metrics,
+        'episode_stats': get_episode_stats
+    }
+    return DataVisualizer({key: stages[key](data_path, fingerprint, use_cache) for key in keys})
+
+@st.cache_resource(show_spinner="Création du graphique...")
+def get_figure(data_path: str, fingerprint: str, use_cache: bool, name: str):
+    keys = {'difficulty_heatmap': ['level_metrics'], 'action_distribution': ['action_metrics']}[name]
+    visualizer = get_visualizer(data_path, fingerprint, use_cache, keys)
+    if name == 'difficulty_heatmap':
+        return visualizer.get_difficulty_heatmap()
+    return visualizer.get_action_distribution()
+
+@st.cache_data(show_spinner=False)
+def get_summary(data_path: str, fingerprint: str, use_cache: bool) -> pd.DataFrame:
+    visualizer = get_visualizer(data_path, fingerprint, use_cache, ['level_metrics', 'action_metrics'])
+    return visualizer.generate_summary_report()
+
+def show_query(key: tuple):
+    """Exploration des épisodes ou des frames par filtres indexés"""
+    index = get_index(*key)
+    table = st.radio("Table", ["episodes", "frames"], horizontal=True)
+    filters = {}
+    cols = st.columns(5)
+    for col, column in zip(cols, ['world', 'level', 'user', 'session_id', 'outcome']):
+        choice = col.selectbox(column, ["(tous)"] + index.values(table, column))
+        if choice != "(tous)":
+            filters[column] = choice
+    if table == "frames":
+        buttons = st.multiselect("Boutons enfoncés", list(BUTTON_MASKS))
+        if buttons:
+            filters['buttons'] = buttons
+    rows = index.positions(table, **filters)
+    st.caption(f"{len(rows)} lignes")
+    st.dataframe(index.tables[table].iloc[rows[:10000]])
+
+def show_view(view: str, key: tuple):
+    """Calcule et affiche uniquement la vue sélectionnée"""
+    if view == VIEWS[0]:
+        st.pyplot(get_figure(*key, 'difficulty_heatmap'))
+    elif view == VIEWS[1]:
+        st.pyplot(get_figure(*key, 'action_distribution'))
+    elif view == VIEWS[2]:
+        st.dataframe(get_summary(*key))
+    elif view == VIEWS[3]:
+        st.dataframe(get_difficulty_data(*key))
+    elif view == VIEWS[4]:
+        st.dataframe(get_action_metrics(*key))
+    elif view == VIEWS[5]:
+        st.dataframe(get_episode_stats(*key))
+    elif view == VIEWS[6]:
+        show_query(key)
+
 def main():
     st.title("📊 Analyse des données Super Mario Bros")
-    
+
     # Sélection du dossier de données
     data_path = st.text_input(
-        "Chemin vers les données",
+        "Chemin vers les données (dossier, archive .zip/.tar ou URL Google Drive)",
         value=r"C:\Users\jcpro\OneDrive\Documents\Ma maitrise\analyse\smbdataset\data-smb"
     )
+    use_cache = st.checkbox("Utiliser le cache des frames", value=True)
+    clear_cache = st.checkbox("Invalider le cache avant l'analyse", value=False)
 
     if st.button("Analyser les données"):
-        with st.spinner("Chargement des données..."):
-            # Chargement des données
-            loader = DataLoader(data_path)
-            raw_data = loader.load_data()
-
-            # Prétraitement
-            preprocessor = DataPreprocessor(raw_data)
-            cleaned_data = preprocessor.clean_data()
-            episode_stats = preprocessor.calculate_episode_stats()
-
-            # Analyse
-            analyzer = DifficultyAnalyzer(cleaned_data)
-            level_metrics = analyzer.calculate_level_metrics()
-            action_metrics = analyzer.analyze_player_actions()
-            difficulty_data = analyzer.categorize_difficulty(level_metrics)
-
-            # Visualisation
-            metrics = {
-                'level_metrics': difficulty_data,
-                'action_metrics': action_metrics,
-                'episode_stats': episode_stats
-            }
-            visualizer = DataVisualizer(metrics)
-
-            # Affichage des résultats
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🎮 Carte de difficulté")
-                fig_heatmap = visualizer.get_difficulty_heatmap()
-                st.pyplot(fig_heatmap)
-
-            with col2:
-                st.subheader("🎯 Distribution des actions")
-                fig_actions = visualizer.get_action_distribution()
-                st.pyplot(fig_actions)
-
-            # Statistiques générales
-            st.subheader("📈 Statistiques générales")
-            summary = visualizer.generate_summary_report()
-            st.dataframe(summary)
-
-            # Données détaillées
-            st.subheader("📋 Données détaillées")
-            tabs = st.tabs(["Niveaux", "Actions", "Épisodes"])
-            
-            with tabs[0]:
-                st.dataframe(difficulty_data)
-            with tabs[1]:
-                st.dataframe(action_metrics)
-            with tabs[2]:
-                st.dataframe(episode_stats)
+        # Le dataset n'est re-parcouru qu'ici : les autres interactions réutilisent l'empreinte
+        with st.spinner("Parcours du dataset..."):
+            if clear_cache:
+                FrameCache(str(CACHE_DIR), str(get_loader(data_path).data_path)).clear()
+                load_raw_data.clear()
+            st.session_state["analysis"] = (data_path, dataset_fingerprint(data_path), use_cache)
+
+    key = st.session_state.get("analysis")
+    if key is None:
+        return
+
+    _, report = load_raw_data(*key)
+    if report:
+        st.caption(report)
+
+    view = st.radio("Vue", VIEWS, horizontal=True, label_visibility="collapsed")
+    show_view(view, key)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
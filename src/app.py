@@ -1,33 +1,39 @@
 import streamlit as st
-from io import StringIO
+from io import BytesIO
 import pandas as pd
 import requests
 from PIL import Image
-import matplotlib.pyplot as plt
 
 st.set_page_config(page_title="Visualisation des Données Super Mario Bros", layout="wide")
 
+def drive_direct_url(link):
+    """URL de téléchargement direct d'un lien de partage Google Drive"""
+    file_id = link.split("/d/")[1].split("/view")[0]
+    return f"https://drive.google.com/uc?id={file_id}"
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_drive_file(link):
+    """Télécharge un fichier Google Drive ; le contenu est gardé une heure entre les reruns"""
+    response = requests.get(drive_direct_url(link))
+    response.raise_for_status()  # Vérifie que la requête a réussi
+    return response.content
+
 def download_csv_from_drive(link):
     """Télécharge un fichier CSV depuis un lien Google Drive et le retourne comme DataFrame."""
     try:
-        file_id = link.split("/d/")[1].split("/view")[0]
-        direct_url = f"https://drive.google.com/uc?id={file_id}"
-        response = requests.get(direct_url)
-        response.raise_for_status()  # Vérifie que la requête a réussi
-        csv_data = StringIO(response.text)
-        return pd.read_csv(csv_data)
+        return load_csv(link)
     except Exception as e:
         st.error(f"Erreur lors du chargement de {link}: {str(e)}")
         return None
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_csv(link):
+    return pd.read_csv(BytesIO(fetch_drive_file(link)))
+
 def download_image_from_drive(link):
     """Télécharge une image depuis un lien Google Drive et la retourne comme objet PIL."""
     try:
-        file_id = link.split("/d/")[1].split("/view")[0]
-        direct_url = f"https://drive.google.com/uc?id={file_id}"
-        response = requests.get(direct_url, stream=True)
-        response.raise_for_status()  # Vérifie que la requête a réussi
-        return Image.open(response.raw)
+        return Image.open(BytesIO(fetch_drive_file(link)))
     except Exception as e:
         st.error(f"Erreur lors du chargement de l'image: {str(e)}")
         return None
@@ -48,24 +54,21 @@ def main():
         "Difficulty Heatmap": "https://drive.google.com/file/d/1Vbcwfl3xlw1UYfbwScMY97k58jqvs80b/view?usp=sharing"
     }
 
-    # Charger et afficher les CSV
+    # Seul le fichier sélectionné est chargé (depuis le cache après le premier affichage)
     st.subheader("📋 Données CSV")
-    tabs = st.tabs(list(csv_links.keys()))
-    for i, (name, link) in enumerate(csv_links.items()):
-        with tabs[i]:
-            st.text(f"Chargement de {name}...")
-            df = download_csv_from_drive(link)
-            if df is not None:
-                st.write(f"**{name}**")
-                st.dataframe(df)
+    name = st.radio("Tableau", list(csv_links.keys()), horizontal=True, label_visibility="collapsed")
+    with st.spinner(f"Chargement de {name}..."):
+        df = download_csv_from_drive(csv_links[name])
+    if df is not None:
+        st.write(f"**{name}**")
+        st.dataframe(df)
 
-    # Charger et afficher les images
     st.subheader("🖼️ Visualisations des Images")
-    for name, link in image_links.items():
-        st.text(f"Chargement de {name}...")
-        img = download_image_from_drive(link)
-        if img is not None:
-            st.image(img, caption=name, use_column_width=True)
+    name = st.radio("Image", list(image_links.keys()), horizontal=True, label_visibility="collapsed")
+    with st.spinner(f"Chargement de {name}..."):
+        img = download_image_from_drive(image_links[name])
+    if img is not None:
+        st.image(img, caption=name, use_column_width=True)
 
 if __name__ == "__main__":
     main()
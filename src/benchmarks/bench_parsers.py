@@ -0,0 +1,85 @@
+"""Microbenchmark des parseurs de noms de frames
+
+Compare, sur des noms synthétiques, l'ancienne implémentation (re.match avec
+le motif en chaîne à chaque appel), DataLoader.parse_frame_name (chemin rapide
+puis motif précompilé) et l'API par lot DataLoader.parse_frame_names.
+
+Usage : python src/benchmarks/bench_parsers.py [--n 1000000]
+"""
+import sys
+import re
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from data_loader import DataLoader
+
+LEGACY_FRAME_PATTERN = r"(.+)_(.+)_e(\d+)_(\d+)-(\d+)_f(\d+)_a(\d+)_(.+)\.(\w+)\.png"
+
+
+def legacy_parse_frame_name(frame_name: str):
+    """Implémentation d'origine de DataLoader.parse_frame_name"""
+    match = re.match(LEGACY_FRAME_PATTERN, frame_name)
+    if match:
+        return {
+            "user": match.group(1),
+            "session_id": match.group(2),
+            "episode": int(match.group(3)),
+            "world": int(match.group(4)),
+            "level": int(match.group(5)),
+            "frame": int(match.group(6)),
+            "action": int(match.group(7)),
+            "datetime": match.group(8),
+            "outcome": match.group(9)
+        }
+    return None
+
+
+def synthetic_frame_names(n: int, seed: int = 0):
+    """Noms de frames au format smbdataset, avec des noms d'utilisateurs longs"""
+    rng = random.Random(seed)
+    users = ["Rafael", "jean_pierre_dupont", "player_" + "x" * 40, "anna_b"]
+    names = []
+    for i in range(n):
+        user = rng.choice(users)
+        session = f"{rng.getrandbits(40):010x}"
+        names.append(
+            f"{user}_{session}_e{i % 50}_{rng.randint(1, 8)}-{rng.randint(1, 4)}"
+            f"_f{i}_a{rng.randrange(256)}_2019-04-13_20-13-16.{rng.choice(['win', 'fail'])}.png"
+        )
+    return names
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1_000_000, help="nombre de noms synthétiques")
+    args = parser.parse_args()
+
+    names = synthetic_frame_names(args.n)
+    loader = DataLoader(".")
+
+    legacy, legacy_time = timed(lambda: [legacy_parse_frame_name(name) for name in names])
+    single, single_time = timed(lambda: [loader.parse_frame_name(name) for name in names])
+    batch, batch_time = timed(loader.parse_frame_names, names)
+
+    # Les trois implémentations doivent donner le même résultat
+    assert legacy == single
+    for i in range(0, len(names), max(1, len(names) // 1000)):
+        assert {field: batch[field][i] for field in legacy[i]} == legacy[i]
+
+    print(f"{len(names)} noms de frames")
+    print(f"- re.match (ancien)        : {legacy_time:.2f}s")
+    print(f"- parse_frame_name         : {single_time:.2f}s (x{legacy_time / single_time:.1f})")
+    print(f"- parse_frame_names (lot)  : {batch_time:.2f}s (x{legacy_time / batch_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
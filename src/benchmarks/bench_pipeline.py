@@ -0,0 +1,219 @@
+"""Benchmark des quatre phases du pipeline sur un dataset synthétique
+
+Chronomètre séparément DataLoader.load_data, DataPreprocessor.clean_data /
+calculate_episode_stats, les trois méthodes de DifficultyAnalyzer et les
+graphiques de DataVisualizer, puis écrit les résultats en JSON (durées,
+frames/s, pic de mémoire résidente, octets par frame de la table des frames)
+pour comparer des exécutions.
+
+Usage : python src/benchmarks/bench_pipeline.py [--episodes 50] [--frames 200]
+                [--data DOSSIER] [--workers 1] [--repeat 3] [--output FICHIER.json]
+"""
+import sys
+import os
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from data_loader import DataLoader
+from data_preprocessor import DataPreprocessor, decode_buttons
+from difficulty_analyzer import DifficultyAnalyzer
+from visualization import DataVisualizer
+from table_schema import FRAME_SCHEMA, bytes_per_row
+from synthetic_dataset import generate_dataset
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus et de ses workers terminés, en Mo"""
+    if resource is None:
+        return None
+    # ru_maxrss est en kilo-octets sous Linux et en octets sous macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return round(max(own, children) / 1e6, 1)
+
+
+def run_phase(results: Dict, name: str, func: Callable, repeat: int = 1, n_frames: int = 0):
+    """Exécute `func` `repeat` fois et enregistre la meilleure durée ; renvoie le dernier résultat"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    results[name] = {
+        "seconds": round(best, 4),
+        "runs": [round(d, 4) for d in durations],
+        "frames_per_s": round(n_frames / best, 1) if n_frames and best > 0 else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    print(f"- {name:<40} {best:8.3f}s")
+    return value
+
+
+def untyped_frames(frames: pd.DataFrame) -> pd.DataFrame:
+    """Table des frames nettoyée sans schéma, pour comparaison
+
+    Textes et date en objets Python, entiers en int64 et un booléen par bouton,
+    comme avant l'introduction de table_schema.
+    """
+    columns = {}
+    for name in frames.columns:
+        kind = FRAME_SCHEMA.get(name)
+        if kind in ("category", "datetime"):
+            values = frames[name].astype(str) if kind == "datetime" else frames[name]
+            columns[name] = values.to_numpy(dtype=object)
+        elif kind == "int":
+            columns[name] = frames[name].to_numpy(dtype=np.int64)
+        elif name == "outcome_numeric":
+            columns[name] = frames[name].to_numpy(dtype=np.float64 if frames[name].isna().any() else np.int64)
+        else:
+            columns[name] = frames[name].to_numpy()
+    columns.update(decode_buttons(frames["action"].to_numpy()))
+    return pd.DataFrame(columns)
+
+
+def frames_memory(frames: pd.DataFrame) -> Dict:
+    """Octets par frame de la table nettoyée, avec et sans schéma"""
+    typed = bytes_per_row(frames)
+    untyped = bytes_per_row(untyped_frames(frames))
+    print(f"- {'frames: octets par frame':<40} {untyped:8.1f} -> {typed:.1f} ({untyped / max(typed, 1e-9):.1f}x)")
+    return {"bytes_per_frame": round(typed, 1), "bytes_per_frame_untyped": round(untyped, 1),
+            "reduction": round(untyped / typed, 2) if typed else None}
+
+
+def save_figure(fig, path: Path):
+    """Enregistre une figure comme le pipeline (300 dpi) puis la libère"""
+    fig.savefig(path, bbox_inches="tight", dpi=300)
+    plt.close(fig)
+
+
+def run_benchmark(data_path: str, n_workers: int = 1, chunk_size: int = 1, repeat: int = 1) -> Dict:
+    """Chronomètre chaque phase du pipeline sur un dataset existant"""
+    phases = {}
+    loader = DataLoader(data_path)
+
+    # Phase 1 : le premier chargement inclut le parcours du dataset
+    raw_data = run_phase(phases, "load_data", lambda: loader.load_data(n_workers, chunk_size))
+    # Les phases chronométrées ne lisent pas la RAM : le fichier temporaire est supprimé
+    loader.close()
+    n_frames = len(raw_data["frames"])
+    phases["load_data"]["frames_per_s"] = round(n_frames / phases["load_data"]["seconds"], 1)
+
+    # Phase 2
+    preprocessor = DataPreprocessor(raw_data)
+    cleaned_data = run_phase(phases, "clean_data", preprocessor.clean_data, repeat, n_frames)
+    run_phase(phases, "calculate_episode_stats",
+              DataPreprocessor(cleaned_data).calculate_episode_stats, repeat, n_frames)
+    memory = frames_memory(cleaned_data["frames"]) if n_frames else None
+
+    # Phase 3
+    analyzer = DifficultyAnalyzer(cleaned_data)
+    level_metrics = run_phase(phases, "calculate_level_metrics", analyzer.calculate_level_metrics, repeat)
+    action_metrics = run_phase(phases, "analyze_player_actions", analyzer.analyze_player_actions,
+                               repeat, n_frames)
+    difficulty_data = run_phase(phases, "categorize_difficulty",
+                                lambda: analyzer.categorize_difficulty(level_metrics), repeat)
+
+    # Phase 4 : rendu et écriture des graphiques produits par main.py
+    visualizer = DataVisualizer({"level_metrics": difficulty_data, "action_metrics": action_metrics})
+    out_dir = Path(tempfile.mkdtemp(prefix="smb_bench_plots_"))
+    try:
+        run_phase(phases, "plot_difficulty_heatmap",
+                  lambda: save_figure(visualizer.get_difficulty_heatmap(), out_dir / "heatmap.png"), repeat)
+        run_phase(phases, "plot_action_distribution",
+                  lambda: save_figure(visualizer.get_action_distribution(), out_dir / "actions.png"), repeat)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        "dataset": {"path": data_path, "episodes": len(raw_data["episodes"]), "frames": n_frames,
+                    "bytes": int(loader.get_manifest().files["size"].sum())},
+        "phases": phases,
+        "frames_memory": memory,
+        "total_seconds": round(sum(p["seconds"] for p in phases.values()), 4),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def environment() -> Dict:
+    """Versions et machine, pour ne comparer que des exécutions comparables"""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=50, help="nombre d'épisodes synthétiques")
+    parser.add_argument("--frames", type=int, default=200, help="nombre moyen de frames par épisode")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data", help="dataset existant à utiliser au lieu d'un dataset synthétique")
+    parser.add_argument("--workers", type=int, default=1, help="processus de lecture pour load_data")
+    parser.add_argument("--chunk-size", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="répétitions des phases 2 à 4 (la meilleure durée est gardée)")
+    parser.add_argument("--output", help="fichier JSON (défaut: results/benchmarks/pipeline_<date>.json)")
+    args = parser.parse_args()
+
+    generated = None
+    data_path = args.data
+    if data_path is None:
+        data_path = tempfile.mkdtemp(prefix="smb_bench_data_")
+        print(f"Génération du dataset synthétique dans {data_path}...")
+        generated = generate_dataset(data_path, args.episodes, args.frames, args.seed)
+
+    try:
+        print("\nDurées par phase:")
+        report = run_benchmark(data_path, args.workers, args.chunk_size, args.repeat)
+    finally:
+        if generated is not None:
+            shutil.rmtree(data_path, ignore_errors=True)
+
+    report.update({
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {"workers": args.workers, "chunk_size": args.chunk_size, "repeat": args.repeat,
+                   "synthetic": generated},
+        "environment": environment()
+    })
+
+    output = Path(args.output) if args.output else (
+        Path(__file__).resolve().parent.parent / "results" / "benchmarks"
+        / f"pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    dataset = report["dataset"]
+    print(f"\n{dataset['episodes']} épisodes, {dataset['frames']} frames "
+          f"({dataset['bytes'] / 1e6:.1f} Mo) ; total {report['total_seconds']:.2f}s, "
+          f"pic mémoire {report['peak_rss_mb']} Mo")
+    print(f"Résultats écrits dans {output}")
+
+
+if __name__ == "__main__":
+    main()
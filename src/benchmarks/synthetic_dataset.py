@@ -0,0 +1,122 @@
+"""Générateur de datasets synthétiques au format smbdataset
+
+Chaque épisode est un dossier `<user>_<session>_e<N>_<W>-<L>_<outcome>` contenant
+une frame PNG par pas de temps, nommée comme dans le dataset d'origine et portant
+les chunks texte RAM (2048 octets), BP1 (boutons) et OUTCOME.
+
+Usage : python src/benchmarks/synthetic_dataset.py DOSSIER [--episodes 50] [--frames 200]
+"""
+import sys
+import random
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import Dict, Tuple
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from ram_store import RAM_SIZE
+
+# Taille des frames NES du dataset d'origine
+FRAME_SIZE = (256, 240)
+USERS = ["Rafael", "jean_pierre", "anna_b", "player_42"]
+# Combinaisons de boutons fréquentes (bits : A, haut, gauche, B, start, droite, bas, select)
+ACTIONS = [0, 1, 4, 5, 8, 9, 12, 13, 32, 33, 40, 41]
+PALETTE = np.array([(92, 148, 252), (200, 76, 12), (0, 168, 0), (252, 188, 176)], dtype=np.uint8)
+
+
+def synthetic_ram(rng: np.random.Generator, world: int, level: int, frame: int,
+                  x: int, lives: int, dying: bool = False) -> bytes:
+    """RAM plausible : fond aléatoire et adresses de SMB décodées par ram_features"""
+    ram = rng.integers(0, 256, RAM_SIZE, dtype=np.uint8)
+    ram[0x006D], ram[0x0086] = divmod(x, 256)   # position horizontale (page, pixel)
+    ram[0x00CE] = 176 - (frame % 24)            # position verticale
+    ram[0x00B5] = 1                             # dans l'écran
+    ram[0x000E] = 0x0B if dying else 0x08       # état du joueur : mort ou normal
+    ram[0x001D] = int(frame % 24 < 12)          # au sol ou en saut
+    ram[0x0756] = 0
+    ram[0x075A] = lives
+    drawn = rng.random(5) < 0.3                 # emplacements d'ennemis occupés
+    ram[0x000F:0x0014] = drawn
+    ram[0x0016:0x001B] = np.where(drawn, rng.integers(0, 0x1C, 5), 0)
+    ram[0x075F], ram[0x0760] = world - 1, level - 1
+    timer = max(0, 400 - frame // 24)
+    ram[0x07F8:0x07FB] = [timer // 100, timer // 10 % 10, timer % 10]
+    return ram.tobytes()
+
+
+def write_episode(root: Path, user: str, session: str, episode: int, world: int, level: int,
+                  outcome: str, n_frames: int, seed: int,
+                  frame_size: Tuple[int, int] = FRAME_SIZE) -> int:
+    """Écrit un dossier d'épisode et renvoie le nombre d'octets écrits"""
+    rng = np.random.default_rng(seed)
+    folder = root / f"{user}_{session}_e{episode}_{world}-{level}_{outcome}"
+    folder.mkdir(parents=True, exist_ok=True)
+    # Fond en tuiles 16x16 de quelques couleurs, comme l'image NES, modifié à chaque frame
+    tiles = rng.choice(PALETTE, size=(-(-frame_size[1] // 16), -(-frame_size[0] // 16)))
+    background = tiles.repeat(16, axis=0).repeat(16, axis=1)[:frame_size[1], :frame_size[0]]
+    outcome_code = 1 if outcome == "win" else 0
+    x, written = 40, 0
+    # Un épisode perdu se termine par l'animation de mort (au plus 20 frames)
+    death_start = n_frames - min(20, max(1, n_frames // 5)) if outcome != "win" else n_frames
+    for frame in range(n_frames):
+        dying = frame >= death_start
+        action = ACTIONS[int(rng.integers(len(ACTIONS)))]
+        if not dying:
+            x += int(rng.integers(0, 4))
+        pixels = background.copy()
+        pixels[:16, frame % frame_size[0]] = 255
+        info = PngInfo()
+        info.add_text("RAM", synthetic_ram(rng, world, level, frame, x, 2, dying))
+        info.add_text("BP1", str(action))
+        info.add_text("OUTCOME", str(outcome_code))
+        path = folder / (f"{user}_{session}_e{episode}_{world}-{level}_f{frame}_a{action}"
+                         f"_2019-04-13_20-13-16.{outcome}.png")
+        Image.fromarray(pixels).save(path, pnginfo=info, compress_level=1)
+        written += path.stat().st_size
+    return written
+
+
+def generate_dataset(root: str, n_episodes: int = 50, frames_per_episode: int = 200,
+                     seed: int = 0, frame_size: Tuple[int, int] = FRAME_SIZE) -> Dict:
+    """Génère un dataset complet et renvoie sa description (taille, nombre de frames)"""
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    n_frames, n_bytes = 0, 0
+    for episode in range(n_episodes):
+        # Longueur d'épisode variable autour de la valeur demandée
+        length = max(1, int(frames_per_episode * rng.uniform(0.5, 1.5)))
+        n_bytes += write_episode(
+            root,
+            user=USERS[episode % len(USERS)],
+            session=f"{rng.getrandbits(32):08x}",
+            episode=episode,
+            world=rng.randint(1, 8),
+            level=rng.randint(1, 4),
+            outcome=rng.choice(["win", "fail"]),
+            n_frames=length,
+            seed=seed * 1_000_003 + episode,
+            frame_size=frame_size
+        )
+        n_frames += length
+    return {"root": str(root), "episodes": n_episodes, "frames": n_frames, "bytes": n_bytes,
+            "seed": seed, "frame_size": list(frame_size)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="dossier de sortie")
+    parser.add_argument("--episodes", type=int, default=50, help="nombre d'épisodes")
+    parser.add_argument("--frames", type=int, default=200, help="nombre moyen de frames par épisode")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    info = generate_dataset(args.root, args.episodes, args.frames, args.seed)
+    print(f"{info['episodes']} épisodes, {info['frames']} frames, "
+          f"{info['bytes'] / 1e6:.1f} Mo écrits dans {info['root']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import numpy as np
+from statistics import NormalDist
+from typing import Tuple
+
+# Intervalles à 95 %, 10 000 tirages ; la graine fixe rend les CSV reproductibles
+CONFIDENCE = 0.95
+N_RESAMPLES = 10000
+SEED = 0
+
+
+def _counts(successes, trials) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(succès, essais, masque des niveaux avec au moins un essai) en float64"""
+    successes = np.asarray(successes, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.float64)
+    return successes, trials, trials > 0
+
+
+def wilson_interval(successes, trials, confidence: float = CONFIDENCE) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalle de Wilson d'une proportion, pour tous les niveaux à la fois (NaN sans essai)
+
+    Contrairement à l'intervalle de Wald, il reste dans [0, 1] et n'est pas
+    réduit à un point pour 0 % ou 100 % de réussite.
+    """
+    successes, trials, valid = _counts(successes, trials)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    n = np.where(valid, trials, np.nan)
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z / (1 + z * z / n) * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return np.clip(center - half, 0, 1), np.clip(center + half, 0, 1)
+
+
+def bootstrap_rates(successes, trials, n_resamples: int = N_RESAMPLES, seed: int = SEED) -> np.ndarray:
+    """Taux de réussite rééchantillonnés, tableau (n_resamples, niveaux), NaN sans essai
+
+    Rééchantillonner avec remise les n issues 0/1 d'un niveau revient à tirer
+    son nombre de succès dans une loi binomiale (n, taux observé) : tous les
+    rééchantillons de tous les niveaux sont tirés en un seul appel.
+    """
+    successes, trials, valid = _counts(successes, trials)
+    rates = np.full((n_resamples, len(trials)), np.nan)
+    rng = np.random.default_rng(seed)
+    n = trials[valid].astype(np.int64)
+    rates[:, valid] = rng.binomial(n, successes[valid] / trials[valid], size=(n_resamples, len(n))) / n
+    return rates
+
+
+def beta_draws(successes, trials, n_resamples: int = N_RESAMPLES, seed: int = SEED,
+               prior: Tuple[float, float] = (1.0, 1.0)) -> np.ndarray:
+    """Tirages de la loi a posteriori Beta du taux de réussite, tableau (n_resamples, niveaux)
+
+    Avec l'a priori uniforme Beta(1, 1), un niveau réussi 5 fois sur 5 garde
+    une incertitude que le bootstrap (toujours 5/5) ne voit pas.
+    """
+    successes, trials, valid = _counts(successes, trials)
+    draws = np.full((n_resamples, len(trials)), np.nan)
+    rng = np.random.default_rng(seed)
+    a = successes[valid] + prior[0]
+    b = trials[valid] - successes[valid] + prior[1]
+    draws[:, valid] = rng.beta(a, b, size=(n_resamples, len(a)))
+    return draws
+
+
+def draw_interval(draws: np.ndarray, confidence: float = CONFIDENCE) -> Tuple[np.ndarray, np.ndarray]:
+    """Intervalle par percentiles de chaque colonne de tirages (NaN pour une colonne vide)"""
+    low, high = np.full(draws.shape[1], np.nan), np.full(draws.shape[1], np.nan)
+    valid = ~np.isnan(draws[0]) if len(draws) else np.zeros(draws.shape[1], dtype=bool)
+    if valid.any():
+        tail = (1 - confidence) / 2
+        low[valid], high[valid] = np.quantile(draws[:, valid], [tail, 1 - tail], axis=0)
+    return low, high
+
+
+def bin_probabilities(draws: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Part des tirages de chaque colonne dans chaque intervalle, tableau (intervalles, niveaux)
+
+    Les intervalles sont fermés à droite comme ceux de pd.cut / pd.qcut ; un
+    tirage hors des bornes compte dans l'intervalle extrême le plus proche.
+    """
+    n_bins, n_levels = len(edges) - 1, draws.shape[1]
+    bins = np.clip(np.searchsorted(edges, draws, side="left") - 1, 0, n_bins - 1)
+    columns = np.broadcast_to(np.arange(n_levels), draws.shape)
+    valid = ~np.isnan(draws)
+    counts = np.bincount((bins[valid] * n_levels + columns[valid]), minlength=n_bins * n_levels)
+    totals = np.maximum(valid.sum(axis=0), 1)
+    return counts.reshape(n_bins, n_levels) / totals
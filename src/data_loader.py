@@ -1,107 +1,623 @@
 import pandas as pd
+import numpy as np
 import os
+import time
+import tempfile
 from pathlib import Path
 import re
-from PIL import Image
-from typing import Dict, Tuple, List
+import gc
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Tuple, List, Optional, Iterator, Union
 from tqdm import tqdm
+from frame_cache import FrameCache
+from frame_source import FrameSource, open_source
+from packed_dataset import PackedDataset
+from ram_store import RamStore, RAM_SIZE, ram_to_array
+from dataset_manifest import DatasetManifest, FOLDER_FIELDS, FRAME_FIELDS
+from table_schema import FRAME_SCHEMA, EPISODE_SCHEMA, build_table, apply_schema, bytes_per_row
+from utils.instrumentation import span, traced, add_counts
+
+# Colonnes de la table des frames, dans l'ordre de construction du DataFrame
+# (types dans table_schema.FRAME_SCHEMA). La RAM de chaque frame est stockée
+# à part (RamStore), seul son indice est gardé.
+FRAME_COLUMNS = list(FRAME_SCHEMA)
+# Colonnes remplies par les processus de lecture (ram_index est attribué à la fusion)
+_CHUNK_COLUMNS = [col for col in FRAME_COLUMNS if col != "ram_index"]
+
+# Motifs des noms de dossiers et de frames, compilés une seule fois.
+# Ils gardent la sémantique de re.match des motifs d'origine (ancrés en début de nom).
+FOLDER_NAME_RE = re.compile(r"^(.+)_(.+)_e(\d+)_(\d+)-(\d+)_(\w+)")
+FRAME_NAME_RE = re.compile(r"^(.+)_(.+)_e(\d+)_(\d+)-(\d+)_f(\d+)_a(\d+)_(.+)\.(\w+)\.png")
+
+
+def _is_number(token: str) -> bool:
+    return token.isdigit()
+
+
+def _is_level(token: str) -> bool:
+    world, sep, level = token.partition("-")
+    return bool(sep) and world.isdigit() and level.isdigit()
+
+
+def _split_folder_name(name: str) -> Optional[tuple]:
+    """Chemin rapide : découpe un nom de dossier ASCII "user_session_eN_W-L_outcome"
+
+    Renvoie None si le nom sort du cas simple ; l'appelant utilise alors le motif.
+    """
+    if not name.isascii():
+        return None
+    tokens = name.split("_")
+    if len(tokens) < 5 or "" in tokens:
+        return None
+    marker, level, outcome = tokens[-3:]
+    if not (marker[0] == "e" and _is_number(marker[1:]) and _is_level(level) and outcome.isalnum()):
+        return None
+    world, _, level = level.partition("-")
+    return ("_".join(tokens[:-4]), tokens[-4], int(marker[1:]), int(world), int(level), outcome)
+
+
+def _split_frame_name(name: str) -> Optional[tuple]:
+    """Chemin rapide : découpe un nom de frame ASCII sur les séparateurs _e, _f et _a
+
+    Comme le motif (groupes gourmands), le dernier marqueur eN_W-L_fN_aN possible
+    est retenu. Renvoie None hors du cas simple ; l'appelant utilise alors le motif.
+    """
+    if not name.endswith(".png") or not name.isascii():
+        return None
+    base, dot, outcome = name[:-4].rpartition(".")
+    if not dot or not outcome.isalnum():
+        return None
+
+    # Cas courant : date "AAAA-MM-JJ_HH-MM-SS", un seul découpage depuis la droite
+    parts = base.rsplit("_", 7)
+    if len(parts) == 8:
+        user, session_id, marker, level, frame, action, date, time = parts
+        world, _, level = level.partition("-")
+        if (marker[:1] == "e" and frame[:1] == "f" and action[:1] == "a"
+                and marker[1:].isdigit() and frame[1:].isdigit() and action[1:].isdigit()
+                and world.isdigit() and level.isdigit() and user and session_id and date and time):
+            return (user, session_id, int(marker[1:]), int(world), int(level),
+                    int(frame[1:]), int(action[1:]), f"{date}_{time}", outcome)
+
+    tokens = base.split("_")
+    if "" in tokens:
+        return None
+    for i in range(len(tokens) - 5, 1, -1):
+        marker, level, frame, action = tokens[i:i + 4]
+        if (marker[0] == "e" and frame[0] == "f" and action[0] == "a" and _is_number(marker[1:])
+                and _is_level(level) and _is_number(frame[1:]) and _is_number(action[1:])):
+            world, _, level = level.partition("-")
+            return ("_".join(tokens[:i - 1]), tokens[i - 1], int(marker[1:]), int(world), int(level),
+                    int(frame[1:]), int(action[1:]), "_".join(tokens[i + 4:]), outcome)
+    return None
+
+
+def _match_folder_name(name: str) -> Optional[tuple]:
+    """Parse un nom de dossier : chemin rapide puis motif précompilé"""
+    fields = _split_folder_name(name)
+    if fields is None:
+        match = FOLDER_NAME_RE.match(name)
+        if match:
+            user, session_id, episode, world, level, outcome = match.groups()
+            fields = (user, session_id, int(episode), int(world), int(level), outcome)
+    return fields
+
+
+def _match_frame_name(name: str) -> Optional[tuple]:
+    """Parse un nom de frame : chemin rapide puis motif précompilé"""
+    fields = _split_frame_name(name)
+    if fields is None:
+        match = FRAME_NAME_RE.match(name)
+        if match:
+            groups = match.groups()
+            fields = groups[:2] + tuple(int(g) for g in groups[2:7]) + groups[7:]
+    return fields
+
+
+# Signature PNG et chunks texte utilisés par le dataset
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_TEXT_KEYS = ("RAM", "BP1", "OUTCOME")
+PNG_TEXT_CHUNKS = (b"tEXt", b"zTXt", b"iTXt")
+# Même limite que PIL pour la décompression des chunks texte
+PNG_MAX_TEXT_SIZE = 1024 * 1024
+
+
+def _decompress_text(data: bytes) -> bytes:
+    """Décompresse un chunk texte en respectant la limite de taille"""
+    dobj = zlib.decompressobj()
+    plaintext = dobj.decompress(data, PNG_MAX_TEXT_SIZE)
+    if dobj.unconsumed_tail:
+        raise ValueError("Chunk texte décompressé trop volumineux")
+    return plaintext
+
+
+def _decode_text_chunk(cid: bytes, data: bytes) -> Optional[Tuple[str, object]]:
+    """Décode un chunk tEXt/zTXt/iTXt comme le fait PIL"""
+    if cid == b"tEXt":
+        k, _, v = data.partition(b"\0")
+        if not k:
+            return None
+        return k.decode("latin-1"), v if k == b"exif" else v.decode("latin-1", "replace")
+
+    if cid == b"zTXt":
+        k, _, v = data.partition(b"\0")
+        if v and v[0] != 0:
+            raise ValueError(f"Méthode de compression inconnue {v[0]} dans le chunk zTXt")
+        try:
+            v = _decompress_text(v[1:])
+        except zlib.error:
+            v = b""
+        if not k:
+            return None
+        return k.decode("latin-1"), v.decode("latin-1", "replace")
+
+    # iTXt : clé, drapeau et méthode de compression, langue, mot-clé traduit, texte
+    k, sep, r = data.partition(b"\0")
+    if not sep or len(r) < 2:
+        return None
+    cf, cm, r = r[0], r[1], r[2:]
+    parts = r.split(b"\0", 2)
+    if len(parts) != 3:
+        return None
+    lang, tk, v = parts
+    if cf != 0:
+        if cm != 0:
+            return None
+        try:
+            v = _decompress_text(v)
+        except zlib.error:
+            return None
+    try:
+        lang.decode("utf-8")
+        tk.decode("utf-8")
+        return k.decode("latin-1"), v.decode("utf-8")
+    except UnicodeError:
+        return None
+
+
+def read_png_text_chunks(fp, keys: Optional[Tuple[str, ...]] = None) -> Dict[str, object]:
+    """Lit les chunks texte d'un PNG sans passer par le décodeur d'image de PIL
+
+    Parcourt les en-têtes de chunks avec read/seek, ne lit que les chunks
+    tEXt/zTXt/iTXt (filtrés sur `keys` si fourni) et s'arrête au premier IDAT.
+    Lève ValueError si le fichier est tronqué ou corrompu.
+    """
+    if fp.read(8) != PNG_SIGNATURE:
+        raise ValueError("Signature PNG invalide")
+
+    wanted = None if keys is None else {k.encode("latin-1") for k in keys}
+    texts = {}
+    first = True
+    while True:
+        header = fp.read(8)
+        if len(header) < 8:
+            raise ValueError("Fichier PNG tronqué avant le premier IDAT")
+        length, cid = struct.unpack(">I4s", header)
+        if not cid.isalpha():
+            raise ValueError(f"Type de chunk PNG invalide {cid!r}")
+        if first and cid != b"IHDR":
+            raise ValueError("Le premier chunk PNG n'est pas IHDR")
+        first = False
+        if cid == b"IDAT":
+            return texts
+
+        if cid not in PNG_TEXT_CHUNKS:
+            fp.seek(length + 4, os.SEEK_CUR)
+            continue
+
+        data = fp.read(length)
+        crc = fp.read(4)
+        if len(data) < length or len(crc) < 4:
+            raise ValueError(f"Chunk {cid!r} tronqué")
+        if zlib.crc32(data, zlib.crc32(cid)) != struct.unpack(">I", crc)[0]:
+            raise ValueError(f"CRC invalide pour le chunk {cid!r}")
+        if wanted is not None and data.partition(b"\0")[0] not in wanted:
+            continue
+
+        item = _decode_text_chunk(cid, data)
+        if item:
+            texts[item[0]] = item[1]
+
+
+def _read_frames_metadata(loader: "DataLoader", paths: List[str]) -> Dict:
+    """Lit les chunks PNG d'une liste de frames
+
+    Exécutée dans les processus de travail : le résultat doit rester picklable.
+    `valid` marque les frames lues sans erreur, les autres sont ignorées.
+    `bytes_read` et `seconds` alimentent l'instrumentation du processus principal.
+    """
+    start = time.perf_counter()
+    n = len(paths)
+    metadata = {
+        "player_input": [0] * n,
+        "outcome_code": [0] * n,
+        "ram": np.zeros((n, loader.ram_size), dtype=np.uint8),
+        "valid": np.ones(n, dtype=bool),
+        "bytes_read": 0
+    }
+    for i, path in enumerate(paths):
+        try:
+            frame_metadata = loader.extract_png_metadata(path)
+            metadata["ram"][i] = ram_to_array(frame_metadata["ram_data"], loader.ram_size)
+            metadata["player_input"][i] = frame_metadata["player_input"]
+            metadata["outcome_code"][i] = frame_metadata["outcome_code"]
+            metadata["bytes_read"] += frame_metadata.get("bytes_read", 0)
+        except Exception as e:
+            print(f"\nErreur lors du traitement de {path}: {e}")
+            metadata["valid"][i] = False
+    metadata["seconds"] = time.perf_counter() - start
+    return metadata
+
+
+def _read_folders_metadata(loader: "DataLoader", tasks: List[List[str]]) -> List[Dict]:
+    """Lit les frames d'un lot de dossiers d'épisodes (une tâche du pool de processus)"""
+    return [_read_frames_metadata(loader, paths) for paths in tasks]
+
+
+def _decode_image(fp, scale: int = 1, grayscale: bool = False) -> np.ndarray:
+    """Décode l'écran d'une frame en uint8 (H, W, 3), ou (H, W) en niveaux de gris
+
+    Le sous-échantillonnage par un facteur entier moyenne des blocs de pixels (Image.reduce).
+    """
+    # PIL n'est nécessaire que pour le pipeline d'images
+    from PIL import Image
+    with Image.open(fp) as image:
+        image = image.convert("L" if grayscale else "RGB")
+        if scale > 1:
+            image = image.reduce(scale)
+        return np.asarray(image)
+
+
+def _decode_images(loader: "DataLoader", paths: List[str], shape: Tuple[int, ...], scale: int,
+                   grayscale: bool, out_path: Optional[str] = None, offset: int = 0) -> Optional[np.ndarray]:
+    """Décode un lot de frames (une tâche du pool de processus)
+
+    Avec `out_path`, les images sont écrites directement dans le fichier .npy
+    mappé en mémoire à partir de la ligne `offset` et rien n'est renvoyé (pas
+    de copie entre processus) ; sinon le lot est renvoyé. Une frame illisible
+    reste à zéro.
+    """
+    out = np.load(out_path, mmap_mode="r+") if out_path else np.zeros((len(paths),) + shape, dtype=np.uint8)
+    base = offset if out_path else 0
+    for i, path in enumerate(paths):
+        try:
+            with loader.source.open(path) as fp:
+                out[base + i] = _decode_image(fp, scale, grayscale)
+        except Exception as e:
+            print(f"\nErreur lors du décodage de {path}: {e}")
+    if out_path:
+        out.flush()
+        return None
+    return out
+
+
+def screen_change_rate(images: np.ndarray, threshold: int = 0) -> np.ndarray:
+    """Part des pixels qui changent entre deux frames consécutives (n - 1 valeurs)"""
+    if len(images) < 2:
+        return np.zeros(0, dtype=np.float64)
+    changed = np.abs(images[1:].astype(np.int16) - images[:-1]) > threshold
+    if changed.ndim == 4:
+        # Un pixel change si l'un de ses canaux change
+        changed = changed.any(axis=-1)
+    return changed.reshape(len(changed), -1).mean(axis=1)
+
 
 class DataLoader:
-    def __init__(self, data_path: str):
-        self.data_path = Path(data_path)
-        if not self.data_path.exists():
-            raise FileNotFoundError(f"Le chemin {data_path} n'existe pas")
+    def __init__(self, data_path: Union[str, FrameSource], ram_path: Optional[str] = None,
+                 ram_size: int = RAM_SIZE):
+        # Dossier, archive zip/tar, URL Google Drive ou FrameSource (voir open_source)
+        self.source = open_source(data_path)
+        # Dataset déjà consolidé (packed_dataset.py) : lu directement, sans parcours des PNG
+        self.pack = PackedDataset(self.source.root) if PackedDataset.is_pack(self.source.root) else None
+        # Dossier ou archive effectivement lu (le miroir local pour une URL)
+        self.data_path = self.source.root
+        # Fichier des instantanés RAM (temporaire si non précisé)
+        self.ram_path = ram_path
+        self.ram_size = ram_size
+        self.ram_store = None
+        self.manifest = None
+        # Dossier temporaire du fichier RAM, supprimé par close() (ou à la sortie du programme)
+        self._ram_dir = None
+
+    def __getstate__(self):
+        # Les processus de lecture n'ont besoin ni du manifeste ni du fichier RAM
+        state = self.__dict__.copy()
+        state["ram_store"] = None
+        state["manifest"] = None
+        state["_ram_dir"] = None
+        return state
+
+    def __enter__(self) -> "DataLoader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Ferme le fichier RAM et supprime le dossier temporaire créé par le loader
+
+        Les fichiers RAM d'un cache, d'un pack ou de `ram_path` sont conservés.
+        """
+        if self.ram_store is not None:
+            self.ram_store.close()
+            self.ram_store = None
+        self._remove_ram_dir()
+
+    def _remove_ram_dir(self):
+        if self._ram_dir is not None:
+            self._ram_dir.cleanup()
+            self._ram_dir = None
         
     def parse_folder_name(self, folder_name: str) -> Dict:
         """Parse les informations du nom du dossier"""
-        pattern = r"(.+)_(.+)_e(\d+)_(\d+)-(\d+)_(\w+)"
-        match = re.match(pattern, folder_name)
-        if match:
-            return {
-                "user": match.group(1),
-                "session_id": match.group(2),
-                "episode": int(match.group(3)),
-                "world": int(match.group(4)),
-                "level": int(match.group(5)),
-                "outcome": match.group(6)
-            }
+        fields = _match_folder_name(folder_name)
+        if fields:
+            return dict(zip(FOLDER_FIELDS, fields))
         return None
 
     def parse_frame_name(self, frame_name: str) -> Dict:
         """Parse les informations du nom de frame"""
-        pattern = r"(.+)_(.+)_e(\d+)_(\d+)-(\d+)_f(\d+)_a(\d+)_(.+)\.(\w+)\.png"
-        match = re.match(pattern, frame_name)
-        if match:
-            return {
-                "user": match.group(1),
-                "session_id": match.group(2),
-                "episode": int(match.group(3)),
-                "world": int(match.group(4)),
-                "level": int(match.group(5)),
-                "frame": int(match.group(6)),
-                "action": int(match.group(7)),
-                "datetime": match.group(8),
-                "outcome": match.group(9)
-            }
+        fields = _match_frame_name(frame_name)
+        if fields:
+            return dict(zip(FRAME_FIELDS, fields))
         return None
 
+    def parse_frame_names(self, frame_names: List[str]) -> Dict[str, np.ndarray]:
+        """Parse une liste de noms de frames en colonnes
+
+        Les champs entiers sont en int64 (-1 pour un nom non reconnu), les champs
+        texte en tableaux d'objets (None), et `parsed` indique les noms reconnus.
+        """
+        # Le ramasse-miettes n'a rien à libérer ici mais se déclenche sans cesse
+        # pendant la création de millions de tuples : on le suspend le temps du lot
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            rows = [_match_frame_name(name) for name in frame_names]
+            parsed = np.fromiter((row is not None for row in rows), dtype=bool, count=len(rows))
+            missing = (None, None, -1, -1, -1, -1, -1, None, None)
+            values = list(zip(*(row or missing for row in rows))) if rows else [()] * len(missing)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        columns = {}
+        for field, column in zip(FRAME_FIELDS, values):
+            if field in ("user", "session_id", "datetime", "outcome"):
+                columns[field] = np.array(column, dtype=object)
+            else:
+                columns[field] = np.array(column, dtype=np.int64)
+        columns["parsed"] = parsed
+        return columns
+
     def extract_png_metadata(self, image_path: str) -> Dict:
         """Extrait les métadonnées des chunks PNG personnalisés"""
         try:
-            with Image.open(image_path) as img:
-                metadata = img.info
+            with self.source.open(image_path) as fp:
+                metadata = read_png_text_chunks(fp, PNG_TEXT_KEYS)
                 return {
                     "ram_data": metadata.get("RAM", b""),
                     "player_input": int(metadata.get("BP1", 0)),
-                    "outcome_code": int(metadata.get("OUTCOME", 0))
+                    "outcome_code": int(metadata.get("OUTCOME", 0)),
+                    "bytes_read": fp.tell()
                 }
         except Exception as e:
             print(f"Erreur lors de l'extraction des métadonnées de {image_path}: {e}")
-            return {"ram_data": b"", "player_input": 0, "outcome_code": 0}
+            return {"ram_data": b"", "player_input": 0, "outcome_code": 0, "bytes_read": 0}
+
+    def get_manifest(self, refresh: bool = False) -> DatasetManifest:
+        """Inventaire du dataset, construit au premier appel puis réutilisé"""
+        if self.manifest is None or refresh:
+            with span("DataLoader.scan") as scan:
+                self.manifest = DatasetManifest.scan(self.source, self)
+                scan.add(files=len(self.manifest), folders=len(self.manifest.folders))
+        return self.manifest
 
     def count_total_files(self) -> int:
-        """Compte le nombre total de fichiers PNG à traiter"""
-        return sum(1 for _ in self.data_path.glob("**/*.png"))
+        """Compte le nombre total de fichiers PNG à traiter (de frames pour un pack)"""
+        if self.pack is not None:
+            return self.pack.info()["frames"]
+        return len(self.get_manifest())
+
+    def iter_episode_folders(self) -> List[Path]:
+        """Liste les dossiers d'épisodes dans un ordre stable"""
+        return [self.data_path / name for name in self.get_manifest().folders["name"]]
+
+    def _iter_chunks(self, folders: List[Path], n_workers: int = 1,
+                     chunk_size: int = 1) -> Iterator[Dict]:
+        """Charge les dossiers et renvoie leurs morceaux colonnaires dans l'ordre des dossiers
+
+        Les champs des noms viennent du manifeste ; seuls les chunks PNG sont lus,
+        par les processus de travail. En mode parallèle, au plus 2 tâches par
+        processus sont en vol, ce qui borne la mémoire des résultats en attente.
+        """
+        manifest = self.get_manifest()
+        folder_rows = manifest.folders.set_index("name")
+        plans = []
+        for folder in folders:
+            row = folder_rows.loc[folder.name]
+            files = manifest.folder_files(folder.name)
+            if row["parsed"]:
+                files = files[files["parsed"].to_numpy()]
+                episode = {field: row[field] for field in FOLDER_FIELDS}
+                for field in ("episode", "world", "level"):
+                    episode[field] = int(episode[field])
+            else:
+                files, episode = None, None
+            plans.append((folder.name, int(row["n_files"]), episode, files))
+
+        def metadata_results():
+            tasks = [files["path"].tolist() for _, _, episode, files in plans if episode]
+            if n_workers <= 1:
+                for paths in tasks:
+                    yield _read_frames_metadata(self, paths)
+                return
+            size = max(1, chunk_size)
+            batches = (tasks[i:i + size] for i in range(0, len(tasks), size))
+            read_batch = partial(_read_folders_metadata, self)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                pending = deque()
+                for batch in batches:
+                    pending.append(executor.submit(read_batch, batch))
+                    if len(pending) >= 2 * n_workers:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+
+        results = metadata_results()
+        for name, n_files, episode, files in plans:
+            chunk = {"folder": name, "episode": episode, "frames": None, "ram": None,
+                     "n_files": n_files, "bytes_read": 0, "read_seconds": 0.0}
+            if episode:
+                metadata = next(results)
+                chunk["bytes_read"] = metadata["bytes_read"]
+                chunk["read_seconds"] = metadata["seconds"]
+                valid = metadata["valid"]
+                columns = {field: files[field].to_numpy()[valid] for field in FRAME_FIELDS}
+                for field in ("player_input", "outcome_code"):
+                    columns[field] = np.asarray(metadata[field], dtype=np.int64)[valid]
+                chunk["frames"] = columns
+                chunk["ram"] = metadata["ram"][valid]
+            yield chunk
+
+    def _new_ram_store(self) -> RamStore:
+        """Fichier RAM de sortie (temporaire si aucun chemin n'est fourni)
+
+        Le fichier temporaire d'un chargement précédent est supprimé : seul le
+        dernier self.ram_store reste lisible.
+        """
+        if self.ram_path:
+            return RamStore(self.ram_path, self.ram_size)
+        if self.ram_store is not None:
+            self.ram_store.close()
+            self.ram_store = None
+        self._remove_ram_dir()
+        self._ram_dir = tempfile.TemporaryDirectory(prefix="smb_ram_", ignore_cleanup_errors=True)
+        return RamStore(os.path.join(self._ram_dir.name, "ram.u8"), self.ram_size)
 
-    def load_data(self) -> Dict[str, pd.DataFrame]:
-        """Charge et organise les données du dataset"""
-        episodes_data = []
-        frames_data = []
+    @traced()
+    def load_data(self, n_workers: int = 1, chunk_size: int = 1,
+                  cache: Optional[FrameCache] = None) -> Dict[str, pd.DataFrame]:
+        """Charge et organise les données du dataset
+
+        Args:
+            n_workers: nombre de processus de lecture (1 = lecture séquentielle)
+            chunk_size: nombre de dossiers d'épisodes envoyés à la fois à un processus
+            cache: cache persistant ; seuls les dossiers modifiés sont re-parsés
+        """
+        if self.pack is not None:
+            # Un pack se lit en quelques lectures séquentielles : ni workers ni cache
+            data = self.pack.load()
+            self.ram_store = self.pack.ram_store()
+            print(f"\nPack chargé: {len(data['episodes'])} épisodes, {len(data['frames'])} frames")
+            return data
+
+        # Tampons colonnaires : un tableau par épisode et par colonne, concaténés à la fin
+        episode_columns = {field: [] for field in FOLDER_FIELDS}
+        frame_columns = {col: [] for col in FRAME_COLUMNS}
+        # Dossier d'origine de chaque ligne, pour la fusion avec le cache
+        episode_folders = []
+        frame_folders = []
         
         # Compte le nombre total de fichiers
         total_files = self.count_total_files()
         print(f"\nNombre total de fichiers PNG trouvés: {total_files}")
-        
+
+        folders = self.iter_episode_folders()
+        use_cache = cache is not None and cache.enabled
+        if use_cache:
+            with span("DataLoader.cache_load"):
+                cached_keys, cached_episodes, cached_frames = cache.load()
+            folder_keys = self.get_manifest().folder_keys()
+            hits = {name for name, key in folder_keys.items() if cached_keys.get(name) == key}
+            to_load = [folder for folder in folders if folder.name not in hits]
+            cache.stats = {
+                "hits": len(hits),
+                "misses": len(to_load),
+                "removed": len(set(cached_keys) - set(folder_keys))
+            }
+            update_cache = bool(cache.stats["misses"] or cache.stats["removed"])
+            # Cache à jour : le fichier RAM du cache est réutilisé tel quel
+            ram_store = cache.new_ram_store() if update_cache else cache.ram_store()
+        else:
+            to_load = folders
+            update_cache = False
+            ram_store = self._new_ram_store()
+
+        if update_cache or not use_cache:
+            ram_store.open_writer()
+
         # Initialise la barre de progression principale
-        with tqdm(total=total_files, desc="Chargement des données", unit="fichiers") as pbar:
-            # Parcours des dossiers d'épisodes
-            for folder in self.data_path.iterdir():
-                if folder.is_dir():
-                    folder_info = self.parse_folder_name(folder.name)
-                    if folder_info:
-                        episodes_data.append(folder_info)
-                        
-                        # Parcours des frames dans le dossier
-                        for frame_file in folder.glob("*.png"):
-                            frame_info = self.parse_frame_name(frame_file.name)
-                            if frame_info:
-                                try:
-                                    metadata = self.extract_png_metadata(str(frame_file))
-                                    frame_data = {**frame_info, **metadata}
-                                    frames_data.append(frame_data)
-                                except Exception as e:
-                                    print(f"\nErreur lors du traitement de {frame_file}: {e}")
-                                    continue
-                            pbar.update(1)
+        with tqdm(total=total_files, desc="Chargement des données", unit="fichiers") as pbar, \
+                span("DataLoader.read_frames", workers=n_workers) as read:
+            if use_cache:
+                pbar.update(sum(folder_keys[name][0] for name in hits))
+
+            # Fusion des morceaux colonnaires renvoyés pour chaque épisode
+            for chunk in self._iter_chunks(to_load, n_workers, chunk_size):
+                read.add(folders=1, files=chunk["n_files"], bytes_read=chunk["bytes_read"],
+                         worker_seconds=chunk["read_seconds"])
+                if chunk["episode"]:
+                    for field in FOLDER_FIELDS:
+                        episode_columns[field].append(chunk["episode"][field])
+                    episode_folders.append(chunk["folder"])
+                    for col in _CHUNK_COLUMNS:
+                        frame_columns[col].append(chunk["frames"][col])
+                    start = ram_store.append(chunk["ram"])
+                    frame_columns["ram_index"].append(np.arange(start, start + len(chunk["ram"])))
+                    frame_folders.append(np.full(len(chunk["ram"]), chunk["folder"], dtype=object))
+                pbar.update(chunk["n_files"])
+
+        if use_cache and update_cache and not cached_frames.empty:
+            # Les RAM des dossiers repris du cache sont recopiées dans le nouveau fichier
+            kept = cached_frames[FrameCache.FOLDER_COLUMN].isin(hits).to_numpy()
+            ram_index = cached_frames["ram_index"].to_numpy(dtype=np.int64)
+            start = ram_store.copy_rows(cache.ram_store(), ram_index[kept])
+            # Les nouveaux indices peuvent dépasser le type entier de la colonne du cache
+            ram_index[kept] = np.arange(start, start + kept.sum())
+            cached_frames["ram_index"] = ram_index
+        ram_store.close()
 
         # Création des DataFrames
         print("\nCréation des DataFrames...")
-        df_episodes = pd.DataFrame(episodes_data) if episodes_data else pd.DataFrame()
-        df_frames = pd.DataFrame(frames_data) if frames_data else pd.DataFrame()
+        n_frames = sum(len(values) for values in frame_columns["frame"])
+        with span("DataLoader.build_dataframes", frames=n_frames):
+            df_episodes = pd.DataFrame()
+            if episode_folders:
+                df_episodes = build_table(episode_columns, EPISODE_SCHEMA)
+            df_frames = pd.DataFrame()
+            if n_frames:
+                df_frames = build_table({col: np.concatenate(values) for col, values in frame_columns.items()},
+                                        FRAME_SCHEMA)
+
+        if use_cache:
+            col = FrameCache.FOLDER_COLUMN
+            if not df_episodes.empty:
+                df_episodes[col] = episode_folders
+            if not df_frames.empty:
+                df_frames[col] = np.concatenate(frame_folders)
+            folder_rank = {folder.name: i for i, folder in enumerate(folders)}
+            # Les catégories du cache et des dossiers rechargés diffèrent : le schéma est réappliqué
+            df_episodes = apply_schema(self._merge_cached_rows(cached_episodes, df_episodes, hits, folder_rank),
+                                       EPISODE_SCHEMA)
+            df_frames = apply_schema(self._merge_cached_rows(cached_frames, df_frames, hits, folder_rank),
+                                     FRAME_SCHEMA)
+            if update_cache:
+                with span("DataLoader.cache_save", frames=len(df_frames)):
+                    cache.save(folder_keys, df_episodes, df_frames, ram_store)
+                ram_store = cache.ram_store()
+            df_episodes = df_episodes.drop(columns=col, errors="ignore")
+            df_frames = df_frames.drop(columns=col, errors="ignore")
+            print(f"\n{cache.report()}")
+
+        self.ram_store = ram_store
         
         # Affichage des statistiques de chargement
         print(f"\nEpisodes chargés: {len(df_episodes)}")
-        print(f"Frames chargées: {len(df_frames)}")
+        print(f"Frames chargées: {len(df_frames)} ({bytes_per_row(df_frames):.1f} octets par frame)")
         
         if df_episodes.empty:
             print("Attention: Aucun épisode n'a été chargé!")
@@ -113,13 +629,186 @@ class DataLoader:
             "frames": df_frames
         }
 
+    def iter_episodes(self, n_workers: int = 1, chunk_size: int = 1,
+                      folders: Optional[List[Path]] = None,
+                      store_ram: bool = True) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Parcourt le dataset épisode par épisode (mode streaming)
+
+        Chaque lot a la même forme que le résultat de load_data ("episodes" avec
+        une ligne, "frames" avec les frames du dossier), ce qui borne la mémoire
+        par le plus gros épisode. Les RAM sont écrites dans self.ram_store.
+
+        Args:
+            folders: dossiers à parcourir (tous les dossiers d'épisodes par défaut)
+            store_ram: si False, aucun fichier RAM n'est écrit et les frames
+                n'ont pas de colonne ram_index (analyses sans état de jeu)
+        """
+        if self.pack is not None:
+            if folders is not None:
+                raise ValueError("La sélection de dossiers n'est pas disponible pour un pack")
+            if store_ram:
+                self.ram_store = self.pack.ram_store()
+            yield from self.pack.iter_episodes()
+            return
+        if folders is None:
+            folders = self.iter_episode_folders()
+        folder_keys = self.get_manifest().folder_keys()
+        total_files = sum(folder_keys[folder.name][0] for folder in folders)
+        ram_store = None
+        if store_ram:
+            ram_store = self._new_ram_store()
+            ram_store.open_writer()
+            self.ram_store = ram_store
+        columns_out = FRAME_COLUMNS if store_ram else [col for col in FRAME_COLUMNS if col != "ram_index"]
+
+        try:
+            with tqdm(total=total_files, desc="Lecture des épisodes", unit="fichiers") as pbar:
+                for chunk in self._iter_chunks(folders, n_workers, chunk_size):
+                    pbar.update(chunk["n_files"])
+                    if not chunk["episode"]:
+                        continue
+                    df_frames = pd.DataFrame()
+                    if len(chunk["ram"]):
+                        columns = chunk["frames"]
+                        if ram_store is not None:
+                            start = ram_store.append(chunk["ram"])
+                            columns = dict(columns, ram_index=np.arange(start, start + len(chunk["ram"])))
+                        df_frames = build_table({col: columns[col] for col in columns_out}, FRAME_SCHEMA)
+                    yield {
+                        "episodes": build_table({field: [chunk["episode"][field]] for field in FOLDER_FIELDS},
+                                                EPISODE_SCHEMA),
+                        "frames": df_frames
+                    }
+        finally:
+            if ram_store is not None:
+                ram_store.close()
+
+    def image_shape(self, path: Optional[str] = None, scale: int = 1, grayscale: bool = False) -> Tuple[int, ...]:
+        """Forme d'une frame décodée (celle de `path`, ou de la première frame du dataset)"""
+        if path is None:
+            path = self.get_manifest().files["path"].iat[0]
+        with self.source.open(path) as fp:
+            return _decode_image(fp, scale, grayscale).shape
+
+    def _decode_batches(self, executor: Optional[ProcessPoolExecutor], paths: List[str], images: np.ndarray,
+                        scale: int, grayscale: bool, batch_size: int, out_path: Optional[str] = None) -> List:
+        """Découpe paths en lots ; les décode tout de suite sans executor, sinon renvoie les futures"""
+        shape = images.shape[1:]
+        futures = []
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            if executor is None:
+                result = _decode_images(self, batch, shape, scale, grayscale, out_path, start)
+                if result is not None:
+                    images[start:start + len(batch)] = result
+            else:
+                futures.append((start, executor.submit(_decode_images, self, batch, shape, scale,
+                                                       grayscale, out_path, start)))
+        return futures
+
+    @staticmethod
+    def _collect_batches(futures: List, images: np.ndarray):
+        for start, future in futures:
+            result = future.result()
+            if result is not None:
+                images[start:start + len(result)] = result
+
+    @traced()
+    def load_images(self, paths: List[str], n_workers: int = 1, batch_size: int = 64, scale: int = 1,
+                    grayscale: bool = False, out_path: Optional[str] = None) -> np.ndarray:
+        """Décode des frames dans un tableau uint8 préalloué (n, H, W[, 3])
+
+        Args:
+            paths: frames à décoder (colonne `path` du manifeste), dans l'ordre voulu
+            batch_size: nombre de frames décodées par tâche
+            scale: facteur entier de sous-échantillonnage
+            out_path: fichier .npy mappé en mémoire pour les gros volumes ; les
+                processus y écrivent directement leurs lots
+        """
+        if self.pack is not None:
+            raise ValueError("Les images des frames ne sont pas incluses dans un pack")
+        paths = list(paths)
+        shape = (len(paths),) + (self.image_shape(paths[0], scale, grayscale) if paths else (0, 0))
+        if out_path:
+            images = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.uint8, shape=shape)
+            # L'en-tête doit être sur disque avant que les processus ouvrent le fichier
+            images.flush()
+        else:
+            images = np.empty(shape, dtype=np.uint8)
+        add_counts(frames=len(paths), bytes_decoded=images.nbytes)
+
+        if n_workers <= 1:
+            self._decode_batches(None, paths, images, scale, grayscale, batch_size, out_path)
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                self._collect_batches(self._decode_batches(executor, paths, images, scale, grayscale,
+                                                           batch_size, out_path), images)
+        if out_path:
+            images.flush()
+        return images
+
+    def iter_episode_images(self, n_workers: int = 1, batch_size: int = 64, scale: int = 1,
+                            grayscale: bool = False, folders: Optional[List[Path]] = None) -> Iterator[Dict]:
+        """Parcourt les écrans épisode par épisode, dans l'ordre des frames
+
+        Chaque élément contient `folder`, `frame` (numéros de frame) et `images`
+        (uint8 (n, H, W[, 3])). Seuls l'épisode courant et le suivant (décodé en
+        avance par le pool) sont en mémoire.
+        """
+        if self.pack is not None:
+            raise ValueError("Les images des frames ne sont pas incluses dans un pack")
+        manifest = self.get_manifest()
+        if folders is None:
+            folders = self.iter_episode_folders()
+        parsed = set(manifest.folders.loc[manifest.folders["parsed"], "name"])
+        plans = []
+        for folder in folders:
+            if folder.name not in parsed:
+                continue
+            files = manifest.folder_files(folder.name)
+            files = files[files["parsed"].to_numpy()].sort_values("frame", kind="stable")
+            if len(files):
+                plans.append((folder.name, files["frame"].to_numpy(), files["path"].tolist()))
+        if not plans:
+            return
+        frame_shape = self.image_shape(plans[0][2][0], scale, grayscale)
+
+        executor = ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else None
+        try:
+            pending = deque()
+            for name, frames, paths in plans:
+                images = np.empty((len(paths),) + frame_shape, dtype=np.uint8)
+                futures = self._decode_batches(executor, paths, images, scale, grayscale, batch_size)
+                pending.append((name, frames, images, futures))
+                # L'épisode suivant est soumis avant de renvoyer le précédent
+                if len(pending) > 1 or executor is None:
+                    name, frames, images, futures = pending.popleft()
+                    self._collect_batches(futures, images)
+                    yield {"folder": name, "frame": frames, "images": images}
+            while pending:
+                name, frames, images, futures = pending.popleft()
+                self._collect_batches(futures, images)
+                yield {"folder": name, "frame": frames, "images": images}
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _merge_cached_rows(cached: pd.DataFrame, loaded: pd.DataFrame,
+                           hits: set, folder_rank: Dict[str, int]) -> pd.DataFrame:
+        """Fusionne les lignes reprises du cache et les lignes rechargées, dans l'ordre des dossiers"""
+        col = FrameCache.FOLDER_COLUMN
+        parts = [loaded] if not loaded.empty else []
+        if not cached.empty:
+            kept = cached[cached[col].isin(hits)]
+            if not kept.empty:
+                parts.insert(0, kept)
+        if not parts:
+            return pd.DataFrame()
+        merged = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        order = np.argsort(merged[col].map(folder_rank).to_numpy(), kind="stable")
+        return merged.iloc[order].reset_index(drop=True)
+
     def get_file_info(self) -> List[Dict]:
         """Retourne les informations sur les fichiers disponibles"""
-        return [
-            {
-                "name": file.name,
-                "size": file.stat().st_size,
-                "modified": file.stat().st_mtime
-            }
-            for file in self.data_path.glob("**/*.png")
-        ]
\ No newline at end of file
+        return self.get_manifest().file_info()
@@ -1,13 +1,77 @@
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Dict, List, Optional
+from utils.instrumentation import traced, add_counts
+
+# Masque de chaque bouton dans le code d'action de la manette NES
+BUTTON_MASKS = {
+    'A': 128,
+    'up': 64,
+    'left': 32,
+    'B': 16,
+    'start': 8,
+    'right': 4,
+    'down': 2,
+    'select': 1
+}
+
+# Valeur numérique de chaque outcome
+OUTCOME_VALUES = {'fail': 0, 'win': 1}
+
+# Table (8, 256) : état de chaque bouton pour chacun des 256 codes d'action
+BUTTON_TABLE = (np.arange(256)[None, :] & np.array(list(BUTTON_MASKS.values()))[:, None]) != 0
+
+
+def decode_buttons(actions, buttons: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """Décode un tableau de codes d'action en colonnes booléennes, sans boucle Python
+
+    Args:
+        buttons: boutons à décoder (les 8 boutons par défaut)
+    """
+    buttons = list(BUTTON_MASKS) if buttons is None else list(buttons)
+    rows = [list(BUTTON_MASKS).index(button) for button in buttons]
+    codes = np.asarray(actions)
+    if codes.size and codes.min() >= 0 and codes.max() < 256:
+        # Une lecture de table par frame ; chaque ligne de la table donne une colonne contiguë
+        bits = BUTTON_TABLE[rows][:, codes]
+    else:
+        masks = np.array([BUTTON_MASKS[button] for button in buttons])
+        bits = (codes[None, :].astype(np.int64) & masks[:, None]) != 0
+    return dict(zip(buttons, bits))
+
+
+def outcome_numeric(outcomes) -> np.ndarray:
+    """Outcome numérique (fail = 0, win = 1) sur un octet, en float32 avec NaN si un outcome est inconnu"""
+    codes = pd.Categorical(outcomes, categories=list(OUTCOME_VALUES)).codes
+    if (codes < 0).any():
+        return np.where(codes < 0, np.nan, codes).astype(np.float32)
+    return codes.astype(np.int8)
+
+
+# Colonnes nécessaires au calcul des statistiques par épisode
+EPISODE_STATS_COLUMNS = ['session_id', 'episode', 'frame', 'action', 'outcome_numeric']
+
 
 class DataPreprocessor:
-    def __init__(self, dataframes: Dict[str, pd.DataFrame]):
-        self.dataframes = dataframes
+    def __init__(self, dataframes: Dict[str, pd.DataFrame] = None, index=None):
+        self.dataframes = dataframes if dataframes is not None else {}
+        # FrameIndex partagé avec DifficultyAnalyzer (clés de regroupement factorisées une fois)
+        self._index = index
+        # Agrégats partiels du mode streaming, par (session_id, episode) :
+        # [nb frames, actions distinctes, somme des actions, nb actions, premier outcome]
+        self.episode_state = {}
+        self.outcome_has_nan = False
+
+    @property
+    def index(self):
+        if self._index is None:
+            # Import local : frame_index dépend de ce module (table des boutons)
+            from frame_index import FrameIndex
+            self._index = FrameIndex(self.dataframes)
+        return self._index
 
     def process_button_inputs(self, action: int) -> Dict[str, bool]:
-        """Convertit le code d'action en boutons individuels"""
+        """Convertit le code d'action en boutons individuels (implémentation de référence)"""
         return {
             'A': bool(action & 128),
             'up': bool(action & 64),
@@ -19,34 +83,35 @@ class DataPreprocessor:
             'select': bool(action & 1)
         }
 
+    @traced()
     def clean_data(self) -> Dict[str, pd.DataFrame]:
-        """Nettoie et prépare les données"""
+        """Nettoie et prépare les données
+
+        Les colonnes d'origine sont partagées avec les tables chargées (copie
+        superficielle) : seul outcome_numeric est ajouté. Les boutons restent
+        sous forme de bits dans `action` et sont décodés à la demande (decode_buttons).
+        """
         cleaned_dfs = {}
         
         if 'frames' in self.dataframes:
-            df_frames = self.dataframes['frames'].copy()
-            
-            # Vérification de l'existence de la colonne 'action'
-            if 'action' in df_frames.columns:
-                # Conversion des actions en colonnes de boutons
-                button_data = df_frames['action'].apply(self.process_button_inputs)
-                button_df = pd.DataFrame(button_data.tolist())
-                df_frames = pd.concat([df_frames, button_df], axis=1)
+            df_frames = self.dataframes['frames'].copy(deep=False)
             
             # Conversion des outcomes en format numérique
             if 'outcome' in df_frames.columns:
-                df_frames['outcome_numeric'] = df_frames['outcome'].map({'fail': 0, 'win': 1})
+                df_frames['outcome_numeric'] = outcome_numeric(df_frames['outcome'])
             
             cleaned_dfs['frames'] = df_frames
+            add_counts(frames=len(df_frames))
 
         if 'episodes' in self.dataframes:
-            df_episodes = self.dataframes['episodes'].copy()
+            df_episodes = self.dataframes['episodes'].copy(deep=False)
             if 'outcome' in df_episodes.columns:
-                df_episodes['outcome_numeric'] = df_episodes['outcome'].map({'fail': 0, 'win': 1})
+                df_episodes['outcome_numeric'] = outcome_numeric(df_episodes['outcome'])
             cleaned_dfs['episodes'] = df_episodes
             
         return cleaned_dfs
 
+    @traced()
     def calculate_episode_stats(self) -> pd.DataFrame:
         """Calcule les statistiques par épisode"""
         if 'frames' not in self.dataframes:
@@ -55,18 +120,93 @@ class DataPreprocessor:
         df_frames = self.dataframes['frames']
         
         # Vérification des colonnes nécessaires
-        required_columns = ['session_id', 'episode', 'frame', 'action', 'outcome_numeric']
-        if not all(col in df_frames.columns for col in required_columns):
+        if not all(col in df_frames.columns for col in EPISODE_STATS_COLUMNS):
             print("Colonnes manquantes pour le calcul des statistiques d'épisode")
             return pd.DataFrame()
         
-        episode_stats = df_frames.groupby(['session_id', 'episode']).agg({
-            'frame': 'count',
-            'action': ['nunique', 'mean'],
-            'outcome_numeric': 'first'
-        }).reset_index()
+        keys = self.index.group_keys('frames', ['session_id', 'episode'])
         
-        episode_stats.columns = ['session_id', 'episode', 'frame_count', 
-                               'unique_actions', 'avg_action_value', 'outcome']
+        episode_stats = keys.key_frame()
+        episode_stats['frame_count'] = keys.count(df_frames['frame'])
+        episode_stats['unique_actions'] = keys.nunique(df_frames['action'])
+        episode_stats['avg_action_value'] = keys.mean(df_frames['action'])
+        # Même type que finalize_episode_stats : int64, ou float64 si un outcome est inconnu
+        outcomes = keys.first(df_frames['outcome_numeric'])
+        episode_stats['outcome'] = outcomes.astype(np.float64 if outcomes.dtype.kind == 'f' else np.int64)
                                
-        return episode_stats
\ No newline at end of file
+        return episode_stats
+
+    def update(self, batch: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Nettoie un lot d'épisodes (mode streaming) et met à jour les agrégats par épisode"""
+        cleaned = DataPreprocessor(batch).clean_data()
+        if 'frames' in cleaned:
+            self.update_episode_stats(cleaned['frames'])
+        return cleaned
+
+    def update_episode_stats(self, df_frames: pd.DataFrame):
+        """Ajoute les frames nettoyées d'un lot aux agrégats par épisode"""
+        if df_frames.empty or not all(col in df_frames.columns for col in EPISODE_STATS_COLUMNS):
+            return
+
+        if df_frames['outcome_numeric'].isna().any():
+            self.outcome_has_nan = True
+
+        for (session_id, episode), group in df_frames.groupby(['session_id', 'episode'], sort=False, observed=True):
+            state = self.episode_state.setdefault((session_id, int(episode)), [0, set(), 0, 0, None])
+            actions = group['action'].dropna()
+            state[0] += int(group['frame'].count())
+            state[1].update(int(a) for a in actions.unique())
+            state[2] += int(actions.sum())
+            state[3] += len(actions)
+            if state[4] is None:
+                outcomes = group['outcome_numeric'].dropna()
+                if not outcomes.empty:
+                    state[4] = float(outcomes.iloc[0])
+
+    def get_state(self) -> Dict:
+        """Agrégats par épisode sous forme sérialisable en JSON"""
+        return {
+            'episodes': [
+                [session_id, episode, st[0], sorted(st[1]), st[2], st[3], st[4]]
+                for (session_id, episode), st in self.episode_state.items()
+            ],
+            'outcome_has_nan': self.outcome_has_nan
+        }
+
+    def merge_state(self, state: Dict):
+        """Fusionne des agrégats partiels (ceux d'un run précédent ou d'un autre lot)"""
+        for session_id, episode, count, actions, action_sum, action_count, outcome in state['episodes']:
+            current = self.episode_state.setdefault((session_id, int(episode)), [0, set(), 0, 0, None])
+            current[0] += count
+            current[1].update(actions)
+            current[2] += action_sum
+            current[3] += action_count
+            if current[4] is None:
+                current[4] = outcome
+        self.outcome_has_nan = self.outcome_has_nan or state['outcome_has_nan']
+
+    @traced()
+    def finalize_episode_stats(self) -> pd.DataFrame:
+        """Statistiques par épisode à partir des agrégats du mode streaming
+
+        Produit la même table que calculate_episode_stats sur l'ensemble des frames.
+        """
+        if not self.episode_state:
+            print("Colonnes manquantes pour le calcul des statistiques d'épisode")
+            return pd.DataFrame()
+
+        keys = sorted(self.episode_state)
+        states = [self.episode_state[key] for key in keys]
+        outcomes = [np.nan if st[4] is None else st[4] for st in states]
+        episode_stats = pd.DataFrame({
+            'session_id': [key[0] for key in keys],
+            'episode': np.array([key[1] for key in keys], dtype=np.int64),
+            'frame_count': np.array([st[0] for st in states], dtype=np.int64),
+            'unique_actions': np.array([len(st[1]) for st in states], dtype=np.int64),
+            'avg_action_value': np.array(
+                [st[2] / st[3] if st[3] else np.nan for st in states], dtype=np.float64
+            ),
+            # outcome_numeric n'est entier que si tous les outcomes ont été reconnus
+            'outcome': np.array(outcomes, dtype=np.float64 if self.outcome_has_nan else np.int64)
+        })
+        return episode_stats
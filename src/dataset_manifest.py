@@ -0,0 +1,119 @@
+import pandas as pd
+import numpy as np
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Union
+from frame_source import FrameSource, LocalSource
+
+# Champs extraits des noms de dossiers et de frames
+FOLDER_FIELDS = ["user", "session_id", "episode", "world", "level", "outcome"]
+FRAME_FIELDS = ["user", "session_id", "episode", "world", "level", "frame", "action", "datetime", "outcome"]
+INT_FIELDS = {"episode", "world", "level", "frame", "action"}
+
+
+def _parsed_columns(infos: List[Dict], fields: List[str]) -> Dict[str, list]:
+    """Met en colonnes des résultats de parsing (-1 / None pour les noms non reconnus)"""
+    columns = {}
+    for field in fields:
+        missing = -1 if field in INT_FIELDS else None
+        columns[field] = [info[field] if info else missing for info in infos]
+    columns["parsed"] = [info is not None for info in infos]
+    return columns
+
+
+class DatasetManifest:
+    """Inventaire du dataset construit en un seul parcours de l'arborescence
+
+    `files` contient une ligne par PNG (chemin, dossier relatif, taille, mtime
+    et champs du nom de frame pour les PNG des dossiers d'épisodes), triée par
+    dossier puis par nom. `folders` contient une ligne par sous-dossier direct
+    (champs du nom de dossier, nombre de PNG, taille totale, mtime maximal).
+    """
+
+    def __init__(self, root: Path, folders: pd.DataFrame, files: pd.DataFrame):
+        self.root = Path(root)
+        self.folders = folders
+        self.files = files
+        # Plage de lignes de `files` pour chaque dossier (les lignes sont contiguës)
+        folder_values = files["folder"].to_numpy()
+        boundaries = np.flatnonzero(folder_values[1:] != folder_values[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]) if len(files) else np.array([], dtype=np.int64)
+        stops = np.concatenate([boundaries, [len(files)]]) if len(files) else starts
+        self._ranges = {folder_values[a]: (a, b) for a, b in zip(starts, stops)}
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @classmethod
+    def scan(cls, source: Union[str, FrameSource], loader) -> "DatasetManifest":
+        """Parcourt la source une seule fois (os.scandir pour un dossier, index pour une archive)
+
+        Args:
+            source: source des frames, ou chemin d'un dossier local
+            loader: objet fournissant parse_folder_name / parse_frame_names
+        """
+        if not isinstance(source, FrameSource):
+            source = LocalSource(source)
+        listing = source.scan()
+        top_folders = list(listing.folders)
+
+        files = pd.DataFrame({
+            "folder": listing.rel_folders,
+            "name": listing.names,
+            "path": listing.paths,
+            "size": np.array(listing.sizes, dtype=np.int64),
+            "mtime": np.array(listing.mtimes, dtype=np.float64)
+        })
+        files = files.sort_values(["folder", "name"], kind="stable").reset_index(drop=True)
+
+        # Les noms de frames ne sont parsés (en lot) que dans les dossiers d'épisodes
+        top_level = files["folder"].isin(set(top_folders)).to_numpy()
+        columns = loader.parse_frame_names(files["name"].to_numpy()[top_level].tolist())
+        parsed = np.zeros(len(files), dtype=bool)
+        parsed[top_level] = columns["parsed"]
+        for field in FRAME_FIELDS:
+            values = np.full(len(files), -1 if field in INT_FIELDS else None,
+                             dtype=np.int64 if field in INT_FIELDS else object)
+            values[top_level] = columns[field]
+            files[field] = values
+        files["parsed"] = parsed
+
+        top_folders.sort()
+        folders = pd.DataFrame({"name": top_folders})
+        for field, values in _parsed_columns([loader.parse_folder_name(name) for name in top_folders],
+                                             FOLDER_FIELDS).items():
+            folders[field] = values
+        stats = files.groupby("folder").agg(n_files=("size", "size"), total_size=("size", "sum"),
+                                            max_mtime=("mtime", "max"))
+        stats = stats.reindex(folders["name"])
+        folders["n_files"] = stats["n_files"].fillna(0).astype(np.int64).to_numpy()
+        folders["total_size"] = stats["total_size"].fillna(0).astype(np.int64).to_numpy()
+        folders["max_mtime"] = stats["max_mtime"].fillna(0.0).to_numpy()
+
+        return cls(source.root, folders, files)
+
+    def folder_files(self, folder_name: str) -> pd.DataFrame:
+        """PNG directement contenus dans un dossier, dans l'ordre des noms"""
+        start, stop = self._ranges.get(folder_name, (0, 0))
+        return self.files.iloc[start:stop]
+
+    def folder_keys(self) -> Dict[str, List]:
+        """Clé de chaque dossier pour le cache : [nombre de PNG, taille totale, mtime maximal]"""
+        return {
+            name: [int(n), int(size), float(mtime)]
+            for name, n, size, mtime in zip(self.folders["name"], self.folders["n_files"],
+                                            self.folders["total_size"], self.folders["max_mtime"])
+        }
+
+    def fingerprint(self) -> str:
+        """Empreinte du contenu du dataset (chemin et clé de chaque dossier)"""
+        payload = json.dumps([str(self.root.resolve()), self.folder_keys()], sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def file_info(self) -> List[Dict]:
+        """Nom, taille et date de modification de chaque PNG"""
+        return [
+            {"name": name, "size": int(size), "modified": float(mtime)}
+            for name, size, mtime in zip(self.files["name"], self.files["size"], self.files["mtime"])
+        ]
@@ -1,63 +1,415 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Tuple
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from frame_index import FrameIndex
+from group_keys import GroupKeys
+from data_preprocessor import decode_buttons
+from confidence_intervals import wilson_interval, bootstrap_rates, beta_draws, draw_interval, bin_probabilities
+from utils.instrumentation import traced, add_counts
+
+# Boutons (décodés du code d'action) moyennés par analyze_player_actions, et leur nom en sortie
+ACTION_FREQ_COLUMNS = {'A': 'jump_freq', 'B': 'run_freq', 'right': 'right_freq', 'left': 'left_freq'}
+# Colonnes d'état de jeu (ram_features.add_ram_features) nécessaires à la progression
+PROGRESS_COLUMNS = ['session_id', 'episode', 'world', 'level', 'frame', 'x_position', 'dead']
+# Découpage des positions de mort : 8 mondes x 4 niveaux, intervalles de 32 pixels sur 16 pages
+N_WORLDS, N_LEVELS = 8, 4
+DEATH_BIN_WIDTH = 32
+DEATH_MAX_X = 4096
+# Colonnes de la table (joueur, niveau) du modèle compétence/difficulté
+SKILL_COUNT_COLUMNS = ['user', 'world', 'level', 'successes', 'plays']
+
+
+def level_success_counts(level_metrics: pd.DataFrame):
+    """(succès, essais) de chaque niveau, à partir du taux de réussite et du nombre d'essais"""
+    trials = level_metrics['total_plays'].to_numpy(dtype=np.float64)
+    successes = np.round(level_metrics['success_rate'].fillna(0).to_numpy(dtype=np.float64) * trials)
+    return successes, trials
+
+
+def add_confidence_intervals(level_metrics: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les intervalles de confiance du taux de réussite de chaque niveau
+
+    Wilson (success_ci_*, repris en difficulty_ci_*), bootstrap (success_boot_*)
+    et loi a posteriori Beta (success_beta_*), calculés pour tous les niveaux
+    à la fois. Un niveau sans essai a des intervalles NaN.
+    """
+    successes, trials = level_success_counts(level_metrics)
+    low, high = wilson_interval(successes, trials)
+    level_metrics['success_ci_low'] = low
+    level_metrics['success_ci_high'] = high
+    level_metrics['success_boot_low'], level_metrics['success_boot_high'] = \
+        draw_interval(bootstrap_rates(successes, trials))
+    level_metrics['success_beta_low'], level_metrics['success_beta_high'] = \
+        draw_interval(beta_draws(successes, trials))
+    level_metrics['difficulty_ci_low'] = 1 - high
+    level_metrics['difficulty_ci_high'] = 1 - low
+    return level_metrics
+
+
+class SkillModel:
+    """Modèle de Rasch : P(réussite du joueur u sur le niveau l) = sigmoïde(skill_u - difficulty_l)
+
+    Estime conjointement une compétence par joueur et une difficulté par
+    niveau : un niveau joué surtout par de bons joueurs n'apparaît plus
+    facile. Le modèle ne dépend que des succès et essais par couple (joueur,
+    niveau), et la pénalité L2 rend la solution unique (joueurs et niveaux
+    jamais observés ensemble, taux de 0 % ou 100 %).
+
+    L'ajustement alterne des pas de Newton exacts sur les compétences puis
+    sur les difficultés : dans chaque bloc la hessienne est diagonale, et
+    gradients et hessiennes sont les produits de la matrice creuse du plan
+    (une ligne par couple, +1 sur le joueur, -1 sur le niveau) par les
+    résidus, calculés par np.bincount. Chaque itération est linéaire en
+    nombre de couples.
+    """
+
+    VERSION = 2
+    MAX_STEP = 2.0
+
+    def __init__(self, l2: float = 0.1, max_iter: int = 200, tol: float = 1e-6):
+        self.l2 = l2
+        self.max_iter = max_iter
+        self.tol = tol
+        self.skills = pd.DataFrame(columns=['user', 'skill', 'skill_se', 'plays'])
+        self.difficulties = pd.DataFrame(columns=['world', 'level', 'skill_difficulty', 'skill_difficulty_se',
+                                                  'adjusted_success_rate'])
+        self.iterations = 0
+        self.converged = False
+        # Empreinte des comptes et de la pénalité de l'ajustement (voir fingerprint)
+        self.counts_key = None
+
+    @staticmethod
+    def _sigmoid(x: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+    @staticmethod
+    def _canonical_counts(counts: pd.DataFrame) -> pd.DataFrame:
+        """Couples joués, triés par (joueur, niveau) : l'ordre des lignes ne change pas les sommes"""
+        counts = counts[counts['plays'] > 0]
+        order = np.lexsort((counts['level'].to_numpy(), counts['world'].to_numpy(),
+                            counts['user'].astype(str).to_numpy()))
+        return counts.iloc[order]
+
+    def fingerprint(self, counts: pd.DataFrame) -> str:
+        """Empreinte des comptes (quel que soit l'ordre des lignes ou le type des colonnes) et de l2"""
+        counts = self._canonical_counts(counts)
+        rows = [counts['user'].astype(str).tolist()] + \
+            [counts[col].to_numpy(dtype=np.int64).tolist() for col in SKILL_COUNT_COLUMNS[1:]]
+        payload = json.dumps([self.l2, rows])
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @traced("SkillModel.fit")
+    def fit(self, counts: pd.DataFrame, previous: Optional["SkillModel"] = None,
+            cold_start: bool = False) -> "SkillModel":
+        """Ajuste le modèle sur une table SKILL_COUNT_COLUMNS
+
+        Args:
+            previous: ajustement précédent. S'il porte sur les mêmes comptes (même
+                counts_key), ses paramètres sont repris sans itérer : un run
+                sans nouvel épisode redonne les mêmes valeurs au bit près.
+                Sinon ils servent de point de départ (0 pour un joueur ou un
+                niveau nouveau) et le résultat est celui d'un départ à zéro à
+                la tolérance `tol` près.
+            cold_start: part de zéro même si `previous` porte sur d'autres
+                comptes (mêmes comptes, même résultat au bit près)
+        """
+        key = self.fingerprint(counts)
+        counts = self._canonical_counts(counts)
+        users = GroupKeys.from_frame(counts, ['user'])
+        levels = GroupKeys.from_frame(counts, ['world', 'level'])
+        user, level = users.group, levels.group
+        successes = counts['successes'].to_numpy(dtype=np.float64)
+        plays = counts['plays'].to_numpy(dtype=np.float64)
+        user_keys, level_keys = users.key_frame(), levels.key_frame()
+        add_counts(pairs=len(counts), users=users.n_groups, levels=levels.n_groups)
+
+        skill = np.zeros(users.n_groups)
+        difficulty = np.zeros(levels.n_groups)
+        self.iterations, self.converged, self.counts_key = 0, False, key
+        same_counts = previous is not None and previous.counts_key == key
+        if previous is not None and (same_counts or not cold_start):
+            if not previous.skills.empty:
+                skill = previous.skills.set_index('user')['skill'] \
+                    .reindex(user_keys['user']).fillna(0).to_numpy(dtype=np.float64, copy=True)
+            if not previous.difficulties.empty:
+                difficulty = previous.difficulties.set_index(['world', 'level'])['skill_difficulty'] \
+                    .reindex(pd.MultiIndex.from_frame(level_keys)).fillna(0).to_numpy(dtype=np.float64, copy=True)
+            # Point fixe déjà calculé pour ces comptes : repartir de lui le déplacerait d'un pas < tol
+            self.converged = same_counts and previous.converged
+
+        while not self.converged and self.iterations < self.max_iter:
+            self.iterations += 1
+            # Bloc des compétences : gradient et hessienne par joueur
+            p = self._sigmoid(skill[user] - difficulty[level])
+            residual, weight = successes - plays * p, plays * p * (1 - p)
+            step = (np.bincount(user, residual, users.n_groups) - self.l2 * skill) \
+                / (np.bincount(user, weight, users.n_groups) + self.l2)
+            skill += np.clip(step, -self.MAX_STEP, self.MAX_STEP)
+            largest = np.abs(step).max(initial=0)
+
+            # Bloc des difficultés (signe opposé dans le logit)
+            p = self._sigmoid(skill[user] - difficulty[level])
+            residual, weight = successes - plays * p, plays * p * (1 - p)
+            step = (-np.bincount(level, residual, levels.n_groups) - self.l2 * difficulty) \
+                / (np.bincount(level, weight, levels.n_groups) + self.l2)
+            difficulty += np.clip(step, -self.MAX_STEP, self.MAX_STEP)
+            largest = max(largest, np.abs(step).max(initial=0))
+
+            # Décalage commun des compétences et des difficultés : la vraisemblance n'en dépend
+            # pas, seule la pénalité L2 le fixe. Les pas par bloc le corrigent très lentement,
+            # il est donc minimisé exactement à chaque itération.
+            shift = -(skill.sum() + difficulty.sum()) / (len(skill) + len(difficulty))
+            skill += shift
+            difficulty += shift
+            largest = max(largest, abs(shift))
+            if largest < self.tol:
+                self.converged = True
+
+        # Écarts-types approchés par la diagonale de la hessienne au point final
+        p = self._sigmoid(skill[user] - difficulty[level])
+        weight = plays * p * (1 - p)
+        self.skills = user_keys.assign(
+            skill=skill,
+            skill_se=1 / np.sqrt(np.bincount(user, weight, users.n_groups) + self.l2),
+            plays=np.bincount(user, plays, users.n_groups).astype(np.int64)
+        )
+        self.difficulties = level_keys.assign(
+            skill_difficulty=difficulty,
+            skill_difficulty_se=1 / np.sqrt(np.bincount(level, weight, levels.n_groups) + self.l2),
+            # Taux de réussite attendu d'un joueur de compétence moyenne
+            adjusted_success_rate=self._sigmoid(skill.mean() - difficulty) if len(skill) else np.nan
+        )
+        return self
+
+    def save(self, path: str):
+        """Écrit les paramètres et l'empreinte des comptes en JSON (remplacement atomique)"""
+        state = {
+            "version": self.VERSION,
+            "counts_key": self.counts_key,
+            "converged": self.converged,
+            "skills": [[user, float(skill)] for user, skill in zip(self.skills['user'], self.skills['skill'])],
+            "difficulties": [[int(world), int(level), float(d)] for world, level, d in zip(
+                self.difficulties['world'], self.difficulties['level'], self.difficulties['skill_difficulty'])]
+        }
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> Optional["SkillModel"]:
+        """Paramètres d'un ajustement précédent (None si absent ou d'une autre version)"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != cls.VERSION:
+            return None
+        model = cls(**kwargs)
+        model.counts_key = state["counts_key"]
+        model.converged = state["converged"]
+        model.skills = pd.DataFrame(state["skills"], columns=['user', 'skill'])
+        model.difficulties = pd.DataFrame(state["difficulties"], columns=['world', 'level', 'skill_difficulty'])
+        return model
+
 
 class DifficultyAnalyzer:
-    def __init__(self, dataframes: Dict[str, pd.DataFrame]):
-        self.dataframes = dataframes
+    def __init__(self, dataframes: Dict[str, pd.DataFrame] = None, index: FrameIndex = None):
+        self.dataframes = dataframes if dataframes is not None else {}
+        # Index partagé (requêtes et clés de regroupement), construit sinon au premier usage
+        self._index = index
+        # Agrégats partiels du mode streaming, par (world, level) :
+        # niveaux -> [nb épisodes, somme des outcomes, nb outcomes]
+        # actions -> [sommes A, B, right, left, nb frames]
+        # et par (user, world, level) : [nb succès, nb outcomes] pour SkillModel
+        self.level_state = {}
+        self.action_state = {}
+        self.skill_state = {}
 
+    @property
+    def index(self) -> FrameIndex:
+        if self._index is None:
+            self._index = FrameIndex(self.dataframes)
+        return self._index
+
+    @traced()
     def calculate_level_metrics(self) -> pd.DataFrame:
         """Calcule les métriques de difficulté par niveau"""
         if 'episodes' not in self.dataframes:
             raise KeyError("Données d'épisodes non trouvées")
 
         df = self.dataframes['episodes']
+        keys = self.index.group_keys('episodes', ['world', 'level'])
         
-        level_metrics = df.groupby(['world', 'level']).agg({
-            'episode': 'count',
-            'outcome_numeric': ['mean', 'count'],
-        }).reset_index()
-        
-        level_metrics.columns = ['world', 'level', 'total_attempts', 
-                               'success_rate', 'total_plays']
+        level_metrics = keys.key_frame()
+        level_metrics['total_attempts'] = keys.count(df['episode'])
+        level_metrics['success_rate'] = keys.mean(df['outcome_numeric'])
+        level_metrics['total_plays'] = keys.count(df['outcome_numeric'])
         
         # Calcul du score de difficulté
         level_metrics['difficulty_score'] = 1 - level_metrics['success_rate']
         
-        return level_metrics
+        return add_confidence_intervals(level_metrics)
 
+    @traced()
+    def calculate_skill_counts(self) -> pd.DataFrame:
+        """Succès et essais de chaque joueur sur chaque niveau (entrée de SkillModel)"""
+        if 'episodes' not in self.dataframes:
+            raise KeyError("Données d'épisodes non trouvées")
+
+        df = self.dataframes['episodes']
+        keys = self.index.group_keys('episodes', ['user', 'world', 'level'])
+        counts = keys.key_frame()
+        counts['successes'] = keys.sum(df['outcome_numeric']).astype(np.int64)
+        counts['plays'] = keys.count(df['outcome_numeric'])
+        return counts
+
+    def fit_skill_model(self, counts: pd.DataFrame = None, previous: SkillModel = None,
+                        cold_start: bool = False) -> SkillModel:
+        """Ajuste le modèle compétence/difficulté (sur calculate_skill_counts par défaut)"""
+        if counts is None:
+            counts = self.calculate_skill_counts()
+        return SkillModel().fit(counts, previous=previous, cold_start=cold_start)
+
+    @traced()
     def analyze_player_actions(self) -> pd.DataFrame:
         """Analyse les actions du joueur par niveau"""
         if 'frames' not in self.dataframes:
             return pd.DataFrame()
             
         df = self.dataframes['frames']
+        add_counts(frames=len(df))
+        keys = self.index.group_keys('frames', ['world', 'level'])
         
-        action_metrics = df.groupby(['world', 'level']).agg({
-            'A': 'mean',  # Fréquence des sauts
-            'B': 'mean',  # Fréquence des courses
-            'right': 'mean',
-            'left': 'mean',
-            'frame': 'count'
-        }).reset_index()
-        
-        action_metrics.columns = ['world', 'level', 'jump_freq', 
-                                'run_freq', 'right_freq', 'left_freq', 
-                                'total_frames']
+        # A : fréquence des sauts, B : fréquence des courses
+        action_metrics = keys.key_frame()
+        pressed = decode_buttons(df['action'].to_numpy(), list(ACTION_FREQ_COLUMNS))
+        for button, name in ACTION_FREQ_COLUMNS.items():
+            action_metrics[name] = keys.mean(pressed[button])
+        action_metrics['total_frames'] = keys.count(df['frame'])
                                 
         return action_metrics
 
+    @traced()
+    def calculate_episode_progress(self) -> pd.DataFrame:
+        """Progression de chaque épisode à partir de l'état de jeu décodé de la RAM
+
+        La première frame où le joueur meurt (état de mort ou chute dans un trou)
+        donne la position de la mort ; la vitesse de progression est la distance
+        maximale parcourue divisée par le nombre de frames jouées jusqu'à la mort.
+        """
+        if 'frames' not in self.dataframes:
+            return pd.DataFrame()
+        df = self.dataframes['frames']
+        if df.empty or not all(col in df.columns for col in PROGRESS_COLUMNS):
+            return pd.DataFrame()
+        add_counts(frames=len(df))
+
+        keys = ['session_id', 'episode', 'world', 'level']
+        has_outcome = 'outcome_numeric' in df.columns
+        df = df[PROGRESS_COLUMNS + (['outcome_numeric'] if has_outcome else [])]
+        df = df.sort_values(keys + ['frame'], kind='stable')
+        position = df.groupby(keys, sort=False, observed=True).cumcount().to_numpy()
+        progress = df.groupby(keys, observed=True).agg(
+            frame_count=('frame', 'size'),
+            start_x=('x_position', 'first'),
+            end_x=('x_position', 'last'),
+            max_x=('x_position', 'max'),
+            **({'outcome': ('outcome_numeric', 'first')} if has_outcome else {})
+        )
+
+        # Première frame de mort de chaque épisode (les frames sont triées)
+        dead = df['dead'].to_numpy()
+        deaths = df.loc[dead, keys + ['x_position']].assign(frames_played=position[dead] + 1)
+        deaths = deaths.drop_duplicates(keys).set_index(keys)
+        deaths = deaths.reindex(progress.index)
+        progress['died'] = deaths['x_position'].notna().to_numpy()
+        progress['death_x'] = deaths['x_position'].to_numpy(dtype=np.float64)
+        frames_played = deaths['frames_played'].fillna(progress['frame_count']).to_numpy(dtype=np.float64)
+        progress['progress_speed'] = (progress['max_x'] - progress['start_x']).to_numpy() / frames_played
+
+        return progress.reset_index()
+
+    @traced()
+    def calculate_progress_metrics(self, episode_progress: pd.DataFrame = None) -> pd.DataFrame:
+        """Position des morts et vitesse de progression par niveau"""
+        if episode_progress is None:
+            episode_progress = self.calculate_episode_progress()
+        if episode_progress.empty:
+            return pd.DataFrame()
+
+        progress_metrics = episode_progress.groupby(['world', 'level']).agg(
+            episodes=('episode', 'count'),
+            deaths=('died', 'sum'),
+            mean_death_x=('death_x', 'mean'),
+            median_death_x=('death_x', 'median'),
+            mean_max_x=('max_x', 'mean'),
+            progress_speed=('progress_speed', 'mean')
+        ).reset_index()
+        progress_metrics['death_rate'] = progress_metrics['deaths'] / progress_metrics['episodes']
+
+        return progress_metrics
+
+    @traced()
+    def calculate_death_bins(self, episode_progress: pd.DataFrame = None,
+                             bin_width: int = DEATH_BIN_WIDTH, max_x: int = DEATH_MAX_X) -> pd.DataFrame:
+        """Nombre de morts par intervalle de position x, pour chacun des 32 niveaux
+
+        Seuls les épisodes perdus comptent ; la position retenue est celle de la
+        première frame de mort, ou à défaut celle de la dernière frame. Le
+        résultat (une ligne par niveau et par intervalle, zéros compris) est
+        petit et sert de cache aux graphiques.
+        """
+        if episode_progress is None:
+            episode_progress = self.calculate_episode_progress()
+        n_bins = -(-max_x // bin_width)
+        counts = np.zeros(N_WORLDS * N_LEVELS * n_bins, dtype=np.int64)
+
+        if not episode_progress.empty:
+            failed = (episode_progress['outcome'] == 0) if 'outcome' in episode_progress.columns \
+                else episode_progress['died']
+            ep = episode_progress[failed.to_numpy(dtype=bool)]
+            world = ep['world'].to_numpy(dtype=np.int64)
+            level = ep['level'].to_numpy(dtype=np.int64)
+            known = (world >= 1) & (world <= N_WORLDS) & (level >= 1) & (level <= N_LEVELS)
+            x = ep['death_x'].fillna(ep['end_x']).to_numpy(dtype=np.int64)[known]
+            level_index = (world[known] - 1) * N_LEVELS + (level[known] - 1)
+            bins = np.clip(x // bin_width, 0, n_bins - 1)
+            counts += np.bincount(level_index * n_bins + bins, minlength=len(counts))
+
+        return pd.DataFrame({
+            'world': np.repeat(np.arange(1, N_WORLDS + 1), N_LEVELS * n_bins),
+            'level': np.tile(np.repeat(np.arange(1, N_LEVELS + 1), n_bins), N_WORLDS),
+            'x_start': np.tile(np.arange(n_bins) * bin_width, N_WORLDS * N_LEVELS),
+            'deaths': counts
+        })
+
+    @traced()
     def categorize_difficulty(self, metrics: pd.DataFrame) -> pd.DataFrame:
-        """Catégorise les niveaux par difficulté"""
+        """Catégorise les niveaux par difficulté
+
+        Les bornes des catégories viennent des scores observés (quantiles). Si
+        le nombre d'essais est connu, chaque niveau reçoit ensuite la catégorie
+        la plus probable sous la loi a posteriori de son score (tirages Beta) et
+        `category_confidence` donne cette probabilité : un niveau joué 5 fois
+        n'est plus classé comme si son score était exact.
+        """
         df = metrics.copy()
         
         # Gestion des valeurs dupliquées dans les bins
         try:
-            df['difficulty_category'] = pd.qcut(
+            df['difficulty_category'], edges = pd.qcut(
                 df['difficulty_score'],
                 q=5,
                 labels=['Très Facile', 'Facile', 'Moyen', 'Difficile', 'Très Difficile'],
-                duplicates='drop'
+                duplicates='drop',
+                retbins=True
             )
         except ValueError:
             # Si pas assez de valeurs uniques pour 5 catégories, utiliser moins de catégories
@@ -68,19 +420,130 @@ class DifficultyAnalyzer:
                         ['Facile', 'Moyen', 'Difficile'] if n_categories == 3 else \
                         ['Très Facile', 'Facile', 'Difficile', 'Très Difficile']
                 
-                df['difficulty_category'] = pd.qcut(
+                df['difficulty_category'], edges = pd.qcut(
                     df['difficulty_score'],
                     q=n_categories,
                     labels=labels,
-                    duplicates='drop'
+                    duplicates='drop',
+                    retbins=True
                 )
             else:
                 # Utiliser une méthode alternative de catégorisation
-                df['difficulty_category'] = pd.cut(
+                df['difficulty_category'], edges = pd.cut(
                     df['difficulty_score'],
                     bins=[0, 0.2, 0.4, 0.6, 0.8, 1.0],
                     labels=['Très Facile', 'Facile', 'Moyen', 'Difficile', 'Très Difficile'],
-                    include_lowest=True
+                    include_lowest=True,
+                    retbins=True
                 )
+
+        if {'success_rate', 'total_plays'} <= set(df.columns):
+            successes, trials = level_success_counts(df)
+            probabilities = bin_probabilities(1 - beta_draws(successes, trials), edges)
+            played = trials > 0
+            categories = df['difficulty_category'].cat.categories
+            df['difficulty_category'] = pd.Categorical.from_codes(
+                np.where(played, probabilities.argmax(axis=0), -1), categories=categories)
+            df['category_confidence'] = np.where(played, probabilities.max(axis=0), np.nan)
         
-        return df
\ No newline at end of file
+        return df
+
+    def update(self, batch: Dict[str, pd.DataFrame]):
+        """Ajoute un lot d'épisodes nettoyé (mode streaming) aux agrégats par niveau"""
+        df_episodes = batch.get('episodes', pd.DataFrame())
+        if not df_episodes.empty and 'outcome_numeric' in df_episodes.columns:
+            grouped = df_episodes.groupby(['world', 'level']).agg({
+                'episode': 'count',
+                'outcome_numeric': ['sum', 'count']
+            })
+            for (world, level), row in zip(grouped.index, grouped.to_numpy()):
+                state = self.level_state.setdefault((int(world), int(level)), [0, 0, 0])
+                state[0] += int(row[0])
+                state[1] += int(row[1])
+                state[2] += int(row[2])
+            grouped = df_episodes.groupby(['user', 'world', 'level'], observed=True)['outcome_numeric'].agg(
+                ['sum', 'count'])
+            for (user, world, level), row in zip(grouped.index, grouped.to_numpy()):
+                state = self.skill_state.setdefault((str(user), int(world), int(level)), [0, 0])
+                state[0] += int(row[0])
+                state[1] += int(row[1])
+
+        df_frames = batch.get('frames', pd.DataFrame())
+        if not df_frames.empty and 'action' in df_frames.columns:
+            pressed = decode_buttons(df_frames['action'].to_numpy(), list(ACTION_FREQ_COLUMNS))
+            grouped = df_frames[['world', 'level', 'frame']].assign(**pressed).groupby(['world', 'level']).agg({
+                'A': 'sum',
+                'B': 'sum',
+                'right': 'sum',
+                'left': 'sum',
+                'frame': 'count'
+            })
+            for (world, level), row in zip(grouped.index, grouped.to_numpy()):
+                state = self.action_state.setdefault((int(world), int(level)), [0, 0, 0, 0, 0])
+                for i, value in enumerate(row):
+                    state[i] += int(value)
+
+    def get_state(self) -> Dict:
+        """Agrégats par niveau sous forme sérialisable en JSON"""
+        return {
+            'levels': [[world, level, *st] for (world, level), st in self.level_state.items()],
+            'actions': [[world, level, *st] for (world, level), st in self.action_state.items()],
+            'skills': [[user, world, level, *st] for (user, world, level), st in self.skill_state.items()]
+        }
+
+    def merge_state(self, state: Dict):
+        """Fusionne des agrégats partiels : tous sont des sommes ou des comptes"""
+        for target, rows in ((self.level_state, state['levels']), (self.action_state, state['actions'])):
+            for world, level, *values in rows:
+                current = target.setdefault((int(world), int(level)), [0] * len(values))
+                for i, value in enumerate(values):
+                    current[i] += value
+        # Absent des fichiers d'état antérieurs au modèle compétence/difficulté
+        for user, world, level, successes, plays in state.get('skills', []):
+            current = self.skill_state.setdefault((user, int(world), int(level)), [0, 0])
+            current[0] += successes
+            current[1] += plays
+
+    @traced()
+    def finalize_level_metrics(self) -> pd.DataFrame:
+        """Métriques par niveau à partir des agrégats (identiques à calculate_level_metrics)"""
+        keys = sorted(self.level_state)
+        states = [self.level_state[key] for key in keys]
+        level_metrics = pd.DataFrame({
+            'world': np.array([key[0] for key in keys], dtype=np.int64),
+            'level': np.array([key[1] for key in keys], dtype=np.int64),
+            'total_attempts': np.array([st[0] for st in states], dtype=np.int64),
+            'success_rate': np.array(
+                [st[1] / st[2] if st[2] else np.nan for st in states], dtype=np.float64
+            ),
+            'total_plays': np.array([st[2] for st in states], dtype=np.int64)
+        })
+        level_metrics['difficulty_score'] = 1 - level_metrics['success_rate']
+        return add_confidence_intervals(level_metrics)
+
+    def finalize_skill_counts(self) -> pd.DataFrame:
+        """Table (joueur, niveau) à partir des agrégats (identique à calculate_skill_counts)"""
+        keys = sorted(self.skill_state)
+        return pd.DataFrame({
+            'user': [key[0] for key in keys],
+            'world': np.array([key[1] for key in keys], dtype=np.int64),
+            'level': np.array([key[2] for key in keys], dtype=np.int64),
+            'successes': np.array([self.skill_state[key][0] for key in keys], dtype=np.int64),
+            'plays': np.array([self.skill_state[key][1] for key in keys], dtype=np.int64)
+        }, columns=SKILL_COUNT_COLUMNS)
+
+    @traced()
+    def finalize_player_actions(self) -> pd.DataFrame:
+        """Fréquences d'actions par niveau à partir des agrégats (identiques à analyze_player_actions)"""
+        keys = sorted(self.action_state)
+        states = [self.action_state[key] for key in keys]
+        action_metrics = {
+            'world': np.array([key[0] for key in keys], dtype=np.int64),
+            'level': np.array([key[1] for key in keys], dtype=np.int64)
+        }
+        for i, name in enumerate(ACTION_FREQ_COLUMNS.values()):
+            action_metrics[name] = np.array(
+                [st[i] / st[4] if st[4] else np.nan for st in states], dtype=np.float64
+            )
+        action_metrics['total_frames'] = np.array([st[4] for st in states], dtype=np.int64)
+        return pd.DataFrame(action_metrics)
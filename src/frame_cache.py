@@ -0,0 +1,88 @@
+import pandas as pd
+import os
+import json
+import shutil
+import hashlib
+import importlib.util
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional
+from ram_store import RamStore, RAM_SIZE
+
+
+class FrameCache:
+    """Cache persistant (Parquet) des tables frames/episodes, par dossier d'épisode
+
+    Chaque dossier d'épisode est identifié par son nombre de PNG, leur taille
+    totale et leur date de modification la plus récente (DatasetManifest.folder_keys). Un dossier dont la clé
+    n'a pas changé est relu depuis le cache au lieu d'être re-parsé.
+    """
+
+    VERSION = 2
+    FOLDER_COLUMN = "_folder"
+
+    def __init__(self, cache_dir: str, data_path: str, ram_size: int = RAM_SIZE):
+        # Un sous-dossier par dataset pour pouvoir en analyser plusieurs
+        dataset_id = hashlib.sha1(str(Path(data_path).resolve()).encode("utf-8")).hexdigest()[:16]
+        self.root = Path(cache_dir)
+        self.cache_dir = self.root / dataset_id
+        self.ram_size = ram_size
+        self.stats = {"hits": 0, "misses": 0, "removed": 0}
+        self.enabled = importlib.util.find_spec("pyarrow") is not None
+        if not self.enabled:
+            print("Attention: pyarrow n'est pas installé, le cache des frames est désactivé")
+
+    def ram_store(self) -> RamStore:
+        """Fichier RAM du cache, indexé par la colonne ram_index des frames"""
+        return RamStore(self.cache_dir / "ram.u8", self.ram_size)
+
+    def new_ram_store(self) -> RamStore:
+        """Fichier RAM en cours de reconstruction, remplacé atomiquement par save()"""
+        return RamStore(self.cache_dir / "ram.u8.tmp", self.ram_size)
+
+    def clear(self):
+        """Invalide le cache de ce dataset"""
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        print(f"Cache invalidé: {self.cache_dir}")
+
+    def load(self) -> Tuple[Dict[str, List], pd.DataFrame, pd.DataFrame]:
+        """Relit l'index et les tables du cache (vides si absent ou illisible)"""
+        index_path = self.cache_dir / "index.json"
+        if not self.enabled or not index_path.exists():
+            return {}, pd.DataFrame(), pd.DataFrame()
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != self.VERSION:
+                return {}, pd.DataFrame(), pd.DataFrame()
+            episodes = pd.read_parquet(self.cache_dir / "episodes.parquet")
+            frames = pd.read_parquet(self.cache_dir / "frames.parquet")
+            if not frames.empty and len(self.ram_store()) <= frames["ram_index"].max():
+                raise ValueError("fichier RAM incomplet")
+            return index["folders"], episodes, frames
+        except Exception as e:
+            print(f"Cache illisible, il sera reconstruit: {e}")
+            return {}, pd.DataFrame(), pd.DataFrame()
+
+    def save(self, folders: Dict[str, List], episodes: pd.DataFrame, frames: pd.DataFrame,
+             ram_store: Optional[RamStore] = None):
+        """Écrit l'index et les tables ; les tables doivent contenir la colonne du dossier"""
+        if not self.enabled:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Sans index, un cache interrompu pendant l'écriture sera simplement reconstruit
+        (self.cache_dir / "index.json").unlink(missing_ok=True)
+        episodes.to_parquet(self.cache_dir / "episodes.parquet.tmp", index=False)
+        frames.to_parquet(self.cache_dir / "frames.parquet.tmp", index=False)
+        if ram_store is not None and ram_store.path != self.ram_store().path:
+            self.ram_store().replace_with(ram_store)
+        with open(self.cache_dir / "index.json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "folders": folders}, f)
+        # L'index est écrit en dernier, une fois les tables et la RAM en place
+        for name in ("episodes.parquet", "frames.parquet", "index.json"):
+            os.replace(self.cache_dir / f"{name}.tmp", self.cache_dir / name)
+
+    def report(self) -> str:
+        """Résumé lisible des hits/misses de la dernière lecture"""
+        return (f"Cache: {self.stats['hits']} épisodes réutilisés, "
+                f"{self.stats['misses']} (re)chargés, {self.stats['removed']} supprimés")
@@ -0,0 +1,183 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, List, Sequence
+from data_preprocessor import BUTTON_TABLE, BUTTON_MASKS
+from group_keys import GroupKeys
+from utils.instrumentation import span
+
+# Index disponibles : nom -> colonnes de la clé composite, dans l'ordre du tri.
+# Une requête peut n'en fixer qu'un préfixe (ex. user seul pour l'index 'episode').
+INDEX_COLUMNS = {
+    'level': ['world', 'level'],
+    'episode': ['user', 'session_id', 'episode'],
+    'outcome': ['outcome'],
+    'action': ['action']
+}
+
+
+class _SortedIndex:
+    """Permutation des lignes triées par clé composite (codes denses, ordre des valeurs)
+
+    Les lignes dont une des colonnes est manquante ont la clé -1 et ne sont
+    jamais renvoyées, comme avec groupby.
+    """
+
+    def __init__(self, codes: List[np.ndarray], sizes: List[int]):
+        self.sizes = sizes
+        composite = np.zeros(len(codes[0]), dtype=np.int64)
+        valid = np.ones(len(codes[0]), dtype=bool)
+        for column_codes, size in zip(codes, sizes):
+            composite = composite * size + column_codes
+            valid &= column_codes >= 0
+        composite[~valid] = -1
+        self.order = np.argsort(composite, kind='stable')
+        self.keys = composite[self.order]
+        # Les clés valides commencent après les lignes incomplètes
+        self.first_valid = int(np.searchsorted(self.keys, 0))
+
+    def prefix_positions(self, prefix: Sequence[int]) -> np.ndarray:
+        """Lignes dont les premières colonnes de la clé valent `prefix` (codes)"""
+        low = 0
+        for code, size in zip(prefix, self.sizes):
+            low = low * size + code
+        span_size = int(np.prod(self.sizes[len(prefix):], dtype=np.int64))
+        start, stop = np.searchsorted(self.keys, [low * span_size, (low + 1) * span_size])
+        return self.order[start:stop]
+
+
+class FrameIndex:
+    """Couche de requêtes sur les tables episodes/frames chargées
+
+    Chaque colonne de clé est factorisée une fois en codes denses (valeurs
+    triées), et chaque index de INDEX_COLUMNS est une permutation des lignes
+    triées par clé composite : un filtre sur une clé (ou un préfixe de clé)
+    est une recherche dichotomique, les autres filtres sont appliqués sur les
+    codes des lignes candidates. Codes et index sont construits au premier
+    usage et les tables ne doivent plus être modifiées ensuite.
+
+    Exemple : index.episodes(world=4, level=2, user='X', outcome='fail')
+    ou index.frames(buttons=['left', 'B']).
+    """
+
+    def __init__(self, dataframes: Dict[str, pd.DataFrame]):
+        self.tables = {name: df for name, df in dataframes.items() if name in ('episodes', 'frames')}
+        self._codes = {}
+        self._indexes = {}
+        self._group_keys = {}
+
+    def _column_codes(self, table: str, column: str):
+        """(codes, valeurs triées) d'une colonne ; -1 pour une valeur manquante
+
+        Les codes sont partagés par les index de requête et les clés de regroupement.
+        """
+        key = (table, column)
+        if key not in self._codes:
+            with span("FrameIndex.factorize", table=table, column=column):
+                codes, values = pd.factorize(self.tables[table][column], sort=True)
+                self._codes[key] = (codes, pd.Index(values))
+        return self._codes[key]
+
+    def _index(self, table: str, name: str) -> _SortedIndex:
+        key = (table, name)
+        if key not in self._indexes:
+            with span("FrameIndex.build", table=table, index=name):
+                columns = [self._column_codes(table, column) for column in INDEX_COLUMNS[name]]
+                self._indexes[key] = _SortedIndex([np.asarray(codes, dtype=np.int64) for codes, _ in columns],
+                                                  [max(len(values), 1) for _, values in columns])
+        return self._indexes[key]
+
+    def has_index(self, table: str, name: str) -> bool:
+        df = self.tables.get(table)
+        return df is not None and all(column in df.columns for column in INDEX_COLUMNS[name])
+
+    def values(self, table: str, column: str) -> List:
+        """Valeurs distinctes d'une colonne de clé, triées"""
+        return list(self._column_codes(table, column)[1])
+
+    def _value_code(self, table: str, column: str, value) -> int:
+        return int(self._column_codes(table, column)[1].get_indexer([value])[0])
+
+    def positions(self, table: str, **filters) -> np.ndarray:
+        """Positions (triées) des lignes de la table qui vérifient tous les filtres
+
+        Les filtres sont des égalités sur les colonnes de INDEX_COLUMNS ;
+        `action` accepte aussi une liste de codes, et `buttons` une liste de
+        boutons tous enfoncés (ex. ['left', 'B']).
+        """
+        df = self.tables[table]
+        buttons = filters.pop('buttons', None)
+        if buttons is not None:
+            unknown = set(buttons) - set(BUTTON_MASKS)
+            if unknown:
+                raise KeyError(f"Boutons inconnus: {sorted(unknown)}")
+            rows = [list(BUTTON_MASKS).index(button) for button in buttons]
+            codes = np.flatnonzero(BUTTON_TABLE[rows].all(axis=0))
+            if 'action' in filters:
+                requested = np.atleast_1d(filters['action'])
+                codes = codes[np.isin(codes, requested)]
+            filters['action'] = codes.tolist()
+
+        known = {column for columns in INDEX_COLUMNS.values() for column in columns}
+        unknown = set(filters) - known
+        if unknown:
+            raise KeyError(f"Filtres inconnus: {sorted(unknown)}")
+
+        # Codes recherchés par colonne ; une valeur absente ne peut rien renvoyer
+        wanted = {}
+        for column, value in filters.items():
+            values = value if column == 'action' and isinstance(value, (list, tuple, np.ndarray)) else [value]
+            codes = [self._value_code(table, column, v) for v in values]
+            wanted[column] = np.array([code for code in codes if code >= 0], dtype=np.int64)
+            if not len(wanted[column]):
+                return np.array([], dtype=np.int64)
+
+        # Index dont le plus long préfixe est fixé par des égalités simples
+        candidates = None
+        for name, columns in INDEX_COLUMNS.items():
+            if not self.has_index(table, name):
+                continue
+            prefix = []
+            for column in columns:
+                if column not in wanted:
+                    break
+                prefix.append(wanted[column])
+            if not prefix:
+                continue
+            index = self._index(table, name)
+            if all(len(codes) == 1 for codes in prefix):
+                rows = index.prefix_positions([int(codes[0]) for codes in prefix])
+            elif len(prefix) == 1:
+                rows = np.concatenate([index.prefix_positions([int(code)]) for code in prefix[0]])
+            else:
+                continue
+            if candidates is None or len(rows) < len(candidates):
+                candidates = rows
+        if candidates is None:
+            candidates = np.arange(len(df))
+
+        for column, codes in wanted.items():
+            column_codes = self._column_codes(table, column)[0][candidates]
+            candidates = candidates[np.isin(column_codes, codes)]
+        return np.sort(candidates)
+
+    def episodes(self, **filters) -> pd.DataFrame:
+        """Épisodes qui vérifient les filtres (ex. world=4, level=2, user='X', outcome='fail')"""
+        return self.tables['episodes'].iloc[self.positions('episodes', **filters)]
+
+    def frames(self, **filters) -> pd.DataFrame:
+        """Frames qui vérifient les filtres (ex. buttons=['left', 'B'])"""
+        return self.tables['frames'].iloc[self.positions('frames', **filters)]
+
+    def count(self, table: str, **filters) -> int:
+        return len(self.positions(table, **filters))
+
+    def group_keys(self, table: str, columns: List[str]) -> GroupKeys:
+        """Clés de regroupement d'une table, construites une fois à partir des codes des colonnes"""
+        key = (table, tuple(columns))
+        if key not in self._group_keys:
+            with span("FrameIndex.group_keys", table=table, columns=",".join(columns)):
+                factorized = [self._column_codes(table, column) for column in columns]
+                self._group_keys[key] = GroupKeys(list(columns),
+                                                  [np.asarray(codes, dtype=np.int64) for codes, _ in factorized],
+                                                  [values for _, values in factorized])
+        return self._group_keys[key]
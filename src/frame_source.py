@@ -0,0 +1,199 @@
+import abc
+import os
+import time
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Union
+
+# Extensions reconnues comme archives du dataset
+ZIP_SUFFIXES = (".zip",)
+TAR_SUFFIXES = (".tar",)
+COMPRESSED_TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+class SourceListing(NamedTuple):
+    """Inventaire brut d'une source : une entrée par PNG, plus les dossiers d'épisodes
+
+    `folders` contient les dossiers de premier niveau (les dossiers d'épisodes),
+    `rel_folders` le dossier relatif de chaque PNG et `paths` l'identifiant
+    à passer à FrameSource.open.
+    """
+    folders: List[str]
+    rel_folders: List[str]
+    names: List[str]
+    paths: List[str]
+    sizes: List[int]
+    mtimes: List[float]
+
+
+class FrameSource(abc.ABC):
+    """Accès aux fichiers du dataset, quel que soit leur support
+
+    Une source sait lister ses PNG (scan) et ouvrir l'un d'eux en lecture
+    binaire (open). Elle est envoyée aux processus de lecture avec le
+    DataLoader : elle doit rester picklable et légère.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    @abc.abstractmethod
+    def scan(self) -> SourceListing:
+        """Inventaire des PNG de la source, en un seul parcours"""
+
+    @abc.abstractmethod
+    def open(self, path: str) -> BinaryIO:
+        """Ouvre en lecture binaire un PNG désigné par son identifiant (SourceListing.paths)"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({str(self.root)!r})"
+
+
+class LocalSource(FrameSource):
+    """Dossier local (ou miroir local d'une source distante)"""
+
+    def scan(self) -> SourceListing:
+        """Parcourt l'arborescence une seule fois avec os.scandir"""
+        listing = SourceListing([], [], [], [], [], [])
+        stack = [(str(self.root), "")]
+        while stack:
+            dir_path, rel = stack.pop()
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        child_rel = f"{rel}/{entry.name}" if rel else entry.name
+                        stack.append((entry.path, child_rel))
+                        if not rel:
+                            listing.folders.append(entry.name)
+                    elif entry.name.endswith(".png") and entry.is_file():
+                        stat = entry.stat()
+                        listing.rel_folders.append(rel)
+                        listing.names.append(entry.name)
+                        listing.paths.append(entry.path)
+                        listing.sizes.append(stat.st_size)
+                        listing.mtimes.append(stat.st_mtime)
+        return listing
+
+    def open(self, path: str) -> BinaryIO:
+        return open(path, "rb")
+
+
+class _ArchiveSource(FrameSource):
+    """Archive lue membre par membre, sans extraction sur disque
+
+    Si tous les membres sont sous un même dossier racine (archive créée avec
+    `zip -r data-smb.zip data-smb`), ce dossier est ignoré. L'archive est
+    ouverte au premier accès dans chaque processus.
+    """
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self._archive = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_archive"] = None
+        return state
+
+    @abc.abstractmethod
+    def _members(self) -> List[tuple]:
+        """(nom du membre, taille, mtime) de chaque fichier de l'archive"""
+
+    def scan(self) -> SourceListing:
+        members = [m for m in self._members() if not m[0].endswith("/")]
+        parts = [name.split("/") for name, _, _ in members]
+        prefix = 0
+        # Un seul dossier racine contenant lui-même des dossiers (sinon c'est un dossier d'épisode)
+        if parts and all(len(p) > 1 for p in parts) and len({p[0] for p in parts}) == 1 \
+                and any(len(p) > 2 for p in parts):
+            prefix = 1
+
+        listing = SourceListing([], [], [], [], [], [])
+        folders = set()
+        for (name, size, mtime), path_parts in zip(members, parts):
+            path_parts = path_parts[prefix:]
+            if len(path_parts) > 1:
+                folders.add(path_parts[0])
+            if not path_parts[-1].endswith(".png"):
+                continue
+            listing.rel_folders.append("/".join(path_parts[:-1]))
+            listing.names.append(path_parts[-1])
+            listing.paths.append(name)
+            listing.sizes.append(size)
+            listing.mtimes.append(mtime)
+        listing.folders.extend(folders)
+        return listing
+
+
+class ZipSource(_ArchiveSource):
+    """Archive zip ; chaque PNG est décompressé à la volée par ZipFile.open"""
+
+    def _zip(self) -> zipfile.ZipFile:
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.root)
+        return self._archive
+
+    def _members(self) -> List[tuple]:
+        return [(info.filename, info.file_size, time.mktime(info.date_time + (0, 0, -1)))
+                for info in self._zip().infolist()]
+
+    def open(self, path: str) -> BinaryIO:
+        return self._zip().open(path)
+
+
+class TarSource(_ArchiveSource):
+    """Archive tar non compressée : chaque membre est lu directement à son offset
+
+    Une archive tar compressée n'offre pas d'accès direct à ses membres
+    (chaque lecture repartirait du début du flux) et n'est pas acceptée.
+    """
+
+    def _tar(self) -> tarfile.TarFile:
+        if self._archive is None:
+            self._archive = tarfile.open(self.root, "r:")
+            self._index = {info.name: info for info in self._archive.getmembers() if info.isfile()}
+        return self._archive
+
+    def _members(self) -> List[tuple]:
+        self._tar()
+        return [(info.name, info.size, float(info.mtime)) for info in self._index.values()]
+
+    def open(self, path: str) -> BinaryIO:
+        tar = self._tar()
+        return tar.extractfile(self._index[path])
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.pop("_index", None)
+        return state
+
+
+def open_source(location: Union[str, os.PathLike, FrameSource]) -> FrameSource:
+    """Source correspondant à un emplacement : dossier, archive zip/tar ou URL Google Drive
+
+    Une URL Google Drive est servie par le miroir local (DataSource.get_data_path),
+    qui n'est mis à jour que si le dossier distant a changé.
+    """
+    if isinstance(location, FrameSource):
+        return location
+    location = str(location)
+    if location.startswith("https://drive.google.com/"):
+        # Import local : streamlit et gdown ne sont nécessaires que pour les sources distantes
+        from utils.data_source import DataSource
+        return LocalSource(DataSource.get_data_path(location))
+
+    path = Path(location)
+    if not path.exists():
+        raise FileNotFoundError(f"Le chemin {location} n'existe pas")
+    if path.is_dir():
+        return LocalSource(location)
+    name = path.name.lower()
+    if name.endswith(ZIP_SUFFIXES):
+        return ZipSource(location)
+    if name.endswith(COMPRESSED_TAR_SUFFIXES):
+        raise ValueError(f"Archive tar compressée non supportée ({path.name}) : "
+                         "utiliser une archive .zip ou .tar non compressée")
+    if name.endswith(TAR_SUFFIXES):
+        return TarSource(location)
+    raise ValueError(f"Format de source non reconnu: {location}")
@@ -0,0 +1,111 @@
+import pandas as pd
+import numpy as np
+from typing import List, Tuple
+
+# Au-delà de ce nombre de clés composites possibles par ligne, la densification
+# passe par un tri (np.unique) plutôt que par une table de taille fixe (np.bincount)
+DENSE_KEY_FACTOR = 4
+
+
+def _densify(keys: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(clés distinctes triées, indice de chaque ligne parmi elles) pour des clés entières >= 0
+
+    Sans tri quand l'espace des clés est petit devant le nombre de lignes.
+    """
+    if n_keys <= DENSE_KEY_FACTOR * max(len(keys), 1):
+        present = np.bincount(keys, minlength=n_keys) > 0
+        rank = np.cumsum(present) - 1
+        return np.flatnonzero(present), rank[keys]
+    return np.unique(keys, return_inverse=True)
+
+
+class GroupKeys:
+    """Clés de regroupement factorisées une seule fois en identifiants de groupe denses
+
+    Les groupes sont dans l'ordre de tri des clés, comme avec groupby ; les
+    lignes dont une clé est manquante n'appartiennent à aucun groupe
+    (groupby(dropna=True)) et seuls les groupes observés existent. Chaque
+    agrégat est un seul passage np.bincount sur les identifiants de groupe :
+    les sommes de valeurs entières ou booléennes sont exactes, donc
+    identiques à celles de pandas.
+    """
+
+    def __init__(self, columns: List[str], codes: List[np.ndarray], values: List[pd.Index]):
+        self.columns = columns
+        sizes = [max(len(v), 1) for v in values]
+        composite = np.zeros(len(codes[0]), dtype=np.int64)
+        valid = np.ones(len(codes[0]), dtype=bool)
+        for column_codes, size in zip(codes, sizes):
+            composite = composite * size + column_codes
+            valid &= column_codes >= 0
+        self.valid = valid
+        self.rows = np.flatnonzero(valid)
+        keys, group = _densify(composite[valid], int(np.prod(sizes, dtype=np.int64)))
+        self.group = group
+        self.n_groups = len(keys)
+        # Valeur de chaque colonne de clé pour chaque groupe
+        self.keys = {}
+        for column, column_values, size in reversed(list(zip(columns, values, sizes))):
+            self.keys[column] = column_values[keys % size] if len(column_values) else column_values[:0]
+            keys = keys // size
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: List[str]) -> "GroupKeys":
+        codes, values = [], []
+        for column in columns:
+            column_codes, column_values = pd.factorize(df[column], sort=True)
+            codes.append(np.asarray(column_codes, dtype=np.int64))
+            values.append(pd.Index(column_values))
+        return cls(columns, codes, values)
+
+    def key_frame(self) -> pd.DataFrame:
+        """Une ligne par groupe avec les colonnes de clé"""
+        return pd.DataFrame({column: self.keys[column] for column in self.columns})
+
+    def _present(self, values) -> Tuple[np.ndarray, np.ndarray]:
+        """Valeurs des lignes groupées et masque des valeurs non manquantes"""
+        values = np.asarray(values)[self.rows]
+        return values, ~pd.isna(values)
+
+    def size(self) -> np.ndarray:
+        """Nombre de lignes par groupe"""
+        return np.bincount(self.group, minlength=self.n_groups).astype(np.int64)
+
+    def count(self, values) -> np.ndarray:
+        """Nombre de valeurs non manquantes par groupe"""
+        _, present = self._present(values)
+        return np.bincount(self.group[present], minlength=self.n_groups).astype(np.int64)
+
+    def sum(self, values) -> np.ndarray:
+        values, present = self._present(values)
+        return np.bincount(self.group[present], weights=values[present].astype(np.float64),
+                           minlength=self.n_groups)
+
+    def mean(self, values) -> np.ndarray:
+        """Moyenne des valeurs non manquantes (NaN pour un groupe sans valeur)"""
+        counts = self.count(values)
+        sums = self.sum(values)
+        return np.divide(sums, counts, out=np.full(self.n_groups, np.nan), where=counts > 0)
+
+    def nunique(self, values) -> np.ndarray:
+        """Nombre de valeurs distinctes non manquantes par groupe"""
+        value_codes, value_uniques = pd.factorize(np.asarray(values)[self.rows])
+        present = value_codes >= 0
+        n_values = max(len(value_uniques), 1)
+        pairs, _ = _densify(self.group[present] * n_values + value_codes[present], self.n_groups * n_values)
+        return np.bincount(pairs // n_values, minlength=self.n_groups).astype(np.int64)
+
+    def first(self, values) -> np.ndarray:
+        """Première valeur non manquante de chaque groupe, dans l'ordre des lignes
+
+        Le type est conservé si chaque groupe a une valeur, sinon les groupes
+        sans valeur sont à NaN (comme groupby().first()).
+        """
+        values, present = self._present(values)
+        groups, first_rows = np.unique(self.group[present], return_index=True)
+        firsts = values[present][first_rows]
+        if len(groups) == self.n_groups:
+            return firsts
+        result = np.full(self.n_groups, np.nan)
+        result[groups] = firsts
+        return result
@@ -0,0 +1,127 @@
+import pandas as pd
+import os
+import json
+from pathlib import Path
+from typing import Dict
+from data_loader import DataLoader
+from data_preprocessor import DataPreprocessor
+from difficulty_analyzer import DifficultyAnalyzer
+
+
+class IncrementalAnalysis:
+    """Ré-analyse incrémentale : seuls les dossiers d'épisodes nouveaux sont lus
+
+    Les agrégats partiels de DataPreprocessor et DifficultyAnalyzer (comptes,
+    sommes, actions distinctes par épisode, succès par joueur et par niveau)
+    sont conservés dossier par dossier dans un fichier d'état JSON, avec la
+    clé de chaque dossier (nombre de PNG, taille, mtime), le dataset d'origine
+    et son empreinte. Les agrégats globaux sont la fusion de ceux des dossiers
+    présents : un dossier disparu est retiré, un dossier modifié est relu, et
+    l'état d'un autre dataset est ignoré.
+    """
+
+    VERSION = 3
+
+    def __init__(self, data_path: str, state_path: str):
+        self.loader = DataLoader(data_path)
+        self.state_path = Path(state_path)
+        self.preprocessor = DataPreprocessor()
+        self.analyzer = DifficultyAnalyzer()
+        # Par dossier intégré : {"key": clé du manifeste, "preprocessor": état, "analyzer": état}
+        self.folder_states = {}
+        self.fingerprint = None
+        self.new_folders = []
+        self.removed_folders = []
+
+    def source(self) -> str:
+        """Dataset analysé (chemin absolu du dossier ou de l'archive lus)"""
+        return str(Path(self.loader.data_path).resolve())
+
+    def load_state(self):
+        """Relit l'état du run précédent (état vide si absent, d'une autre version ou d'un autre dataset)"""
+        if not self.state_path.exists():
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") != self.VERSION:
+            print("Fichier d'etat d'une autre version, analyse complete")
+            return
+        if state.get("source") != self.source():
+            print(f"Fichier d'etat d'un autre dataset ({state.get('source')}), analyse complete")
+            return
+        self.folder_states = state["folders"]
+        self.fingerprint = state["fingerprint"]
+
+    def save_state(self):
+        """Écrit l'état courant (remplacement atomique du fichier)"""
+        state = {
+            "version": self.VERSION,
+            "source": self.source(),
+            "fingerprint": self.fingerprint,
+            "folders": self.folder_states
+        }
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def read_folders(self, folder_keys: Dict, n_workers: int = 1, chunk_size: int = 1):
+        """Lit les nouveaux dossiers et range les agrégats de chacun dans self.folder_states"""
+        contributions = {folder.name: (DataPreprocessor(), DifficultyAnalyzer()) for folder in self.new_folders}
+        # iter_episodes renvoie un lot par dossier d'épisode reconnu, dans l'ordre des dossiers
+        folders = self.loader.get_manifest().folders
+        parsed = set(folders.loc[folders["parsed"].to_numpy(), "name"])
+        episode_folders = [folder.name for folder in self.new_folders if folder.name in parsed]
+        batches = self.loader.iter_episodes(n_workers=n_workers, chunk_size=chunk_size,
+                                            folders=self.new_folders, store_ram=False)
+        for name, batch in zip(episode_folders, batches):
+            preprocessor, analyzer = contributions[name]
+            analyzer.update(preprocessor.update(batch))
+        for name, (preprocessor, analyzer) in contributions.items():
+            self.folder_states[name] = {
+                "key": folder_keys[name],
+                "preprocessor": preprocessor.get_state(),
+                "analyzer": analyzer.get_state()
+            }
+
+    def run(self, n_workers: int = 1, chunk_size: int = 1) -> Dict[str, pd.DataFrame]:
+        """Intègre les dossiers nouveaux ou modifiés, retire les disparus et renvoie les tables à jour"""
+        self.load_state()
+        manifest = self.loader.get_manifest()
+        folder_keys = manifest.folder_keys()
+        fingerprint = manifest.fingerprint()
+
+        # Dossiers disparus ou modifiés : leurs agrégats sont retirés (un dossier modifié est relu)
+        self.removed_folders = sorted(
+            name for name, state in self.folder_states.items()
+            if folder_keys.get(name) != state["key"]
+        )
+        for name in self.removed_folders:
+            del self.folder_states[name]
+        self.new_folders = [
+            folder for folder in self.loader.iter_episode_folders()
+            if folder.name not in self.folder_states
+        ]
+        print(f"\nDossiers deja analyses: {len(self.folder_states)}, nouveaux ou modifies: "
+              f"{len(self.new_folders)}, retires: {len(self.removed_folders)}")
+
+        if self.new_folders:
+            self.read_folders(folder_keys, n_workers, chunk_size)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.save_state()
+
+        # Agrégats globaux : fusion de ceux des dossiers présents, dans un ordre stable
+        self.preprocessor = DataPreprocessor()
+        self.analyzer = DifficultyAnalyzer()
+        for name in sorted(self.folder_states):
+            self.preprocessor.merge_state(self.folder_states[name]["preprocessor"])
+            self.analyzer.merge_state(self.folder_states[name]["analyzer"])
+
+        return {
+            "episode_stats": self.preprocessor.finalize_episode_stats(),
+            "level_metrics": self.analyzer.finalize_level_metrics(),
+            "action_metrics": self.analyzer.finalize_player_actions(),
+            "skill_counts": self.analyzer.finalize_skill_counts()
+        }
@@ -1,9 +1,17 @@
 from data_loader import DataLoader
+from frame_cache import FrameCache
+from incremental_analysis import IncrementalAnalysis
 from data_preprocessor import DataPreprocessor
-from difficulty_analyzer import DifficultyAnalyzer
+from difficulty_analyzer import DifficultyAnalyzer, SkillModel
+from frame_index import FrameIndex
+from ram_features import add_ram_features
+from action_sequences import ActionSequences
 from visualization import DataVisualizer
+from utils.instrumentation import Instrumentation, set_instrumentation, span
 import os
 import time
+import pandas as pd
+import argparse
 from tqdm import tqdm
 from pathlib import Path
 
@@ -27,7 +35,8 @@ def setup_paths():
     # Chemin vers les données
     
     # data_path = Path(r"C:\Users\jcpro\OneDrive\Documents\Ma maitrise\analyse\collecte de données\données des performances des joueurs\MarioMetrics\smbdataset\data-smb")
-    data_path = Path(r"https://drive.google.com/drive/folders/1--4DCtgVaE5KzMUElhHDK3YNSq1M9NeL?usp=sharing")
+    # Dossier local, archive .zip/.tar du dataset ou URL Google Drive (servie par un miroir local)
+    data_path = "https://drive.google.com/drive/folders/1--4DCtgVaE5KzMUElhHDK3YNSq1M9NeL?usp=sharing"
 
     # Chemin pour les résultats (dans le même dossier que le script)
     script_dir = Path(__file__).parent
@@ -35,88 +44,307 @@ def setup_paths():
     
     # Création du dossier results s'il n'existe pas
     results_path.mkdir(exist_ok=True)
+
+    # Cache des frames déjà parsées, à côté du dossier des résultats
+    cache_path = script_dir / "cache"
     
-    return data_path, results_path
+    return data_path, results_path, cache_path
+
+def parse_args():
+    """Analyse les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Analyse du dataset Super Mario Bros")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus pour le chargement des frames (defaut: 1)")
+    parser.add_argument("--chunk-size", type=int, default=1,
+                        help="Nombre de dossiers d'episodes envoyes a la fois a un processus")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-parse tout le dataset sans lire ni ecrire le cache des frames")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Invalide le cache des frames avant le chargement")
+    parser.add_argument("--stream", action="store_true",
+                        help="Traite le dataset episode par episode (memoire bornee par le plus gros episode)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="N'analyse que les nouveaux dossiers d'episodes (etat conserve dans results/)")
+    parser.add_argument("--skill-cold-start", action="store_true",
+                        help="Ajuste le modele competence/difficulte depuis zero, sans partir de "
+                             "results/skill_model.json (resultat identique au bit pres a comptes egaux)")
+    parser.add_argument("--plots-only", action="store_true",
+                        help="Regenere les graphiques depuis les CSV de results/ sans relire le dataset")
+    parser.add_argument("--dpi", type=int, default=300,
+                        help="Resolution des graphiques (defaut: 300)")
+    parser.add_argument("--plot-format", choices=["png", "svg", "webp"], default="png",
+                        help="Format des graphiques (defaut: png)")
+    parser.add_argument("--plot-workers", type=int, default=1,
+                        help="Nombre de processus pour le rendu des graphiques (defaut: 1)")
+    parser.add_argument("--profile", default="",
+                        help="Etapes a executer sous cProfile, separees par des virgules "
+                             "(ex: DataLoader.load_data,DataPreprocessor ; 'all' pour la premiere etape)")
+    parser.add_argument("--trace-memory", default="",
+                        help="Etapes a executer sous tracemalloc (meme syntaxe que --profile)")
+    parser.add_argument("--trace-format", choices=["json", "chrome"], default="json",
+                        help="Format du fichier d'instrumentation ecrit dans results/ (defaut: json)")
+    return parser.parse_args()
+
+def setup_instrumentation(args, results_path):
+    """Active la collecte des temps, compteurs et memoire de chaque etape"""
+    def names(option):
+        return [name.strip() for name in option.split(",") if name.strip()]
+    instrumentation = Instrumentation(profile=names(args.profile), trace_memory=names(args.trace_memory),
+                                      output_dir=str(results_path))
+    set_instrumentation(instrumentation)
+    return instrumentation
+
+def write_instrumentation(instrumentation, results_path, trace_format):
+    """Ecrit le fichier d'instrumentation a cote des CSV"""
+    if trace_format == "chrome":
+        filepath = results_path / "trace.json"
+        instrumentation.write_chrome_trace(str(filepath))
+    else:
+        filepath = results_path / "instrumentation.json"
+        instrumentation.write_json(str(filepath))
+    print(f"Instrumentation ecrite dans {filepath}")
+    print("Etapes les plus longues:")
+    for row in instrumentation.summary()[:5]:
+        print(f"  - {row['name']}: {row['seconds']:.2f}s ({row['calls']} appel(s))")
+
+def run_streaming(data_path, args):
+    """Phases 1 a 3 en streaming : un episode a la fois, agregats mis a jour au fil de l'eau"""
+    print_separator()
+    print("PHASES 1-3/4: LECTURE ET ANALYSE EN STREAMING")
+    phase_start = time.time()
+    if not args.no_cache:
+        print("\nLe cache des frames n'est pas utilise en mode streaming")
+
+    loader = DataLoader(str(data_path))
+    preprocessor = DataPreprocessor()
+    analyzer = DifficultyAnalyzer()
+
+    # Seul l'episode en cours est en memoire ; les agregats restent de taille bornee.
+    # Les analyses en streaming ne decodent pas la RAM : aucun fichier RAM n'est ecrit
+    for batch in loader.iter_episodes(n_workers=args.workers, chunk_size=args.chunk_size, store_ram=False):
+        cleaned_batch = preprocessor.update(batch)
+        analyzer.update(cleaned_batch)
+
+    episode_stats = preprocessor.finalize_episode_stats()
+    level_metrics = analyzer.finalize_level_metrics()
+    action_metrics = analyzer.finalize_player_actions()
+    skill_counts = analyzer.finalize_skill_counts()
+    print(f"\nStatistiques calculees pour {len(episode_stats)} episodes")
+    print(f"Metriques calculees pour {len(level_metrics)} niveaux")
+    print(f"Actions analysees pour {len(action_metrics)} niveaux")
+
+    phase_time = time.time() - phase_start
+    print(f"\nLecture et analyse terminees en {format_time(phase_time)}")
+    return episode_stats, level_metrics, action_metrics, skill_counts
+
+def run_incremental(data_path, results_path, args):
+    """Phases 1 a 3 incrementales : seuls les nouveaux dossiers d'episodes sont lus"""
+    print_separator()
+    print("PHASES 1-3/4: ANALYSE INCREMENTALE")
+    phase_start = time.time()
+
+    analysis = IncrementalAnalysis(str(data_path), str(results_path / "analysis_state.json"))
+    results = analysis.run(n_workers=args.workers, chunk_size=args.chunk_size)
+
+    print(f"\nStatistiques calculees pour {len(results['episode_stats'])} episodes")
+    print(f"Metriques calculees pour {len(results['level_metrics'])} niveaux")
+
+    phase_time = time.time() - phase_start
+    print(f"\nAnalyse incrementale terminee en {format_time(phase_time)}")
+    return results['episode_stats'], results['level_metrics'], results['action_metrics'], results['skill_counts']
+
+def fit_skill_model(analyzer, skill_counts, results_path, cold_start=False):
+    """Ajuste le modele competence/difficulte, a chaud depuis l'ajustement precedent s'il existe
+
+    A comptes egaux, l'ajustement enregistre est repris tel quel (pas de derive d'un run a l'autre).
+    """
+    print("\nAjustement du modele competence des joueurs / difficulte des niveaux...")
+    model_path = results_path / "skill_model.json"
+    with span("main.fit_skill_model", pairs=len(skill_counts)):
+        skill_model = analyzer.fit_skill_model(skill_counts, previous=SkillModel.load(str(model_path)),
+                                               cold_start=cold_start)
+    status = "converge" if skill_model.converged else "non converge"
+    print(f"{len(skill_model.skills)} joueurs, {len(skill_model.difficulties)} niveaux "
+          f"({skill_model.iterations} iterations, {status})")
+    skill_model.save(str(model_path))
+    return skill_model
+
+def analyze_action_sequences(frames, index):
+    """Segments, n-grammes et transitions des flux d'actions ; tables a exporter par nom de fichier"""
+    if frames.empty:
+        return {}
+    sequences = ActionSequences.from_frames(frames, index=index)
+    tables = {
+        "action_runs.csv": sequences.run_stats(['world', 'level']),
+        "action_ngrams_level.csv": sequences.top_ngrams(3, 10, by=['world', 'level']),
+        "action_ngrams_outcome.csv": sequences.top_ngrams(3, 10, by=['outcome']),
+        "action_transitions.csv": sequences.transitions()
+    }
+    print(f"{len(sequences.episodes)} flux d'actions, {len(tables['action_transitions.csv'])} transitions distinctes")
+    return tables
+
+def generate_plots(visualizer, results_path, args):
+    """Genere les graphiques disponibles ; ceux dont les donnees n'ont pas change sont gardes"""
+    with span("main.plot", workers=args.plot_workers):
+        rendered = visualizer.render_all(results_path, n_workers=args.plot_workers)
+    for name, result in rendered.items():
+        status = "genere" if result["rendered"] else "inchange, non regenere"
+        print(f"- {Path(result['path']).name}: {status}")
 
-def count_files(path):
-    """Compte le nombre total de fichiers PNG"""
-    return sum(1 for _ in Path(path).rglob("*.png"))
+def run_plots_only(results_path, args):
+    """Regenere les graphiques a partir des CSV deja exportes, sans relire le dataset"""
+    print_separator()
+    print("GENERATION DES VISUALISATIONS A PARTIR DES RESULTATS EXISTANTS")
+    sources = {
+        'level_metrics': "level_difficulty.csv",
+        'action_metrics': "player_actions.csv",
+        'death_bins': "death_bins.csv"
+    }
+    metrics = {}
+    for key, filename in sources.items():
+        filepath = results_path / filename
+        if filepath.exists():
+            metrics[key] = pd.read_csv(filepath)
+        else:
+            print(f"- {filename} absent, graphique correspondant ignore")
+    generate_plots(DataVisualizer(metrics, dpi=args.dpi, fmt=args.plot_format), results_path, args)
 
 def main():
+    instrumentation = None
     try:
+        args = parse_args()
         total_start_time = time.time()
         
         # Configuration des chemins
-        data_path, results_path = setup_paths()
+        data_path, results_path, cache_path = setup_paths()
+        instrumentation = setup_instrumentation(args, results_path)
         
         print_separator("=")
         print("DEMARRAGE DE L'ANALYSE DU DATASET SUPER MARIO BROS")
         print(f"Chemin des donnees: {data_path}")
         print(f"Dossier des resultats: {results_path}")
         
-        # Phase 1: Chargement des données
-        print_separator()
-        print("PHASE 1/4: CHARGEMENT DES DONNEES")
-        phase_start = time.time()
+        if args.plots_only:
+            run_plots_only(results_path, args)
+            write_instrumentation(instrumentation, results_path, args.trace_format)
+            return
+
+        if args.incremental:
+            with span("main.run_incremental"):
+                episode_stats, level_metrics, action_metrics, skill_counts = run_incremental(
+                    data_path, results_path, args)
+            analyzer = DifficultyAnalyzer()
+            # L'etat de jeu issu de la RAM n'est decode qu'en mode en memoire
+            progress_metrics = pd.DataFrame()
+            death_bins = pd.DataFrame()
+            sequence_tables = {}
+            phase_start = time.time()
+        elif args.stream:
+            with span("main.run_streaming"):
+                episode_stats, level_metrics, action_metrics, skill_counts = run_streaming(data_path, args)
+            analyzer = DifficultyAnalyzer()
+            # L'etat de jeu issu de la RAM n'est decode qu'en mode en memoire
+            progress_metrics = pd.DataFrame()
+            death_bins = pd.DataFrame()
+            sequence_tables = {}
+            phase_start = time.time()
+        else:
+            # Phase 1: Chargement des données
+            print_separator()
+            print("PHASE 1/4: CHARGEMENT DES DONNEES")
+            phase_start = time.time()
         
-        total_files = count_files(data_path)
-        print(f"\nNombre total de fichiers a traiter: {total_files}")
+            # Un seul parcours du dataset : le manifeste sert au comptage et au chargement
+            loader = DataLoader(str(data_path))
+            total_files = loader.count_total_files()
+            print(f"\nNombre total de fichiers a traiter: {total_files}")
         
-        loader = DataLoader(str(data_path))
-        raw_data = loader.load_data()
+            cache = None
+            if not args.no_cache:
+                cache = FrameCache(str(cache_path), str(loader.data_path))
+                if args.clear_cache:
+                    cache.clear()
         
-        phase_time = time.time() - phase_start
-        print(f"\nChargement termine en {format_time(phase_time)}")
+            raw_data = loader.load_data(n_workers=args.workers, chunk_size=args.chunk_size, cache=cache)
+        
+            phase_time = time.time() - phase_start
+            print(f"\nChargement termine en {format_time(phase_time)}")
         
-        if raw_data:
-            print("\nStatistiques du chargement:")
-            for key, df in raw_data.items():
-                print(f"- {key.capitalize()}: {len(df)} entrees")
-                if not df.empty:
-                    print(f"  Colonnes: {', '.join(df.columns)}")
+            if raw_data:
+                print("\nStatistiques du chargement:")
+                for key, df in raw_data.items():
+                    print(f"- {key.capitalize()}: {len(df)} entrees")
+                    if not df.empty:
+                        print(f"  Colonnes: {', '.join(df.columns)}")
 
-        # Phase 2: Prétraitement
-        print_separator()
-        print("PHASE 2/4: PRETRAITEMENT DES DONNEES")
-        phase_start = time.time()
+            # Phase 2: Prétraitement
+            print_separator()
+            print("PHASE 2/4: PRETRAITEMENT DES DONNEES")
+            phase_start = time.time()
         
-        preprocessor = DataPreprocessor(raw_data)
-        print("\nNettoyage des donnees...")
-        cleaned_data = preprocessor.clean_data()
+            preprocessor = DataPreprocessor(raw_data)
+            print("\nNettoyage des donnees...")
+            cleaned_data = preprocessor.clean_data()
+
+            print("\nDecodage de l'etat de jeu depuis la RAM...")
+            cleaned_data['frames'] = add_ram_features(cleaned_data['frames'], loader.ram_store)
+            # La RAM n'est plus lue apres le decodage : le fichier temporaire est supprime
+            loader.close()
         
-        print("\nResultats du nettoyage:")
-        for key, df in cleaned_data.items():
-            print(f"- {key.capitalize()}: {len(df)} entrees valides")
+            print("\nResultats du nettoyage:")
+            for key, df in cleaned_data.items():
+                print(f"- {key.capitalize()}: {len(df)} entrees valides")
         
-        print("\nCalcul des statistiques par episode...")
-        episode_stats = preprocessor.calculate_episode_stats()
-        if not episode_stats.empty:
-            print(f"Statistiques calculees pour {len(episode_stats)} episodes")
+            print("\nCalcul des statistiques par episode...")
+            # Les statistiques par episode ont besoin des colonnes ajoutees par le nettoyage ;
+            # l'index est partage avec l'analyse pour ne factoriser les cles qu'une fois
+            index = FrameIndex(cleaned_data)
+            episode_stats = DataPreprocessor(cleaned_data, index=index).calculate_episode_stats()
+            if not episode_stats.empty:
+                print(f"Statistiques calculees pour {len(episode_stats)} episodes")
         
-        phase_time = time.time() - phase_start
-        print(f"\nPretraitement termine en {format_time(phase_time)}")
+            phase_time = time.time() - phase_start
+            print(f"\nPretraitement termine en {format_time(phase_time)}")
 
-        # Phase 3: Analyse de la difficulté
-        print_separator()
-        print("PHASE 3/4: ANALYSE DE LA DIFFICULTE")
-        phase_start = time.time()
+            # Phase 3: Analyse de la difficulté
+            print_separator()
+            print("PHASE 3/4: ANALYSE DE LA DIFFICULTE")
+            phase_start = time.time()
         
-        analyzer = DifficultyAnalyzer(cleaned_data)
+            analyzer = DifficultyAnalyzer(cleaned_data, index=index)
         
-        print("\nCalcul des metriques de niveau...")
-        level_metrics = analyzer.calculate_level_metrics()
-        print(f"Metriques calculees pour {len(level_metrics)} niveaux")
+            print("\nCalcul des metriques de niveau...")
+            level_metrics = analyzer.calculate_level_metrics()
+            print(f"Metriques calculees pour {len(level_metrics)} niveaux")
+            skill_counts = analyzer.calculate_skill_counts()
         
-        print("\nAnalyse des actions des joueurs...")
-        action_metrics = analyzer.analyze_player_actions()
-        print(f"Actions analysees pour {len(action_metrics)} niveaux")
+            print("\nAnalyse des actions des joueurs...")
+            action_metrics = analyzer.analyze_player_actions()
+            print(f"Actions analysees pour {len(action_metrics)} niveaux")
+
+            print("\nAnalyse de la progression (position des morts, vitesse)...")
+            episode_progress = analyzer.calculate_episode_progress()
+            progress_metrics = analyzer.calculate_progress_metrics(episode_progress)
+            print(f"Progression analysee pour {len(progress_metrics)} niveaux")
+            death_bins = analyzer.calculate_death_bins(episode_progress)
+            print(f"Morts localisees dans {int((death_bins['deaths'] > 0).sum())} intervalles de position")
+
+            print("\nAnalyse des sequences d'actions...")
+            sequence_tables = analyze_action_sequences(cleaned_data['frames'], index)
         
+        skill_model = fit_skill_model(analyzer, skill_counts, results_path, cold_start=args.skill_cold_start)
+        if not skill_model.difficulties.empty:
+            level_metrics = level_metrics.merge(skill_model.difficulties, on=['world', 'level'], how='left')
+
         difficulty_data = analyzer.categorize_difficulty(level_metrics)
         print("\nDistribution des niveaux de difficulte:")
         diff_dist = difficulty_data['difficulty_category'].value_counts()
         for category, count in diff_dist.items():
             percentage = (count / len(difficulty_data)) * 100
             print(f"- {category}: {count} niveaux ({percentage:.1f}%)")
+        if 'category_confidence' in difficulty_data.columns:
+            uncertain = int((difficulty_data['category_confidence'] < 0.5).sum())
+            print(f"Niveaux dont la categorie est incertaine (probabilite < 50%): {uncertain}")
         
         phase_time = time.time() - phase_start
         print(f"\nAnalyse terminee en {format_time(phase_time)}")
@@ -131,21 +359,13 @@ def main():
             'action_metrics': action_metrics,
             'episode_stats': episode_stats
         }
+        if not death_bins.empty:
+            metrics['death_bins'] = death_bins
         
-        visualizer = DataVisualizer(metrics)
+        visualizer = DataVisualizer(metrics, dpi=args.dpi, fmt=args.plot_format)
         
         print("\nCreation des visualisations...")
-        
-        # Génération des visualisations
-        viz_files = {
-            "difficulty_heatmap.png": visualizer.plot_level_difficulty_heatmap,
-            "action_distribution.png": visualizer.plot_action_distribution
-        }
-        
-        for filename, viz_func in viz_files.items():
-            filepath = results_path / filename
-            print(f"- Generation de {filename}")
-            viz_func(str(filepath))
+        generate_plots(visualizer, results_path, args)
         
         print("\nGeneration des rapports CSV...")
         summary_report = visualizer.generate_summary_report()
@@ -155,12 +375,21 @@ def main():
             "level_difficulty.csv": difficulty_data,
             "player_actions.csv": action_metrics,
             "episode_statistics.csv": episode_stats,
-            "summary_report.csv": summary_report
+            "summary_report.csv": summary_report,
+            "player_skills.csv": skill_model.skills
         }
+        if not progress_metrics.empty:
+            csv_files["level_progress.csv"] = progress_metrics
+        if not death_bins.empty:
+            # Comptes par intervalle : relus par --plots-only sans reparcourir les frames
+            csv_files["death_bins.csv"] = death_bins
+        csv_files.update(sequence_tables)
         
         for filename, data in csv_files.items():
             filepath = results_path / filename
-            data.to_csv(filepath, index=False, encoding='utf-8')
+            with span("main.export_csv", file=filename, rows=len(data)) as export:
+                data.to_csv(filepath, index=False, encoding='utf-8')
+                export.add(bytes_written=filepath.stat().st_size)
             print(f"- {filename} sauvegarde")
         
         phase_time = time.time() - phase_start
@@ -171,14 +400,22 @@ def main():
         print(f"Temps total d'execution: {format_time(total_time)}")
         print(f"\nResultats disponibles dans '{results_path}':")
         print("  - Visualisations:")
-        print("    * difficulty_heatmap.png")
-        print("    * action_distribution.png")
+        for name in visualizer.available_figures():
+            print(f"    * {name}.{args.plot_format}")
         print("  - Rapports:")
         print("    * level_difficulty.csv")
         print("    * player_actions.csv")
         print("    * episode_statistics.csv")
         print("    * summary_report.csv")
+        print("    * player_skills.csv")
+        if not progress_metrics.empty:
+            print("    * level_progress.csv")
+        if not death_bins.empty:
+            print("    * death_bins.csv")
+        for filename in sequence_tables:
+            print(f"    * {filename}")
         print_separator("=")
+        write_instrumentation(instrumentation, results_path, args.trace_format)
 
     except Exception as e:
         print_separator("!")
@@ -186,6 +423,9 @@ def main():
         print(f"Type: {type(e).__name__}")
         print(f"Message: {str(e)}")
         print_separator("!")
+        if instrumentation is not None:
+            # Les etapes deja mesurees aident a comprendre l'echec
+            write_instrumentation(instrumentation, results_path, args.trace_format)
         raise
 
 if __name__ == "__main__":
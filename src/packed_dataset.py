@@ -0,0 +1,152 @@
+"""Format consolidé du dataset : quelques fichiers lus séquentiellement au lieu d'un PNG par frame
+
+Un dossier de pack contient :
+- pack.json : version, taille de la RAM, nombre d'épisodes et de frames ;
+- episodes.parquet : table des épisodes, avec pour chacun `frame_start` et
+  `frame_count` (plage de ses frames dans frames.parquet et ram.u8) ;
+- frames.parquet : table des frames, regroupées par épisode, `ram_index` étant
+  la position de la frame ;
+- ram.u8 : instantanés RAM (RamStore), une ligne par frame dans le même ordre.
+
+Usage : python src/packed_dataset.py DONNEES PACK [--workers 4]
+"""
+import os
+import json
+import shutil
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, Iterator
+from ram_store import RamStore
+from table_schema import FRAME_SCHEMA, EPISODE_SCHEMA, apply_schema, smallest_int
+from utils.instrumentation import span, traced
+
+# Colonnes de la table des épisodes propres au pack (absentes du résultat de load_data)
+OFFSET_COLUMNS = ["frame_start", "frame_count"]
+EPISODE_KEYS = ["user", "session_id", "episode", "world", "level"]
+
+
+class PackedDataset:
+    VERSION = 1
+    INDEX_FILE = "pack.json"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("pyarrow est nécessaire pour lire ou écrire un pack du dataset")
+
+    @classmethod
+    def is_pack(cls, path) -> bool:
+        return (Path(path) / cls.INDEX_FILE).is_file()
+
+    def info(self) -> Dict:
+        with open(self.root / self.INDEX_FILE, encoding="utf-8") as f:
+            info = json.load(f)
+        if info.get("version") != self.VERSION:
+            raise ValueError(f"Version de pack non supportée: {info.get('version')}")
+        return info
+
+    def ram_store(self) -> RamStore:
+        return RamStore(self.root / "ram.u8", self.info()["ram_size"])
+
+    @traced("PackedDataset.write")
+    def write(self, dataframes: Dict[str, pd.DataFrame], ram_store: RamStore):
+        """Écrit les tables de load_data et leurs RAM dans le pack (remplace un pack existant)
+
+        Les frames sont regroupées par épisode (dans l'ordre de la table des
+        épisodes) et leurs RAM recopiées dans le même ordre.
+        """
+        episodes = dataframes["episodes"].reset_index(drop=True)
+        frames = dataframes["frames"]
+        if episodes.empty or frames.empty:
+            raise ValueError("Aucun épisode ou aucune frame à écrire dans le pack")
+
+        # Plage des frames de chaque épisode, après regroupement par épisode
+        episode_rank = pd.Series(np.arange(len(episodes)), index=pd.MultiIndex.from_frame(episodes[EPISODE_KEYS]))
+        frame_rank = episode_rank.reindex(pd.MultiIndex.from_frame(frames[EPISODE_KEYS])).to_numpy()
+        if np.isnan(frame_rank).any():
+            raise ValueError("Des frames n'appartiennent à aucun épisode de la table des épisodes")
+        order = np.argsort(frame_rank, kind="stable")
+        frames = frames.iloc[order].reset_index(drop=True)
+        counts = np.bincount(frame_rank.astype(np.int64), minlength=len(episodes))
+        episodes["frame_start"] = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        episodes["frame_count"] = counts.astype(np.int64)
+
+        tmp = self.root.with_name(self.root.name + ".tmp")
+        if tmp.exists():
+            shutil.rmtree(tmp)
+        tmp.mkdir(parents=True)
+        with span("PackedDataset.write_ram", frames=len(frames)):
+            packed_ram = RamStore(tmp / "ram.u8", ram_store.ram_size)
+            packed_ram.open_writer()
+            packed_ram.copy_rows(ram_store, frames["ram_index"].to_numpy())
+            packed_ram.close()
+        frames["ram_index"] = smallest_int(np.arange(len(frames), dtype=np.int64))
+        episodes.to_parquet(tmp / "episodes.parquet", index=False)
+        frames.to_parquet(tmp / "frames.parquet", index=False, row_group_size=1 << 18)
+        with open(tmp / self.INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump({"version": self.VERSION, "ram_size": ram_store.ram_size,
+                       "episodes": len(episodes), "frames": len(frames)}, f)
+
+        # Le pack complet remplace l'ancien en une fois
+        if self.root.exists():
+            shutil.rmtree(self.root)
+        os.replace(tmp, self.root)
+
+    @traced("PackedDataset.load")
+    def load(self) -> Dict[str, pd.DataFrame]:
+        """Tables episodes/frames, identiques à celles de DataLoader.load_data"""
+        self.info()
+        episodes = pd.read_parquet(self.root / "episodes.parquet")
+        frames = pd.read_parquet(self.root / "frames.parquet")
+        return {
+            "episodes": apply_schema(episodes.drop(columns=OFFSET_COLUMNS), EPISODE_SCHEMA),
+            "frames": apply_schema(frames, FRAME_SCHEMA)
+        }
+
+    def iter_episodes(self, batch_size: int = 65536) -> Iterator[Dict[str, pd.DataFrame]]:
+        """Parcourt le pack épisode par épisode en lisant frames.parquet par lots"""
+        import pyarrow.parquet as pq
+
+        self.info()
+        episodes = pd.read_parquet(self.root / "episodes.parquet")
+        batches = pq.ParquetFile(self.root / "frames.parquet").iter_batches(batch_size=batch_size)
+        buffer, buffer_start = pd.DataFrame(), 0
+        for i in range(len(episodes)):
+            start = int(episodes["frame_start"].iat[i])
+            stop = start + int(episodes["frame_count"].iat[i])
+            while buffer_start + len(buffer) < stop:
+                buffer = pd.concat([buffer, next(batches).to_pandas()], ignore_index=True)
+            # Les lots Parquet ont chacun leur dictionnaire : les catégories sont reconstruites
+            frames = apply_schema(buffer.iloc[start - buffer_start:stop - buffer_start].reset_index(drop=True),
+                                  FRAME_SCHEMA)
+            # Les frames déjà renvoyées sont libérées
+            buffer = buffer.iloc[stop - buffer_start:].reset_index(drop=True)
+            buffer_start = stop
+            yield {
+                "episodes": apply_schema(episodes.iloc[[i]].drop(columns=OFFSET_COLUMNS).reset_index(drop=True),
+                                         EPISODE_SCHEMA),
+                "frames": frames
+            }
+
+
+def main():
+    from data_loader import DataLoader
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("data", help="dossier, archive ou URL du dataset")
+    parser.add_argument("pack", help="dossier du pack à écrire")
+    parser.add_argument("--workers", type=int, default=1, help="nombre de processus de lecture")
+    parser.add_argument("--chunk-size", type=int, default=1)
+    args = parser.parse_args()
+
+    with DataLoader(args.data) as loader:
+        raw_data = loader.load_data(n_workers=args.workers, chunk_size=args.chunk_size)
+        PackedDataset(args.pack).write(raw_data, loader.ram_store)
+    print(f"Pack écrit dans {args.pack} ({len(raw_data['frames'])} frames)")
+
+
+if __name__ == "__main__":
+    main()
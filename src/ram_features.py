@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+from typing import Dict
+from ram_store import RamStore
+
+# Adresses de la RAM de Super Mario Bros (carte de la RAM de datacrystal)
+RAM_ADDRESSES = {
+    'player_state': 0x000E,   # 0x06 / 0x0B : mort, 0x08 : normal
+    'float_state': 0x001D,    # 0 au sol, 1 saut, 2 chute, 3 mât du drapeau
+    'x_page': 0x006D,         # page horizontale du joueur dans le niveau
+    'x_screen': 0x0086,       # position horizontale dans la page
+    'y_viewport': 0x00B5,     # 1 dans l'écran, > 1 tombé dans un trou
+    'y_position': 0x00CE,
+    'powerup': 0x0756,        # 0 petit, 1 grand, 2 fleur de feu
+    'lives': 0x075A,
+}
+TIMER_ADDRESSES = [0x07F8, 0x07F9, 0x07FA]     # chiffres centaines, dizaines, unités
+ENEMY_DRAWN_ADDRESSES = list(range(0x000F, 0x0014))  # 5 emplacements d'ennemis
+ENEMY_TYPE_ADDRESSES = list(range(0x0016, 0x001B))
+DEATH_STATES = (0x06, 0x0B)
+
+# Colonnes ajoutées aux frames par add_ram_features, et leur type
+RAM_FEATURE_DTYPES = {
+    'x_position': np.int32,
+    'y_position': np.uint8,
+    'y_viewport': np.uint8,
+    'player_state': np.uint8,
+    'float_state': np.uint8,
+    'powerup': np.uint8,
+    'lives': np.uint8,
+    'timer': np.int16,
+    'enemy_count': np.uint8,
+    'dead': bool,
+}
+
+# Toutes les adresses lues, rassemblées en une seule indexation par bloc
+_COLUMNS = list(RAM_ADDRESSES.values()) + TIMER_ADDRESSES + ENEMY_DRAWN_ADDRESSES + ENEMY_TYPE_ADDRESSES
+_POS = {address: i for i, address in enumerate(_COLUMNS)}
+
+
+def _take(state: np.ndarray, addresses) -> np.ndarray:
+    """Colonnes de `state` correspondant à des adresses RAM"""
+    return state[:, [_POS[address] for address in addresses]]
+
+
+def decode_ram(ram: np.ndarray) -> Dict[str, np.ndarray]:
+    """Décode l'état de jeu d'une matrice RAM (n_frames, 2048), sans boucle par frame"""
+    state = np.asarray(ram)[:, _COLUMNS]
+    column = {name: state[:, _POS[address]] for name, address in RAM_ADDRESSES.items()}
+    digits = _take(state, TIMER_ADDRESSES).astype(np.int16)
+    drawn = _take(state, ENEMY_DRAWN_ADDRESSES) != 0
+    return {
+        'x_position': column['x_page'].astype(np.int32) * 256 + column['x_screen'],
+        'y_position': column['y_position'],
+        'y_viewport': column['y_viewport'],
+        'player_state': column['player_state'],
+        'float_state': column['float_state'],
+        'powerup': column['powerup'],
+        'lives': column['lives'],
+        'timer': digits[:, 0] * 100 + digits[:, 1] * 10 + digits[:, 2],
+        'enemy_count': drawn.sum(axis=1, dtype=np.uint8),
+        'dead': np.isin(column['player_state'], DEATH_STATES) | (column['y_viewport'] > 1),
+    }
+
+
+def enemy_slots(ram: np.ndarray) -> np.ndarray:
+    """Type d'ennemi de chacun des 5 emplacements (-1 si l'emplacement est vide)"""
+    ram = np.asarray(ram)
+    drawn = ram[:, ENEMY_DRAWN_ADDRESSES] != 0
+    return np.where(drawn, ram[:, ENEMY_TYPE_ADDRESSES].astype(np.int16), -1)
+
+
+def extract_ram_features(ram_store: RamStore, ram_indices, block_size: int = 1 << 18) -> pd.DataFrame:
+    """Décode l'état de jeu des frames désignées par `ram_indices`, par blocs
+
+    Seules les colonnes utiles sont copiées depuis le fichier RAM mappé en
+    mémoire, ce qui borne la mémoire à `block_size` lignes de quelques octets.
+    """
+    idx = np.asarray(ram_indices, dtype=np.int64)
+    features = {name: np.empty(len(idx), dtype=dtype) for name, dtype in RAM_FEATURE_DTYPES.items()}
+    for start in range(0, len(idx), block_size):
+        stop = min(start + block_size, len(idx))
+        decoded = decode_ram(ram_store.frames(idx[start:stop]))
+        for name, values in decoded.items():
+            features[name][start:stop] = values
+    return pd.DataFrame(features)
+
+
+def add_ram_features(frames: pd.DataFrame, ram_store: RamStore) -> pd.DataFrame:
+    """Ajoute aux frames les colonnes d'état de jeu décodées depuis leur RAM"""
+    if frames.empty or 'ram_index' not in frames.columns or ram_store is None:
+        return frames
+    features = extract_ram_features(ram_store, frames['ram_index'].to_numpy())
+    features.index = frames.index
+    return pd.concat([frames.drop(columns=features.columns, errors='ignore'), features], axis=1)
@@ -0,0 +1,101 @@
+import pandas as pd
+import numpy as np
+import os
+from pathlib import Path
+from typing import Union
+
+# Taille de la RAM de la NES enregistrée dans le chunk RAM de chaque frame
+RAM_SIZE = 2048
+
+
+def ram_to_array(ram_data: Union[str, bytes], ram_size: int = RAM_SIZE) -> np.ndarray:
+    """Convertit le contenu du chunk RAM (texte latin-1 ou octets) en ligne uint8"""
+    if isinstance(ram_data, str):
+        ram_data = ram_data.encode("latin-1")
+    row = np.zeros(ram_size, dtype=np.uint8)
+    raw = np.frombuffer(ram_data, dtype=np.uint8)[:ram_size]
+    row[:len(raw)] = raw
+    return row
+
+
+class RamStore:
+    """Instantanés RAM des frames dans un fichier uint8 contigu, mappé en mémoire
+
+    Le fichier contient une ligne de `ram_size` octets par frame ; la table des
+    frames ne garde que l'indice de ligne (`ram_index`). Une RAM absente ou
+    illisible est stockée comme une ligne de zéros.
+    """
+
+    def __init__(self, path: str, ram_size: int = RAM_SIZE):
+        self.path = Path(path)
+        self.ram_size = ram_size
+        self._array = None
+        self._writer = None
+
+    def __len__(self) -> int:
+        if not self.path.exists():
+            return 0
+        return self.path.stat().st_size // self.ram_size
+
+    def open_writer(self):
+        """Démarre un nouveau fichier (écrase le précédent)"""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = open(self.path, "wb")
+        self._count = 0
+
+    def append(self, block: np.ndarray) -> int:
+        """Ajoute un bloc (n, ram_size) et renvoie l'indice de sa première ligne"""
+        block = np.ascontiguousarray(block, dtype=np.uint8).reshape(-1, self.ram_size)
+        start = self._count
+        self._writer.write(block.tobytes())
+        self._count += len(block)
+        return start
+
+    def close(self):
+        """Termine l'écriture et libère le mappage mémoire"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._array = None
+
+    @property
+    def array(self) -> np.ndarray:
+        """Tableau (n_frames, ram_size) en lecture seule, chargé à la demande par l'OS"""
+        if self._array is None:
+            n = len(self)
+            if n == 0:
+                return np.zeros((0, self.ram_size), dtype=np.uint8)
+            self._array = np.memmap(self.path, dtype=np.uint8, mode="r", shape=(n, self.ram_size))
+        return self._array
+
+    def frame(self, ram_index: int) -> np.ndarray:
+        """RAM d'une frame"""
+        return np.asarray(self.array[ram_index])
+
+    def frames(self, ram_indices) -> np.ndarray:
+        """RAM d'un ensemble de frames ; une plage contiguë est renvoyée sans copie"""
+        idx = np.asarray(ram_indices, dtype=np.int64)
+        if len(idx) and np.all(np.diff(idx) == 1):
+            return self.array[idx[0]:idx[-1] + 1]
+        return self.array[idx]
+
+    def episode(self, frames: pd.DataFrame, session_id: str, episode: int) -> np.ndarray:
+        """RAM de toutes les frames d'un épisode, dans l'ordre des frames"""
+        mask = (frames["session_id"] == session_id) & (frames["episode"] == episode)
+        ep = frames.loc[mask, ["frame", "ram_index"]].sort_values("frame")
+        return self.frames(ep["ram_index"].to_numpy())
+
+    def copy_rows(self, source: "RamStore", ram_indices, batch_size: int = 65536) -> int:
+        """Recopie des lignes d'un autre fichier RAM par blocs ; renvoie le premier indice"""
+        idx = np.asarray(ram_indices, dtype=np.int64)
+        start = self._count
+        for i in range(0, len(idx), batch_size):
+            self.append(source.frames(idx[i:i + batch_size]))
+        return start
+
+    def replace_with(self, other: "RamStore"):
+        """Remplace ce fichier par un autre (écriture atomique du cache)"""
+        self.close()
+        other.close()
+        os.replace(other.path, self.path)
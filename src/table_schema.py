@@ -0,0 +1,103 @@
+import pandas as pd
+import numpy as np
+from typing import Dict, Mapping, Sequence
+
+# Type de chaque colonne des tables de load_data :
+# - "category" pour les textes répétés sur toutes les frames d'un épisode ;
+# - "int" pour le plus petit type entier contenant les valeurs de la table ;
+# - "datetime" pour la date du nom de frame, parsée en datetime64.
+# Le code d'action garde les 8 boutons de la manette sous forme de bits (voir decode_buttons).
+FRAME_SCHEMA = {
+    "user": "category",
+    "session_id": "category",
+    "episode": "int",
+    "world": "int",
+    "level": "int",
+    "frame": "int",
+    "action": "int",
+    "datetime": "datetime",
+    "outcome": "category",
+    "ram_index": "int",
+    "player_input": "int",
+    "outcome_code": "int"
+}
+EPISODE_SCHEMA = {
+    "user": "category",
+    "session_id": "category",
+    "episode": "int",
+    "world": "int",
+    "level": "int",
+    "outcome": "category"
+}
+# Format de la date dans les noms de frames ("2019-04-13_20-13-16")
+DATETIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+
+def smallest_int(values) -> np.ndarray:
+    """Valeurs entières dans le plus petit type qui les contient (non signé si possible)"""
+    values = np.asarray(values)
+    if values.dtype.kind not in "iub":
+        return values
+    if not values.size:
+        return values.astype(np.uint8)
+    low, high = int(values.min()), int(values.max())
+    dtype = np.result_type(np.min_scalar_type(low), np.min_scalar_type(high))
+    return values.astype(dtype, copy=False)
+
+
+def parse_datetimes(values) -> np.ndarray:
+    """Dates des noms de frames en datetime64 (NaT si non reconnue)
+
+    Une même date est partagée par des dizaines de frames consécutives :
+    seules les valeurs distinctes sont parsées.
+    """
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    parsed = pd.to_datetime(pd.Index(uniques), format=DATETIME_FORMAT, errors="coerce").to_numpy()
+    result = np.full(len(codes), np.datetime64("NaT"), dtype=parsed.dtype)
+    present = codes >= 0
+    result[present] = parsed[codes[present]]
+    return result
+
+
+def typed_column(values, kind: str):
+    """Convertit un tampon de colonne (liste ou tableau) au type du schéma"""
+    if kind == "category":
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            return values
+        return pd.Categorical(np.asarray(values, dtype=object))
+    if kind == "datetime":
+        if np.asarray(values).dtype.kind == "M":
+            return values
+        return parse_datetimes(values)
+    return smallest_int(values)
+
+
+def build_table(columns: Mapping[str, Sequence], schema: Dict[str, str]) -> pd.DataFrame:
+    """DataFrame construit colonne par colonne depuis des tampons typés
+
+    Les colonnes absentes du schéma sont gardées telles quelles.
+    """
+    return pd.DataFrame({
+        name: typed_column(values, schema[name]) if name in schema else values
+        for name, values in columns.items()
+    })
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """Réapplique le schéma à une table (après une concaténation ou la lecture d'un ancien fichier)
+
+    pd.concat de catégories différentes redonne des objets et les entiers
+    peuvent avoir été élargis : chaque colonne du schéma est reconvertie.
+    """
+    if df.empty:
+        return df
+    table = build_table({name: df[name].array for name in df.columns}, schema)
+    table.index = df.index
+    return table
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    """Mémoire occupée par ligne, chaînes comprises"""
+    if df.empty:
+        return 0.0
+    return float(df.memory_usage(deep=True, index=False).sum()) / len(df)
@@ -1,9 +1,23 @@
 import os
-import tempfile
+import inspect
+from collections import Counter
 from pathlib import Path
-from typing import Union, Optional
+from typing import List, Optional
 import gdown
+import gdown.exceptions
 import streamlit as st
+from utils.remote_mirror import RemoteMirror, RemoteFile
+
+# Miroirs locaux des sources distantes, à côté du cache des frames
+MIRROR_DIR = Path(__file__).resolve().parent.parent / "cache" / "mirrors"
+# gdown 5.x (paramètre remaining_ok) ne lit que les 50 premiers éléments d'un
+# dossier Google Drive ; gdown 6 n'a plus de limite
+DRIVE_FOLDER_LIMIT = 50
+GDOWN_HAS_FOLDER_LIMIT = "remaining_ok" in inspect.signature(gdown.download_folder).parameters
+# Erreur levée par gdown 5.x pour un dossier qui atteint la limite
+FOLDER_LIMIT_ERRORS = tuple(
+    error for error in [getattr(gdown.exceptions, "FolderContentsMaximumLimitError", None)] if error
+)
 
 class DataSource:
     @staticmethod
@@ -20,26 +34,73 @@ class DataSource:
         return None
     
     @staticmethod
-    def download_from_drive(url: str) -> str:
-        """Télécharge les données depuis Google Drive"""
+    def list_drive_folder(folder_id: str) -> List[RemoteFile]:
+        """Liste les fichiers du dossier Google Drive sans les télécharger
+
+        Avec gdown 5.x (paramètre remaining_ok), un dossier de plus de 50
+        éléments ne peut pas être listé entièrement : une erreur est levée
+        plutôt que de renvoyer une liste tronquée.
+        """
+        options = {"remaining_ok": False} if GDOWN_HAS_FOLDER_LIMIT else {}
+        try:
+            listing = gdown.download_folder(id=folder_id, output="", quiet=True, skip_download=True, **options)
+        except FOLDER_LIMIT_ERRORS as e:
+            raise Exception(f"Listage du dossier Google Drive tronqué à {DRIVE_FOLDER_LIMIT} éléments "
+                            f"par gdown {gdown.__version__} (gdown>=6 requis)") from e
+        if listing is None:
+            raise Exception("Impossible de lister le dossier Google Drive")
+        return [RemoteFile(Path(item.path).as_posix(), f"https://drive.google.com/uc?id={item.id}&export=download")
+                for item in listing]
+
+    @staticmethod
+    def listing_may_be_truncated(remote_files: List[RemoteFile], folder_limit: Optional[int] = None) -> bool:
+        """Le listage est vide ou un de ses dossiers atteint la limite de gdown
+
+        Un tel listage ne doit pas servir à supprimer des fichiers du miroir.
+
+        Args:
+            folder_limit: nombre maximal d'éléments listés par dossier (celui
+                de la version installée de gdown par défaut, aucun pour gdown 6)
+        """
+        if folder_limit is None and GDOWN_HAS_FOLDER_LIMIT:
+            folder_limit = DRIVE_FOLDER_LIMIT
+        per_folder = Counter(Path(remote.path).parent for remote in remote_files)
+        if not per_folder:
+            return True
+        return folder_limit is not None and max(per_folder.values()) >= folder_limit
+
+    @staticmethod
+    def download_from_drive(url: str, n_workers: int = 8) -> str:
+        """Met à jour le miroir local du dossier Google Drive et renvoie son chemin
+
+        Seuls les fichiers absents du miroir sont téléchargés. Si le dossier
+        ne peut pas être listé (hors ligne), un miroir complet est réutilisé tel quel.
+        """
         folder_id = DataSource.extract_file_id(url)
         if not folder_id:
             raise ValueError("URL Google Drive invalide")
-            
-        # Créer un dossier temporaire
-        temp_dir = tempfile.mkdtemp()
-        st.info("Téléchargement des données depuis Google Drive...")
-        
+
+        mirror = RemoteMirror(str(MIRROR_DIR / folder_id), n_workers=n_workers)
+        try:
+            remote_files = DataSource.list_drive_folder(folder_id)
+        except Exception as e:
+            if mirror.is_complete():
+                st.warning(f"Google Drive inaccessible ({e}), utilisation du miroir local")
+                return str(mirror.tree)
+            raise Exception(f"Erreur lors du téléchargement: {str(e)}")
+
+        if not all(mirror.is_current(remote.path, remote.url) for remote in remote_files):
+            st.info("Téléchargement des données depuis Google Drive...")
+        # Les fichiers absents d'un listage peut-être incomplet sont gardés dans le miroir
+        prune = not DataSource.listing_may_be_truncated(remote_files)
+        if not prune:
+            st.warning("Listage Google Drive peut-être incomplet : aucun fichier n'est retiré du miroir local")
         try:
-            # Télécharger le dossier
-            gdown.download_folder(
-                id=folder_id,
-                output=temp_dir,
-                quiet=False
-            )
-            return temp_dir
+            tree = mirror.sync(remote_files, prune=prune)
         except Exception as e:
             raise Exception(f"Erreur lors du téléchargement: {str(e)}")
+        st.caption(mirror.report())
+        return str(tree)
     
     @staticmethod
     def get_data_path(path: str) -> str:
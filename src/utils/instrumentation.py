@@ -0,0 +1,269 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss() -> Optional[int]:
+    """Mémoire résidente actuelle du processus en octets (None si inconnue)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # À défaut, le pic de mémoire (en ko sous Linux, en octets sous macOS)
+        unit = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    return None
+
+
+class Span:
+    """Intervalle mesuré : durée, compteurs (éléments, octets...) et mémoire"""
+
+    def __init__(self, name: str, parent: Optional["Span"], counters: Dict):
+        self.name = name
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.counters = dict(counters)
+        self.start = time.perf_counter()
+        self.end = None
+        self.rss_start = current_rss()
+        self.rss_end = None
+        self.memory = {}
+        self.profile = None
+
+    def add(self, **counters):
+        """Ajoute aux compteurs du span (les valeurs s'additionnent)"""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    @property
+    def seconds(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: float) -> Dict:
+        rss_delta = None
+        if self.rss_start is not None and self.rss_end is not None:
+            rss_delta = self.rss_end - self.rss_start
+        return {
+            "name": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "depth": self.depth,
+            "start": round(self.start - origin, 6),
+            "seconds": round(self.seconds, 6),
+            "counters": self.counters,
+            "rss_mb": round(self.rss_end / 1e6, 1) if self.rss_end is not None else None,
+            "rss_delta_mb": round(rss_delta / 1e6, 1) if rss_delta is not None else None,
+            **({"memory": self.memory} if self.memory else {}),
+            **({"profile": self.profile} if self.profile else {})
+        }
+
+
+class _NullSpan:
+    """Span utilisé quand aucune instrumentation n'est active"""
+
+    def add(self, **counters):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    """Collecte des spans imbriqués pendant une exécution du pipeline
+
+    Les spans dont le nom figure dans `profile` sont exécutés sous cProfile
+    (fichier .prof et fonctions les plus coûteuses), ceux de `trace_memory`
+    sous tracemalloc (pic d'allocation Python et principales lignes).
+    """
+
+    def __init__(self, profile: Iterable[str] = (), trace_memory: Iterable[str] = (),
+                 output_dir: Optional[str] = None, top: int = 15):
+        self.profile = set(profile)
+        self.trace_memory = set(trace_memory)
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.top = top
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._profiling = False
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, **counters):
+        """Mesure le bloc ; le span est renvoyé pour y ajouter des compteurs"""
+        stack = self._stack()
+        span = Span(name, stack[-1] if stack else None, counters)
+        self.spans.append(span)
+        stack.append(span)
+
+        # Un seul profileur cProfile peut être actif à la fois
+        profiler = None
+        if self._wants(name, self.profile) and not self._profiling:
+            profiler = cProfile.Profile()
+            self._profiling = True
+        tracing = self._wants(name, self.trace_memory) and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler:
+                profiler.disable()
+                self._profiling = False
+                span.profile = self._profile_summary(name, profiler)
+            if tracing:
+                span.memory = self._memory_summary()
+                tracemalloc.stop()
+            span.end = time.perf_counter()
+            span.rss_end = current_rss()
+            stack.pop()
+
+    def add(self, **counters):
+        """Ajoute des compteurs au span courant"""
+        span = self.current
+        if span is not None:
+            span.add(**counters)
+
+    @staticmethod
+    def _wants(name: str, names: set) -> bool:
+        return "all" in names or name in names or name.split(".")[0] in names
+
+    def _profile_summary(self, name: str, profiler: cProfile.Profile) -> Dict:
+        """Fonctions les plus coûteuses (temps cumulé) et fichier .prof pour snakeviz/pstats"""
+        stats = pstats.Stats(profiler)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({"function": f"{Path(filename).name}:{line}({func})",
+                         "calls": nc, "self_seconds": round(tt, 6), "cumulative_seconds": round(ct, 6)})
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        summary = {"top": rows[:self.top]}
+        if self.output_dir is not None:
+            path = self.output_dir / f"profile_{name}.prof"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(path))
+            summary["file"] = str(path)
+        return summary
+
+    def _memory_summary(self) -> Dict:
+        """Pic d'allocation Python et lignes qui allouent le plus"""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        lines = [
+            {"line": f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+             "size_mb": round(stat.size / 1e6, 3), "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:self.top]
+        ]
+        return {"current_mb": round(current / 1e6, 3), "peak_mb": round(peak / 1e6, 3), "top": lines}
+
+    def summary(self) -> List[Dict]:
+        """Temps total, nombre d'appels et compteurs cumulés par nom de span"""
+        totals = {}
+        for span in self.spans:
+            row = totals.setdefault(span.name, {"name": span.name, "calls": 0, "seconds": 0.0, "counters": {}})
+            row["calls"] += 1
+            row["seconds"] += span.seconds
+            for key, value in span.counters.items():
+                if isinstance(value, (int, float)):
+                    row["counters"][key] = row["counters"].get(key, 0) + value
+        for row in totals.values():
+            row["seconds"] = round(row["seconds"], 6)
+        return sorted(totals.values(), key=lambda row: row["seconds"], reverse=True)
+
+    def to_dict(self) -> Dict:
+        return {
+            "spans": [span.to_dict(self.origin) for span in self.spans],
+            "summary": self.summary()
+        }
+
+    def write_json(self, path: str):
+        """Écrit les spans et le résumé par nom en JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def write_chrome_trace(self, path: str):
+        """Écrit les spans au format Chrome trace (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = dict(span.counters)
+            if span.rss_start is not None and span.rss_end is not None:
+                args["rss_delta_mb"] = round((span.rss_end - span.rss_start) / 1e6, 1)
+            events.append({
+                "name": span.name, "ph": "X", "pid": pid, "tid": 0,
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.seconds * 1e6, 1),
+                "args": args
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+
+
+# Instrumentation active du processus (aucune par défaut : les hooks ne coûtent presque rien)
+_active: Optional[Instrumentation] = None
+
+
+def set_instrumentation(instrumentation: Optional[Instrumentation]):
+    """Active (ou désactive avec None) la collecte des spans"""
+    global _active
+    _active = instrumentation
+
+
+def get_instrumentation() -> Optional[Instrumentation]:
+    return _active
+
+
+@contextmanager
+def span(name: str, **counters):
+    """Span de l'instrumentation active ; sans effet si aucune n'est active"""
+    if _active is None:
+        yield _NULL_SPAN
+    else:
+        with _active.span(name, **counters) as s:
+            yield s
+
+
+def add_counts(**counters):
+    """Ajoute des compteurs au span courant de l'instrumentation active"""
+    if _active is not None:
+        _active.add(**counters)
+
+
+def traced(name: Optional[str] = None):
+    """Décorateur : exécute la fonction dans un span (nom par défaut Classe.méthode)"""
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,237 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+import requests
+from tqdm import tqdm
+
+
+class RemoteFile(NamedTuple):
+    """Fichier d'une source distante : chemin relatif dans le dataset et URL de téléchargement
+
+    `md5` est l'empreinte annoncée par la source quand son listage la donne ;
+    elle sert alors de validateur à la place d'une requête HEAD.
+    """
+    path: str
+    url: str
+    md5: Optional[str] = None
+
+
+# En-têtes HTTP qui identifient une version du contenu d'une URL
+VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Content-Length")
+
+
+def _link_or_copy(source: Path, target: Path):
+    """Lien physique vers l'objet (copie si le système de fichiers ne le permet pas)"""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class RemoteMirror:
+    """Miroir local d'une source distante, adressé par contenu
+
+    Chaque fichier téléchargé est stocké une seule fois dans `objects/` sous
+    son SHA-256 ; `tree/` reproduit l'arborescence du dataset avec des liens
+    vers ces objets et `manifest.json` associe chaque chemin à son URL, sa
+    taille, son empreinte et le validateur du serveur (md5 du listage, ou
+    ETag / Last-Modified / Content-Length d'une requête HEAD) : un fichier
+    remplacé sous la même URL est retéléchargé. Un téléchargement interrompu
+    reprend là où il s'était arrêté (fichier `.part`, requêtes Range et If-Range).
+    """
+
+    VERSION = 2
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, root: str, n_workers: int = 8, timeout: float = 60.0):
+        self.root = Path(root)
+        self.tree = self.root / "tree"
+        self.n_workers = max(1, n_workers)
+        self.timeout = timeout
+        self.stats = {"reused": 0, "downloaded": 0, "resumed": 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.files = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.root / "manifest.json", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != self.VERSION:
+            return {}
+        return manifest["files"]
+
+    def save_manifest(self):
+        """Écrit le manifeste (remplacement atomique du fichier)"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / "manifest.json.tmp"
+        with self._lock:
+            payload = {"version": self.VERSION, "files": dict(self.files)}
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.root / "manifest.json")
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def is_current(self, path: str, url: str, validator: Optional[Dict] = None) -> bool:
+        """Le fichier est dans le manifeste pour cette URL et présent dans l'arborescence
+
+        Args:
+            validator: validateur actuel du serveur (voir validator) ; non vérifié si None
+        """
+        entry = self.files.get(path)
+        if entry is None or entry["url"] != url:
+            return False
+        if validator is not None and entry.get("validator") != validator:
+            return False
+        local = self.tree / path
+        return local.exists() and local.stat().st_size == entry["size"]
+
+    def is_complete(self) -> bool:
+        """Tous les fichiers du manifeste sont présents (utilisable sans accès réseau)"""
+        return bool(self.files) and all(self.is_current(path, entry["url"])
+                                        for path, entry in self.files.items())
+
+    def _session(self) -> requests.Session:
+        # Une session (et ses connexions persistantes) par thread de téléchargement
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def validator(self, remote: RemoteFile) -> Dict:
+        """Version actuelle du fichier distant : md5 du listage, sinon en-têtes d'une requête HEAD"""
+        if remote.md5:
+            return {"md5": remote.md5}
+        with self._session().head(remote.url, allow_redirects=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            return {name: response.headers[name] for name in VALIDATOR_HEADERS if name in response.headers}
+
+    def _fetch(self, remote: RemoteFile, validator: Dict) -> Dict:
+        """Télécharge un fichier dans partial/, en reprenant un fichier .part existant"""
+        partial = self.root / "partial" / (hashlib.sha1(remote.url.encode("utf-8")).hexdigest() + ".part")
+        partial.parent.mkdir(parents=True, exist_ok=True)
+        # Validateur de la version dont le .part contient le début : une autre version n'est pas reprise
+        partial_validator = partial.with_name(partial.name + ".json")
+        offset = 0
+        if partial.exists() and partial_validator.exists():
+            with open(partial_validator, encoding="utf-8") as f:
+                if json.load(f) == validator:
+                    offset = partial.stat().st_size
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # Si le contenu change entre HEAD et GET, le serveur renvoie tout le fichier (200)
+            if_range = validator.get("ETag") or validator.get("Last-Modified")
+            if if_range:
+                headers["If-Range"] = if_range
+        with self._session().get(remote.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # Le fichier partiel est déjà complet (ou plus long que la source) : on recommence
+                partial.unlink()
+                return self._fetch(remote, validator)
+            response.raise_for_status()
+            resumed = offset > 0 and response.status_code == 206
+            if not resumed:
+                with open(partial_validator, "w", encoding="utf-8") as f:
+                    json.dump(validator, f)
+            with open(partial, "ab" if resumed else "wb") as f:
+                for block in response.iter_content(self.CHUNK_SIZE):
+                    f.write(block)
+
+        digest = hashlib.sha256()
+        with open(partial, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+        target = self.object_path(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(partial, target)
+        partial_validator.unlink()
+        _link_or_copy(target, self.tree / remote.path)
+        return {"url": remote.url, "size": target.stat().st_size, "sha256": digest, "validator": validator,
+                "resumed": resumed}
+
+    def sync(self, remote_files: List[RemoteFile], prune: bool = True) -> Path:
+        """Met le miroir à jour et renvoie le dossier de l'arborescence
+
+        Le validateur de chaque fichier est demandé au serveur, puis seuls les
+        fichiers absents, dont l'URL a changé ou dont le contenu a été remplacé
+        sont téléchargés, par au plus n_workers threads. Le manifeste est
+        enregistré même si le téléchargement est interrompu ; les fichiers
+        partiels sont conservés.
+
+        Args:
+            prune: supprime de l'arborescence les fichiers qui ne sont plus dans
+                la source, puis les objets que le manifeste ne référence plus
+        """
+        self.stats = {"reused": 0, "downloaded": 0, "resumed": 0}
+        with ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+            validators = dict(zip((remote.path for remote in remote_files),
+                                  executor.map(self.validator, remote_files)))
+        todo = []
+        for remote in remote_files:
+            validator = validators[remote.path]
+            if self.is_current(remote.path, remote.url, validator):
+                self.stats["reused"] += 1
+                continue
+            entry = self.files.get(remote.path)
+            if entry is not None and entry["url"] == remote.url and entry.get("validator") == validator \
+                    and self.object_path(entry["sha256"]).exists():
+                # Seul le lien de l'arborescence manquait
+                _link_or_copy(self.object_path(entry["sha256"]), self.tree / remote.path)
+                self.stats["reused"] += 1
+                continue
+            todo.append(remote)
+
+        try:
+            if todo:
+                with ThreadPoolExecutor(max_workers=self.n_workers) as executor, \
+                        tqdm(total=len(todo), desc="Téléchargement", unit="fichiers") as pbar:
+                    futures = {executor.submit(self._fetch, remote, validators[remote.path]): remote
+                               for remote in todo}
+                    for future in as_completed(futures):
+                        entry = future.result()
+                        with self._lock:
+                            self.stats["downloaded"] += 1
+                            self.stats["resumed"] += int(entry.pop("resumed"))
+                            self.files[futures[future].path] = entry
+                        pbar.update(1)
+        finally:
+            if todo:
+                self.save_manifest()
+
+        if prune:
+            wanted = {remote.path for remote in remote_files}
+            removed = [path for path in self.files if path not in wanted]
+            for path in removed:
+                (self.tree / path).unlink(missing_ok=True)
+                del self.files[path]
+            if removed:
+                self.save_manifest()
+            self.remove_unused_objects()
+        return self.tree
+
+    def remove_unused_objects(self) -> int:
+        """Supprime les objets qu'aucune entrée du manifeste ne référence (anciennes versions, fichiers retirés)"""
+        used = {entry["sha256"] for entry in self.files.values()}
+        removed = 0
+        for path in (self.root / "objects").glob("*/*"):
+            if path.name not in used:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def report(self) -> str:
+        """Résumé lisible de la dernière synchronisation"""
+        return (f"Miroir: {self.stats['reused']} fichiers réutilisés, "
+                f"{self.stats['downloaded']} téléchargés (dont {self.stats['resumed']} repris)")
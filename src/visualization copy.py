@@ -1,57 +1,35 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from typing import Dict
+from utils.instrumentation import traced
+from visualization import FIGURES, render_figure
 
 class DataVisualizer:
     
-    #initiation des paramètres et des métriques
-    def __init__(self, metrics: Dict[str, pd.DataFrame]):
+    #initiation des paramètres et des métriques ; le rendu passe par le backend Agg de visualization.py
+    def __init__(self, metrics: Dict[str, pd.DataFrame], dpi: int = 300):
         self.metrics = metrics
-        plt.style.use('classic')
-        plt.rcParams['figure.figsize'] = (12, 8)
-        plt.rcParams['axes.grid'] = True
-        plt.rcParams['font.size'] = 10
+        self.dpi = dpi
 
+    def _plot(self, name: str, save_path: str = None):
+        if save_path and all(key in self.metrics for key in FIGURES[name][1]):
+            render_figure(name, self.metrics, save_path, self.dpi)
+
+    @traced()
     def plot_level_difficulty_heatmap(self, save_path: str = None):
         """Crée une heatmap de la difficulté par niveau et monde"""
-        if 'level_metrics' not in self.metrics:
-            return
-            
-        df = self.metrics['level_metrics'].pivot(
-            index='world', 
-            columns='level', 
-            values='difficulty_score'
-        )
-        
-        plt.figure(figsize=(12, 8))
-        sns.heatmap(df, annot=True, cmap='YlOrRd', fmt='.2f')
-        plt.title('Carte de Difficulté par Niveau', pad=20)
-        plt.xlabel('Niveau')
-        plt.ylabel('Monde')
-        
-        if save_path:
-            plt.savefig(save_path, bbox_inches='tight', dpi=300)
-        plt.close()
+        self._plot('difficulty_heatmap', save_path)
 
+    @traced()
     def plot_action_distribution(self, save_path: str = None):
         """Visualise la distribution des actions par niveau de difficulté"""
-        if 'action_metrics' not in self.metrics:
-            return
-            
-        df = self.metrics['action_metrics']
-        
-        plt.figure(figsize=(12, 6))
-        actions = ['jump_freq', 'run_freq', 'right_freq', 'left_freq']
-        df[actions].boxplot()
-        plt.title('Distribution des Actions par Type', pad=20)
-        plt.ylabel('Fréquence')
-        plt.xticks(rotation=45)
-        
-        if save_path:
-            plt.savefig(save_path, bbox_inches='tight', dpi=300)
-        plt.close()
+        self._plot('action_distribution', save_path)
+
+    @traced()
+    def plot_death_heatmap(self, save_path: str = None):
+        """Densité des positions de mort le long de chacun des 32 niveaux"""
+        self._plot('death_heatmap', save_path)
 
+    @traced()
     def generate_summary_report(self) -> pd.DataFrame:
         """Génère un rapport récapitulatif des métriques"""
         summary_data = {}
@@ -1,51 +1,234 @@
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+import os
+import json
+import hashlib
+import matplotlib.style
 import seaborn as sns
-from typing import Dict
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.instrumentation import traced
+
+# Style appliqué le temps de construire et d'enregistrer une figure, sans toucher aux rcParams globaux
+STYLE = ['classic', {'figure.figsize': (12, 8), 'axes.grid': True, 'font.size': 10}]
+FORMATS = ('png', 'svg', 'webp')
+# À incrémenter quand le rendu d'une figure change, pour invalider les fichiers déjà produits
+RENDER_VERSION = 1
+
+
+def build_difficulty_heatmap(metrics: Dict[str, pd.DataFrame]) -> Figure:
+    """Heatmap de la difficulté par niveau et monde"""
+    df = metrics['level_metrics'].pivot(
+        index='world', 
+        columns='level', 
+        values='difficulty_score'
+    )
+    
+    fig = Figure(figsize=(12, 8), layout='tight')
+    ax = fig.add_subplot()
+    sns.heatmap(df, annot=True, cmap='YlOrRd', fmt='.2f', ax=ax)
+    ax.set_title('Carte de Difficulté par Niveau', pad=20)
+    ax.set_xlabel('Niveau')
+    ax.set_ylabel('Monde')
+    return fig
+
+
+def build_action_distribution(metrics: Dict[str, pd.DataFrame]) -> Figure:
+    """Distribution des actions par type"""
+    df = metrics['action_metrics']
+    
+    fig = Figure(figsize=(12, 6), layout='tight')
+    ax = fig.add_subplot()
+    actions = ['jump_freq', 'run_freq', 'right_freq', 'left_freq']
+    df[actions].boxplot(ax=ax)
+    ax.set_title('Distribution des Actions par Type', pad=20)
+    ax.set_ylabel('Fréquence')
+    ax.tick_params(axis='x', labelrotation=45)
+    return fig
+
+
+def build_death_heatmap(metrics: Dict[str, pd.DataFrame]) -> Figure:
+    """Densité des positions de mort le long de chacun des 32 niveaux"""
+    df = metrics['death_bins']
+    counts = df.pivot_table(index=['world', 'level'], columns='x_start',
+                            values='deaths', aggfunc='sum', fill_value=0)
+    # Densité par niveau : chaque bande est normalisée par son nombre de morts
+    totals = counts.sum(axis=1).to_numpy()
+    density = counts.to_numpy() / np.maximum(totals, 1)[:, None]
+    bin_width = counts.columns[1] - counts.columns[0] if len(counts.columns) > 1 else 1
+    labels = [f"{world}-{level} ({total})" for (world, level), total in zip(counts.index, totals)]
+
+    fig = Figure(figsize=(14, 10), layout='tight')
+    ax = fig.add_subplot()
+    image = ax.imshow(density, aspect='auto', cmap='magma', interpolation='nearest',
+                      extent=(0, len(counts.columns) * bin_width, len(counts), 0))
+    ax.set_yticks(np.arange(len(counts)) + 0.5)
+    ax.set_yticklabels(labels, fontsize=7)
+    ax.grid(False)
+    fig.colorbar(image, ax=ax, label='Part des morts du niveau')
+    ax.set_title('Positions des morts par niveau', pad=20)
+    ax.set_xlabel('Position x (pixels)')
+    ax.set_ylabel('Niveau (nombre de morts)')
+    return fig
+
+
+# Figure -> (fonction de construction, colonnes tracées de chaque métrique nécessaire)
+FIGURES = {
+    'difficulty_heatmap': (build_difficulty_heatmap,
+                           {'level_metrics': ['world', 'level', 'difficulty_score']}),
+    'action_distribution': (build_action_distribution,
+                            {'action_metrics': ['jump_freq', 'run_freq', 'right_freq', 'left_freq']}),
+    'death_heatmap': (build_death_heatmap, {'death_bins': ['world', 'level', 'x_start', 'deaths']}),
+}
+
+
+def build_figure(name: str, metrics: Dict[str, pd.DataFrame]) -> Figure:
+    """Construit une figure (sans pyplot) avec le style du projet"""
+    with matplotlib.style.context(STYLE):
+        return FIGURES[name][0](metrics)
+
+
+def render_figure(name: str, metrics: Dict[str, pd.DataFrame], save_path: str, dpi: int = 300) -> str:
+    """Construit et enregistre une figure avec le canevas Agg ; le format suit l'extension
+
+    Fonction de module pour pouvoir être exécutée dans un processus de travail.
+    """
+    with matplotlib.style.context(STYLE):
+        fig = FIGURES[name][0](metrics)
+        fig.savefig(save_path, dpi=dpi)
+    return save_path
+
+
+def figure_inputs(name: str, metrics: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Colonnes tracées par une figure, seules envoyées aux processus de rendu"""
+    return {key: metrics[key][columns] for key, columns in FIGURES[name][1].items()}
+
+
+def metrics_hash(name: str, metrics: Dict[str, pd.DataFrame], dpi: int, fmt: str) -> str:
+    """Empreinte des colonnes tracées par une figure et des paramètres de rendu
+
+    Une colonne ajoutée aux métriques (intervalle de confiance, catégorie...)
+    ne change donc pas l'empreinte des figures qui ne la tracent pas.
+    """
+    digest = hashlib.sha1(f"{name}:{RENDER_VERSION}:{dpi}:{fmt}".encode())
+    for key, df in figure_inputs(name, metrics).items():
+        digest.update(f"{key}:{','.join(map(str, df.columns))}".encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
 
 class DataVisualizer:
-    def __init__(self, metrics: Dict[str, pd.DataFrame]):
+    RENDER_INDEX = ".render_index.json"
+
+    def __init__(self, metrics: Dict[str, pd.DataFrame], dpi: int = 300, fmt: str = 'png'):
+        if fmt not in FORMATS:
+            raise ValueError(f"Format d'image non supporté: {fmt} (formats: {', '.join(FORMATS)})")
         self.metrics = metrics
-        plt.style.use('classic')
-        plt.rcParams['figure.figsize'] = (12, 8)
-        plt.rcParams['axes.grid'] = True
-        plt.rcParams['font.size'] = 10
+        self.dpi = dpi
+        self.fmt = fmt
 
+    def available_figures(self) -> List[str]:
+        """Figures dont toutes les colonnes tracées sont disponibles"""
+        return [
+            name for name, (_, inputs) in FIGURES.items()
+            if all(key in self.metrics and set(columns) <= set(self.metrics[key].columns)
+                   for key, columns in inputs.items())
+        ]
+
+    def _figure(self, name: str) -> Optional[Figure]:
+        if name not in self.available_figures():
+            return None
+        return build_figure(name, self.metrics)
+
+    def _plot(self, name: str, save_path: str = None):
+        if save_path and name in self.available_figures():
+            render_figure(name, figure_inputs(name, self.metrics), save_path, self.dpi)
+
+    @traced()
     def get_difficulty_heatmap(self):
         """Crée une heatmap de la difficulté par niveau et monde"""
-        if 'level_metrics' not in self.metrics:
-            return None
-            
-        df = self.metrics['level_metrics'].pivot(
-            index='world', 
-            columns='level', 
-            values='difficulty_score'
-        )
-        
-        fig, ax = plt.subplots(figsize=(12, 8))
-        sns.heatmap(df, annot=True, cmap='YlOrRd', fmt='.2f', ax=ax)
-        plt.title('Carte de Difficulté par Niveau', pad=20)
-        plt.xlabel('Niveau')
-        plt.ylabel('Monde')
-        
-        return fig
+        return self._figure('difficulty_heatmap')
 
+    @traced()
     def get_action_distribution(self):
         """Visualise la distribution des actions par niveau de difficulté"""
-        if 'action_metrics' not in self.metrics:
-            return None
-            
-        df = self.metrics['action_metrics']
-        
-        fig, ax = plt.subplots(figsize=(12, 6))
-        actions = ['jump_freq', 'run_freq', 'right_freq', 'left_freq']
-        df[actions].boxplot(ax=ax)
-        plt.title('Distribution des Actions par Type', pad=20)
-        plt.ylabel('Fréquence')
-        plt.xticks(rotation=45)
-        
-        return fig
+        return self._figure('action_distribution')
+
+    @traced()
+    def get_death_heatmap(self):
+        """Densité des positions de mort le long de chacun des 32 niveaux"""
+        return self._figure('death_heatmap')
+
+    @traced()
+    def plot_level_difficulty_heatmap(self, save_path: str = None):
+        """Enregistre la heatmap de difficulté (format selon l'extension)"""
+        self._plot('difficulty_heatmap', save_path)
+
+    @traced()
+    def plot_action_distribution(self, save_path: str = None):
+        """Enregistre la distribution des actions"""
+        self._plot('action_distribution', save_path)
+
+    @traced()
+    def plot_death_heatmap(self, save_path: str = None):
+        """Enregistre les bandes de densité des positions de mort"""
+        self._plot('death_heatmap', save_path)
+
+    @traced()
+    def render_all(self, output_dir: str, names: Optional[List[str]] = None,
+                   n_workers: int = 1, force: bool = False) -> Dict[str, Dict]:
+        """Enregistre les figures dans output_dir, en parallèle si n_workers > 1
+
+        Une figure n'est pas re-rendue si l'empreinte de ses métriques et des
+        paramètres de rendu (dpi, format) n'a pas changé depuis le dernier
+        rendu et que le fichier existe toujours.
+
+        Returns:
+            figure -> {"path": fichier, "rendered": False si le fichier a été réutilisé}
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        index_path = output_dir / self.RENDER_INDEX
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+        available = self.available_figures()
+        names = [name for name in (names or available) if name in available]
+        results, todo = {}, []
+        for name in names:
+            path = output_dir / f"{name}.{self.fmt}"
+            digest = metrics_hash(name, self.metrics, self.dpi, self.fmt)
+            unchanged = index.get(path.name) == digest and path.exists()
+            results[name] = {"path": str(path), "rendered": force or not unchanged}
+            if force or not unchanged:
+                todo.append((name, path, digest))
+
+        if n_workers > 1 and len(todo) > 1:
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(todo))) as executor:
+                futures = [executor.submit(render_figure, name, figure_inputs(name, self.metrics),
+                                           str(path), self.dpi)
+                           for name, path, _ in todo]
+                for future in futures:
+                    future.result()
+        else:
+            for name, path, _ in todo:
+                render_figure(name, figure_inputs(name, self.metrics), str(path), self.dpi)
+
+        # L'empreinte n'est enregistrée qu'une fois le fichier écrit
+        for name, path, digest in todo:
+            index[path.name] = digest
+        tmp_path = index_path.with_name(index_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, index_path)
+        return results
 
+    @traced()
     def generate_summary_report(self) -> pd.DataFrame:
         """Génère un rapport récapitulatif des métriques"""
         summary_data = {}
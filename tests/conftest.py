@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+# Les modules du projet sont importés depuis src/, comme le fait main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import pytest
+
+
+@pytest.fixture
+def synthetic_data(tmp_path):
+    """Petit dataset au format smbdataset (4 épisodes de quelques frames)"""
+    pytest.importorskip("PIL")
+    from benchmarks.synthetic_dataset import generate_dataset
+
+    return Path(generate_dataset(str(tmp_path / "data"), n_episodes=4, frames_per_episode=6,
+                                 frame_size=(32, 30))["root"])
+
+
+class _FileServer:
+    """Serveur HTTP local qui sert des fichiers en mémoire (ETag, requêtes HEAD, Range et If-Range)"""
+
+    def __init__(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.files = {}
+        # Chemins dont la prochaine réponse est coupée à mi-fichier
+        self.interrupt = set()
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                server.requests.append(("HEAD", self.path, None))
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("ETag", server.etag(self.path))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+
+            def do_GET(self):
+                range_header = self.headers.get("Range")
+                server.requests.append(("GET", self.path, range_header))
+                data = server.files.get(self.path)
+                if data is None:
+                    self.send_error(404)
+                    return
+                if self.headers.get("If-Range", server.etag(self.path)) != server.etag(self.path):
+                    # Contenu modifié depuis le début du fichier partiel : réponse complète
+                    range_header = None
+                start = int(range_header[len("bytes="):].rstrip("-")) if range_header else 0
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(data)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = data[start:]
+                self.send_response(206 if range_header else 200)
+                self.send_header("ETag", server.etag(self.path))
+                if range_header:
+                    self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.path in server.interrupt:
+                    server.interrupt.discard(self.path)
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+
+    def etag(self, path: str) -> str:
+        import hashlib
+
+        return '"' + hashlib.md5(self.files[path]).hexdigest() + '"'
+
+    def gets(self):
+        """Requêtes GET reçues : (chemin, en-tête Range)"""
+        return [(path, range_header) for method, path, range_header in self.requests if method == "GET"]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}{path}"
+
+
+@pytest.fixture
+def file_server():
+    import threading
+
+    server = _FileServer()
+    thread = threading.Thread(target=server.httpd.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
@@ -0,0 +1,118 @@
+"""Segments, n-grammes et transitions comparés à un calcul naïf épisode par épisode"""
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from action_sequences import ActionSequences, EPISODE_KEYS, N_ACTIONS
+
+
+def random_frames(seed=0, n_episodes=30, max_frames=25, n_codes=4):
+    """Table de frames mélangée ; peu de codes d'action pour avoir des répétitions et des ex-aequo"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for e in range(n_episodes):
+        user, session, episode = f"player_{e % 5}", f"session_{e % 3}", e
+        world, level = int(rng.integers(1, 3)), int(rng.integers(1, 3))
+        frames = rng.choice(1000, rng.integers(1, max_frames), replace=False)
+        codes = rng.choice([0, 7, 128, 255][:n_codes], len(frames))
+        rows += [(user, session, episode, world, level, int(f), int(c)) for f, c in zip(frames, codes)]
+    frames = pd.DataFrame(rows, columns=EPISODE_KEYS + ['world', 'level', 'frame', 'action'])
+    return frames.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def episode_sequences(frames):
+    """(clés de l'épisode, attributs, frames triées, actions dans l'ordre des frames) par épisode"""
+    for key, episode in frames.sort_values('frame').groupby(EPISODE_KEYS, sort=True):
+        yield key, episode.iloc[0], episode['frame'].tolist(), episode['action'].tolist()
+
+
+def naive_top_ngrams(frames, n, k, by):
+    counters = {}
+    for _, first, _, actions in episode_sequences(frames):
+        group = tuple(first[column] for column in by)
+        counter = counters.setdefault(group, Counter())
+        counter.update(tuple(actions[i:i + n]) for i in range(len(actions) - n + 1))
+    rows = []
+    for group, counter in counters.items():
+        total = sum(counter.values())
+        ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:k]
+        for rank, (ngram, count) in enumerate(ranked, 1):
+            rows.append(group + (rank, '-'.join(map(str, ngram)), count, count / total))
+    return pd.DataFrame(rows, columns=list(by) + ['rank', 'ngram', 'count', 'share'])
+
+
+def sort_table(table, columns):
+    return table.sort_values(columns).reset_index(drop=True)
+
+
+def test_runs_match_naive_segments():
+    frames = random_frames()
+    sequences = ActionSequences.from_frames(frames)
+    expected = []
+    for episode_id, (_, first, frame_numbers, actions) in enumerate(episode_sequences(frames)):
+        for i, action in enumerate(actions):
+            if i == 0 or action != actions[i - 1]:
+                expected.append([episode_id, first['world'], first['level'], frame_numbers[i], action, 0])
+            expected[-1][-1] += 1
+    expected = pd.DataFrame(expected, columns=['episode_id', 'world', 'level', 'start_frame', 'action', 'length'])
+
+    runs = sequences.runs()
+    assert runs['length'].sum() == len(frames)
+    pd.testing.assert_frame_equal(runs, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("n, by", [(1, ['world', 'level']), (3, ['world', 'level']), (3, ['user']),
+                                   (4, []), (6, EPISODE_KEYS)])
+def test_top_ngrams_match_naive_counts(n, by):
+    frames = random_frames()
+    top = ActionSequences.from_frames(frames).top_ngrams(n=n, k=3, by=by)
+    expected = naive_top_ngrams(frames, n, 3, by)
+    columns = list(by) + ['rank']
+    pd.testing.assert_frame_equal(sort_table(top, columns), sort_table(expected, columns), check_dtype=False)
+
+
+def test_top_ngrams_with_many_groups_and_long_ngrams():
+    # 40 000 groupes × 256 ** 6 dépasse un int64 : la clé (groupe, n-gramme) ne doit pas déborder
+    n_episodes, length = 40000, 7
+    rng = np.random.default_rng(1)
+    frames = pd.DataFrame({
+        'user': np.repeat(np.arange(n_episodes), length),
+        'session_id': 0,
+        'episode': 0,
+        'frame': np.tile(np.arange(length), n_episodes),
+        'action': rng.choice([1, 200, 255], n_episodes * length)
+    })
+    top = ActionSequences.from_frames(frames).top_ngrams(n=6, k=1, by=['user'])
+
+    actions = frames['action'].to_numpy().reshape(n_episodes, length)
+    assert top['user'].tolist() == list(range(n_episodes))
+    assert (top['count'] >= 1).all() and np.allclose(top['share'], top['count'] / 2)
+    for user in rng.choice(n_episodes, 50, replace=False):
+        counter = Counter(tuple(actions[user, i:i + 6]) for i in range(length - 5))
+        ngram, count = sorted(counter.items(), key=lambda item: (-item[1], item[0]))[0]
+        row = top.iloc[user]
+        assert row['ngram'] == '-'.join(map(str, ngram)) and row['count'] == count
+
+
+@pytest.mark.parametrize("by", [None, ['world'], ['user', 'session_id']])
+def test_transition_matrix_matches_naive_counts(by):
+    frames = random_frames()
+    counts, group_keys = ActionSequences.from_frames(frames).transition_matrix(by)
+
+    expected = {}
+    for _, first, _, actions in episode_sequences(frames):
+        group = tuple(first[column] for column in by or [])
+        expected.setdefault(group, Counter()).update(zip(actions[:-1], actions[1:]))
+    groups = [tuple(row) for row in group_keys.itertuples(index=False)] if by else [()]
+    assert sorted(groups) == sorted(expected)
+    for g, group in enumerate(groups):
+        matrix = np.zeros((N_ACTIONS, N_ACTIONS), dtype=np.int64)
+        for (a, b), count in expected[group].items():
+            matrix[a, b] = count
+        np.testing.assert_array_equal(counts[g], matrix)
+
+    probabilities, _ = ActionSequences.from_frames(frames).transition_matrix(by, normalize=True)
+    rows = counts.sum(axis=2)
+    np.testing.assert_allclose(probabilities.sum(axis=2), (rows > 0).astype(float))
@@ -0,0 +1,56 @@
+"""decode_buttons doit donner les mêmes boutons que process_button_inputs"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_preprocessor import BUTTON_MASKS, DataPreprocessor, decode_buttons
+
+CODES = np.arange(256)
+
+
+def reference(codes):
+    """Colonnes booléennes construites code par code avec l'implémentation de référence"""
+    preprocessor = DataPreprocessor()
+    rows = [preprocessor.process_button_inputs(int(code)) for code in codes]
+    return {button: np.array([row[button] for row in rows], dtype=bool) for button in BUTTON_MASKS}
+
+
+def test_all_codes():
+    decoded = decode_buttons(CODES)
+    expected = reference(CODES)
+    assert list(decoded) == list(expected)
+    for button in BUTTON_MASKS:
+        assert decoded[button].dtype == bool
+        np.testing.assert_array_equal(decoded[button], expected[button], err_msg=button)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, np.int64])
+def test_column_dtypes(dtype):
+    """Colonne action de la table typée (uint8) ou d'un ancien cache (entiers plus larges)"""
+    codes = pd.Series(np.random.default_rng(0).permutation(CODES).astype(dtype))
+    decoded = decode_buttons(codes)
+    expected = reference(codes)
+    for button in BUTTON_MASKS:
+        np.testing.assert_array_equal(decoded[button], expected[button], err_msg=button)
+
+
+def test_button_subset():
+    decoded = decode_buttons(CODES, ['right', 'A'])
+    expected = reference(CODES)
+    assert list(decoded) == ['right', 'A']
+    for button in decoded:
+        np.testing.assert_array_equal(decoded[button], expected[button])
+
+
+def test_out_of_range_codes():
+    """Codes hors de 0..255 : décodage par masques, comme process_button_inputs"""
+    codes = np.array([-1, 256, 257, 511, 1000])
+    decoded = decode_buttons(codes)
+    expected = reference(codes)
+    for button in BUTTON_MASKS:
+        np.testing.assert_array_equal(decoded[button], expected[button], err_msg=button)
+
+
+def test_empty():
+    decoded = decode_buttons(np.array([], dtype=np.uint8))
+    assert all(len(bits) == 0 for bits in decoded.values())
@@ -0,0 +1,48 @@
+"""Cycle de vie du fichier RAM temporaire de DataLoader"""
+import os
+
+from data_loader import DataLoader
+
+
+def test_close_removes_temporary_ram(synthetic_data):
+    loader = DataLoader(str(synthetic_data))
+    raw_data = loader.load_data()
+    ram_path = loader.ram_store.path
+    assert os.path.exists(ram_path)
+    assert len(loader.ram_store) == len(raw_data["frames"])
+
+    loader.close()
+    assert loader.ram_store is None
+    assert not os.path.exists(os.path.dirname(ram_path))
+
+
+def test_reload_replaces_temporary_ram(synthetic_data):
+    with DataLoader(str(synthetic_data)) as loader:
+        loader.load_data()
+        first = os.path.dirname(loader.ram_store.path)
+        loader.load_data()
+        second = os.path.dirname(loader.ram_store.path)
+        assert first != second
+        assert not os.path.exists(first)
+    assert not os.path.exists(second)
+
+
+def test_explicit_ram_path_is_kept(synthetic_data, tmp_path):
+    ram_path = tmp_path / "ram.u8"
+    with DataLoader(str(synthetic_data), ram_path=str(ram_path)) as loader:
+        loader.load_data()
+    assert ram_path.exists()
+
+
+def test_streaming_without_ram(synthetic_data):
+    loader = DataLoader(str(synthetic_data))
+    batches = list(loader.iter_episodes(store_ram=False))
+    assert len(batches) == 4
+    assert loader.ram_store is None and loader._ram_dir is None
+    assert all("ram_index" not in batch["frames"].columns for batch in batches)
+
+    with_ram = list(loader.iter_episodes())
+    frames = [batch["frames"].drop(columns="ram_index") for batch in with_ram]
+    for batch, expected in zip(batches, frames):
+        assert batch["frames"].equals(expected)
+    loader.close()
@@ -0,0 +1,94 @@
+"""Listage Google Drive (gdown simulé) et synchronisation du miroir sans suppression abusive"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("gdown")
+pytest.importorskip("streamlit")
+
+from utils import data_source
+from utils.data_source import DataSource, RemoteFile
+
+FOLDER_ID = "1AbC"
+
+
+def drive_item(path, file_id):
+    return SimpleNamespace(id=file_id, path=path, local_path=path)
+
+
+def test_list_without_folder_limit(monkeypatch):
+    calls = []
+
+    def download_folder(id, output, quiet, skip_download):
+        calls.append(id)
+        return [drive_item("ep_1/frame_0.png", "f0"), drive_item("ep_1/frame_1.png", "f1")]
+
+    monkeypatch.setattr(data_source.gdown, "download_folder", download_folder)
+    monkeypatch.setattr(data_source, "GDOWN_HAS_FOLDER_LIMIT", False)
+    files = DataSource.list_drive_folder(FOLDER_ID)
+    assert calls == [FOLDER_ID]
+    assert files == [
+        RemoteFile("ep_1/frame_0.png", "https://drive.google.com/uc?id=f0&export=download"),
+        RemoteFile("ep_1/frame_1.png", "https://drive.google.com/uc?id=f1&export=download"),
+    ]
+
+
+def test_truncated_listing_raises(monkeypatch):
+    """gdown 5.x : remaining_ok=False, et l'erreur de limite devient une erreur explicite"""
+    class FolderContentsMaximumLimitError(Exception):
+        pass
+
+    options = {}
+
+    def download_folder(id, output, quiet, skip_download, remaining_ok=True):
+        options["remaining_ok"] = remaining_ok
+        raise FolderContentsMaximumLimitError("50 files")
+
+    monkeypatch.setattr(data_source.gdown, "download_folder", download_folder)
+    monkeypatch.setattr(data_source, "GDOWN_HAS_FOLDER_LIMIT", True)
+    monkeypatch.setattr(data_source, "FOLDER_LIMIT_ERRORS", (FolderContentsMaximumLimitError,))
+    with pytest.raises(Exception, match="tronqué"):
+        DataSource.list_drive_folder(FOLDER_ID)
+    assert options == {"remaining_ok": False}
+
+
+def test_listing_may_be_truncated(monkeypatch):
+    files = [RemoteFile(f"ep_1/frame_{i}.png", f"u{i}") for i in range(50)]
+    assert DataSource.listing_may_be_truncated([])
+    assert DataSource.listing_may_be_truncated(files, folder_limit=50)
+    assert not DataSource.listing_may_be_truncated(files[:49], folder_limit=50)
+
+    # La limite par défaut est celle de la version installée de gdown
+    monkeypatch.setattr(data_source, "GDOWN_HAS_FOLDER_LIMIT", False)
+    assert not DataSource.listing_may_be_truncated(files)
+    monkeypatch.setattr(data_source, "GDOWN_HAS_FOLDER_LIMIT", True)
+    assert DataSource.listing_may_be_truncated(files)
+
+
+def serve(server, names):
+    for name in names:
+        server.files["/" + name] = name.encode() * 100
+    return [RemoteFile(name, server.url("/" + name)) for name in names]
+
+
+def test_download_keeps_files_of_incomplete_listing(monkeypatch, tmp_path, file_server):
+    monkeypatch.setattr(data_source, "MIRROR_DIR", tmp_path / "mirrors")
+    monkeypatch.setattr(data_source, "GDOWN_HAS_FOLDER_LIMIT", True)
+    url = f"https://drive.google.com/drive/folders/{FOLDER_ID}?usp=sharing"
+    names = [f"ep_1/frame_{i}.png" for i in range(data_source.DRIVE_FOLDER_LIMIT)]
+
+    listing = serve(file_server, names + ["ep_2/frame_0.png"])
+    monkeypatch.setattr(DataSource, "list_drive_folder", staticmethod(lambda folder_id: listing))
+    tree = tmp_path / "mirrors" / FOLDER_ID / "tree"
+    assert DataSource.download_from_drive(url, n_workers=4) == str(tree)
+    assert len(list(tree.rglob("*.png"))) == 51
+
+    # Dossier de 50 fichiers (peut-être tronqué) : ep_2 n'est pas supprimé du miroir
+    listing = listing[:-1]
+    DataSource.download_from_drive(url)
+    assert (tree / "ep_2/frame_0.png").exists()
+
+    # Listage complet : le fichier disparu de la source est retiré
+    listing = serve(file_server, names[:10])
+    DataSource.download_from_drive(url)
+    assert sorted(p.name for p in tree.rglob("*.png")) == sorted(name.split("/")[1] for name in names[:10])
@@ -0,0 +1,47 @@
+"""Sources de frames : interface abstraite et archives lues comme le dossier d'origine"""
+import pickle
+import shutil
+import tarfile
+
+import pandas as pd
+import pytest
+
+from data_loader import DataLoader
+from frame_source import FrameSource, LocalSource, TarSource, ZipSource, _ArchiveSource
+
+
+def test_incomplete_sources_fail_at_creation(tmp_path):
+    class ScanOnly(FrameSource):
+        def scan(self):
+            return None
+
+    class NoMembers(_ArchiveSource):
+        def open(self, path):
+            return None
+
+    with pytest.raises(TypeError):
+        FrameSource(str(tmp_path))
+    with pytest.raises(TypeError):
+        ScanOnly(str(tmp_path))
+    with pytest.raises(TypeError):
+        NoMembers(str(tmp_path / "data.zip"))
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_matches_folder(synthetic_data, tmp_path, kind):
+    if kind == "zip":
+        archive = shutil.make_archive(str(tmp_path / "data-smb"), "zip", synthetic_data.parent, synthetic_data.name)
+        source = ZipSource(archive)
+    else:
+        archive = tmp_path / "data-smb.tar"
+        with tarfile.open(archive, "w") as tar:
+            tar.add(synthetic_data, arcname=synthetic_data.name)
+        source = TarSource(str(archive))
+
+    with DataLoader(LocalSource(str(synthetic_data))) as loader:
+        expected = loader.load_data()
+    # La source est envoyée aux processus de lecture : elle doit rester picklable
+    with DataLoader(pickle.loads(pickle.dumps(source))) as loader:
+        raw_data = loader.load_data()
+    for key in ("episodes", "frames"):
+        pd.testing.assert_frame_equal(raw_data[key], expected[key], obj=key)
@@ -0,0 +1,78 @@
+"""L'analyse incrémentale doit donner les tables d'une analyse complète du dataset courant"""
+import shutil
+
+import pandas as pd
+import pytest
+
+from data_loader import DataLoader
+from data_preprocessor import DataPreprocessor
+from difficulty_analyzer import DifficultyAnalyzer
+from incremental_analysis import IncrementalAnalysis
+
+
+def full_analysis(data_path):
+    preprocessor, analyzer = DataPreprocessor(), DifficultyAnalyzer()
+    for batch in DataLoader(str(data_path)).iter_episodes(store_ram=False):
+        analyzer.update(preprocessor.update(batch))
+    return {
+        "episode_stats": preprocessor.finalize_episode_stats(),
+        "level_metrics": analyzer.finalize_level_metrics(),
+        "action_metrics": analyzer.finalize_player_actions(),
+        "skill_counts": analyzer.finalize_skill_counts()
+    }
+
+
+def run(data_path, state_path):
+    analysis = IncrementalAnalysis(str(data_path), str(state_path))
+    return analysis, analysis.run()
+
+
+def assert_same_results(results, expected):
+    for name, table in expected.items():
+        pd.testing.assert_frame_equal(results[name], table, obj=name)
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return tmp_path / "results" / "analysis_state.json"
+
+
+def test_rerun_reads_nothing(synthetic_data, state_path):
+    _, first = run(synthetic_data, state_path)
+    analysis, second = run(synthetic_data, state_path)
+    assert analysis.new_folders == [] and analysis.removed_folders == []
+    assert_same_results(second, first)
+    assert_same_results(second, full_analysis(synthetic_data))
+
+
+def test_vanished_folder_is_removed(synthetic_data, state_path):
+    run(synthetic_data, state_path)
+    removed = sorted(synthetic_data.iterdir())[0]
+    shutil.rmtree(removed)
+
+    analysis, results = run(synthetic_data, state_path)
+    assert analysis.removed_folders == [removed.name]
+    assert analysis.new_folders == []
+    assert_same_results(results, full_analysis(synthetic_data))
+
+
+def test_modified_folder_is_reread(synthetic_data, state_path):
+    run(synthetic_data, state_path)
+    folder = sorted(synthetic_data.iterdir())[1]
+    sorted(folder.iterdir())[-1].unlink()
+
+    analysis, results = run(synthetic_data, state_path)
+    assert analysis.removed_folders == [folder.name]
+    assert [f.name for f in analysis.new_folders] == [folder.name]
+    assert_same_results(results, full_analysis(synthetic_data))
+
+
+def test_other_dataset_resets_state(synthetic_data, state_path, tmp_path):
+    run(synthetic_data, state_path)
+    other = tmp_path / "other"
+    shutil.copytree(synthetic_data, other)
+    shutil.rmtree(sorted(other.iterdir())[0])
+
+    analysis, results = run(other, state_path)
+    assert len(analysis.new_folders) == 3
+    assert_same_results(results, full_analysis(other))
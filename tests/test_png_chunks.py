@@ -0,0 +1,115 @@
+"""Le lecteur de chunks PNG de data_loader doit donner le même résultat que PIL"""
+import struct
+import zlib
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from data_loader import DataLoader, PNG_TEXT_KEYS, read_png_text_chunks
+
+WIDTH, HEIGHT = 40, 30
+# (type de couleur PNG, octets par pixel)
+COLOR_TYPES = {"palette": (3, 1), "gray": (0, 1), "rgb": (2, 3), "rgba": (6, 4)}
+RAM = "".join(f"{i % 256:02x}" for i in range(2048))
+
+
+def _chunk(cid: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + cid + data + struct.pack(">I", zlib.crc32(cid + data) & 0xFFFFFFFF)
+
+
+def _text_chunks(style: str):
+    """Chunks RAM/BP1/OUTCOME écrits en tEXt, zTXt ou iTXt (compressé ou non)"""
+    values = {"RAM": RAM, "BP1": "132", "OUTCOME": "1", "Comment": "synthétique"}
+    chunks = []
+    for key, value in values.items():
+        k = key.encode("latin-1")
+        if style == "tEXt" and value.isascii():
+            chunks.append(_chunk(b"tEXt", k + b"\0" + value.encode("latin-1")))
+        elif style == "zTXt" and value.isascii():
+            chunks.append(_chunk(b"zTXt", k + b"\0\0" + zlib.compress(value.encode("latin-1"))))
+        else:
+            compressed = style == "iTXt-z"
+            text = zlib.compress(value.encode("utf-8")) if compressed else value.encode("utf-8")
+            chunks.append(_chunk(b"iTXt", k + b"\0" + bytes([int(compressed), 0]) + b"fr\0\0" + text))
+    return chunks
+
+
+def write_png(path, color: str, style: str, n_idat: int = 3):
+    """PNG écrit à la main : un filtre différent par ligne (0 à 4), plusieurs IDAT,
+    chunks texte avant le premier IDAT et un chunk texte après les données"""
+    color_type, bpp = COLOR_TYPES[color]
+    rows = []
+    for y in range(HEIGHT):
+        rows.append(bytes([y % 5]) + bytes((x * 7 + y * 13) % 256 for x in range(WIDTH * bpp)))
+    data = zlib.compress(b"".join(rows))
+    size = -(-len(data) // n_idat)
+
+    png = b"\x89PNG\r\n\x1a\n" + _chunk(b"IHDR", struct.pack(">IIBBBBB", WIDTH, HEIGHT, 8, color_type, 0, 0, 0))
+    if color == "palette":
+        png += _chunk(b"PLTE", bytes(range(256)) * 3)
+    png += b"".join(_text_chunks(style))
+    png += b"".join(_chunk(b"IDAT", data[i:i + size]) for i in range(0, len(data), size))
+    png += _chunk(b"tEXt", b"BP1\x00999")
+    png += _chunk(b"IEND", b"")
+    path.write_bytes(png)
+    return path
+
+
+def pil_metadata(path):
+    """Implémentation d'origine de DataLoader.extract_png_metadata (PIL)"""
+    try:
+        with Image.open(path) as img:
+            metadata = img.info
+            return {
+                "ram_data": metadata.get("RAM", b""),
+                "player_input": int(metadata.get("BP1", 0)),
+                "outcome_code": int(metadata.get("OUTCOME", 0))
+            }
+    except Exception:
+        return {"ram_data": b"", "player_input": 0, "outcome_code": 0}
+
+
+@pytest.mark.parametrize("style", ["tEXt", "zTXt", "iTXt", "iTXt-z"])
+@pytest.mark.parametrize("color", list(COLOR_TYPES))
+def test_matches_pil(tmp_path, color, style):
+    path = write_png(tmp_path / f"{color}_{style}.png", color, style)
+    with Image.open(path) as img:
+        img.load()  # le fichier est un PNG valide pour PIL (filtres, IDAT multiples)
+    with Image.open(path) as img:
+        expected = {key: img.info[key] for key in PNG_TEXT_KEYS if key in img.info}
+
+    with open(path, "rb") as fp:
+        assert read_png_text_chunks(fp, PNG_TEXT_KEYS) == expected
+
+    metadata = DataLoader(str(tmp_path)).extract_png_metadata(str(path))
+    metadata.pop("bytes_read")
+    assert metadata == pil_metadata(path)
+    assert metadata["player_input"] == 132
+
+
+def test_pil_written_png(tmp_path):
+    """Fichier écrit par PIL, comme les frames du dataset"""
+    from PIL.PngImagePlugin import PngInfo
+
+    info = PngInfo()
+    info.add_text("RAM", RAM)
+    info.add_text("BP1", "5", zip=True)
+    info.add_itxt("OUTCOME", "0")
+    path = tmp_path / "pil.png"
+    Image.new("RGB", (256, 240), (92, 148, 252)).save(path, pnginfo=info)
+
+    metadata = DataLoader(str(tmp_path)).extract_png_metadata(str(path))
+    metadata.pop("bytes_read")
+    assert metadata == pil_metadata(path)
+
+
+@pytest.mark.parametrize("cut", [4, 20, 60])
+def test_corrupt_file_falls_back(tmp_path, cut):
+    path = write_png(tmp_path / "frame.png", "rgb", "tEXt")
+    truncated = tmp_path / "truncated.png"
+    truncated.write_bytes(path.read_bytes()[:cut])
+
+    metadata = DataLoader(str(tmp_path)).extract_png_metadata(str(truncated))
+    assert metadata == {"ram_data": b"", "player_input": 0, "outcome_code": 0, "bytes_read": 0}
+    assert pil_metadata(truncated) == {"ram_data": b"", "player_input": 0, "outcome_code": 0}
@@ -0,0 +1,173 @@
+"""Synchronisation du miroir local contre un serveur HTTP local"""
+import hashlib
+import json
+
+import pytest
+
+pytest.importorskip("requests")
+
+from utils.remote_mirror import RemoteFile, RemoteMirror
+
+FILES = {
+    "ep_1/frame_0.png": bytes(range(256)) * 40,
+    "ep_1/frame_1.png": b"\x89PNG" + bytes(5000),
+    # Plus grand que RemoteMirror.CHUNK_SIZE : une coupure laisse des blocs écrits dans le .part
+    "ep_2/frame_0.png": b"".join(i.to_bytes(4, "big") for i in range(60000)),
+}
+
+
+def remote_files(server, paths=None):
+    files = []
+    for path in paths or FILES:
+        server.files["/" + path] = FILES[path]
+        files.append(RemoteFile(path, server.url("/" + path)))
+    return files
+
+
+def assert_tree(mirror, paths):
+    assert sorted(p.relative_to(mirror.tree).as_posix() for p in mirror.tree.rglob("*") if p.is_file()) == \
+        sorted(paths)
+    for path in paths:
+        assert (mirror.tree / path).read_bytes() == FILES[path]
+        assert mirror.files[path]["sha256"] == hashlib.sha256(FILES[path]).hexdigest()
+
+
+def test_download_then_reuse(file_server, tmp_path):
+    files = remote_files(file_server)
+    mirror = RemoteMirror(str(tmp_path / "mirror"), n_workers=2)
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 0, "downloaded": 3, "resumed": 0}
+    assert_tree(mirror, FILES)
+    assert mirror.is_complete()
+
+    # Nouvelle instance : le manifeste enregistré et les validateurs (HEAD) suffisent
+    file_server.requests.clear()
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 3, "downloaded": 0, "resumed": 0}
+    assert file_server.gets() == []
+
+
+def test_missing_link_is_restored_without_download(file_server, tmp_path):
+    files = remote_files(file_server)
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    (mirror.tree / "ep_1/frame_1.png").unlink()
+
+    file_server.requests.clear()
+    mirror.sync(files)
+    assert mirror.stats["reused"] == 3
+    assert file_server.gets() == []
+    assert_tree(mirror, FILES)
+
+
+def test_interrupted_download_resumes(file_server, tmp_path):
+    files = remote_files(file_server)
+    file_server.interrupt.add("/ep_2/frame_0.png")
+    mirror = RemoteMirror(str(tmp_path / "mirror"), n_workers=1)
+    with pytest.raises(Exception):
+        mirror.sync(files)
+    # Les fichiers terminés sont dans le manifeste, le fichier coupé reste en .part
+    assert "ep_2/frame_0.png" not in mirror.files
+    partial = list((tmp_path / "mirror" / "partial").glob("*.part"))
+    assert len(partial) == 1
+    offset = partial[0].stat().st_size
+    assert 0 < offset < len(FILES["ep_2/frame_0.png"])
+
+    file_server.requests.clear()
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 2, "downloaded": 1, "resumed": 1}
+    assert file_server.gets() == [("/ep_2/frame_0.png", f"bytes={offset}-")]
+    assert not partial[0].exists()
+    assert_tree(mirror, FILES)
+
+
+def test_complete_partial_file_restarts(file_server, tmp_path):
+    """Un .part aussi long que la source (416) est retéléchargé depuis le début"""
+    files = remote_files(file_server, ["ep_1/frame_1.png"])
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    partial = mirror.root / "partial" / (hashlib.sha1(files[0].url.encode("utf-8")).hexdigest() + ".part")
+    partial.parent.mkdir(parents=True)
+    partial.write_bytes(FILES["ep_1/frame_1.png"] + b"extra")
+    partial.with_name(partial.name + ".json").write_text(json.dumps(mirror.validator(files[0])))
+
+    file_server.requests.clear()
+    mirror.sync(files)
+    assert file_server.gets()[0] == ("/ep_1/frame_1.png", f"bytes={len(FILES['ep_1/frame_1.png']) + 5}-")
+    assert mirror.stats == {"reused": 0, "downloaded": 1, "resumed": 0}
+    assert_tree(mirror, ["ep_1/frame_1.png"])
+
+
+def test_prune(file_server, tmp_path):
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(remote_files(file_server))
+
+    kept = ["ep_1/frame_0.png", "ep_2/frame_0.png"]
+    mirror.sync(remote_files(file_server, kept), prune=False)
+    assert_tree(mirror, FILES)
+
+    mirror.sync(remote_files(file_server, kept))
+    assert_tree(mirror, kept)
+    assert sorted(RemoteMirror(str(tmp_path / "mirror")).files) == kept
+
+
+def test_replaced_content_is_downloaded_again(file_server, tmp_path):
+    """Même URL, nouveau contenu : le validateur change et l'ancien objet est supprimé"""
+    files = remote_files(file_server)
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    old_object = mirror.object_path(mirror.files["ep_1/frame_1.png"]["sha256"])
+
+    new_content = b"\x89PNG" + bytes(range(200)) * 10
+    file_server.files["/ep_1/frame_1.png"] = new_content
+    file_server.requests.clear()
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 2, "downloaded": 1, "resumed": 0}
+    assert file_server.gets() == [("/ep_1/frame_1.png", None)]
+    assert (mirror.tree / "ep_1/frame_1.png").read_bytes() == new_content
+    assert not old_object.exists()
+
+
+def test_changed_content_is_not_resumed(file_server, tmp_path):
+    """Un .part d'une ancienne version n'est pas complété avec la nouvelle (If-Range)"""
+    files = remote_files(file_server, ["ep_2/frame_0.png"])
+    file_server.interrupt.add("/ep_2/frame_0.png")
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    with pytest.raises(Exception):
+        mirror.sync(files)
+
+    new_content = bytes(reversed(FILES["ep_2/frame_0.png"]))
+    file_server.files["/ep_2/frame_0.png"] = new_content
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 0, "downloaded": 1, "resumed": 0}
+    assert (mirror.tree / "ep_2/frame_0.png").read_bytes() == new_content
+
+
+def test_listing_md5_replaces_head(file_server, tmp_path):
+    files = [remote._replace(md5=hashlib.md5(FILES[remote.path]).hexdigest())
+             for remote in remote_files(file_server)]
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(files)
+    file_server.requests.clear()
+    mirror.sync(files)
+    assert mirror.stats["reused"] == 3
+    assert file_server.requests == []
+
+    files[0] = files[0]._replace(md5="0" * 32)
+    mirror.sync(files)
+    assert mirror.stats == {"reused": 2, "downloaded": 1, "resumed": 0}
+
+
+def test_prune_removes_unused_objects(file_server, tmp_path):
+    mirror = RemoteMirror(str(tmp_path / "mirror"))
+    mirror.sync(remote_files(file_server))
+    objects = tmp_path / "mirror" / "objects"
+    assert len(list(objects.glob("*/*"))) == 3
+
+    kept = ["ep_1/frame_0.png"]
+    mirror.sync(remote_files(file_server, kept), prune=False)
+    assert len(list(objects.glob("*/*"))) == 3
+    mirror.sync(remote_files(file_server, kept))
+    assert [p.name for p in objects.glob("*/*")] == [hashlib.sha256(FILES[kept[0]]).hexdigest()]
@@ -0,0 +1,99 @@
+"""Le modèle compétence/difficulté donne le même résultat d'un run à l'autre"""
+import numpy as np
+import pandas as pd
+
+from difficulty_analyzer import SkillModel
+
+
+def skill_counts(seed=0, n_users=12):
+    rng = np.random.default_rng(seed)
+    rows = [(f"player_{u}", w, l) for u in range(n_users) for w in range(1, 4) for l in range(1, 5)
+            if rng.random() < 0.7]
+    counts = pd.DataFrame(rows, columns=['user', 'world', 'level'])
+    counts['plays'] = rng.integers(1, 15, len(counts))
+    counts['successes'] = rng.binomial(counts['plays'], 0.6)
+    return counts[['user', 'world', 'level', 'successes', 'plays']]
+
+
+def assert_same_fit(model, expected):
+    pd.testing.assert_frame_equal(model.skills, expected.skills, check_exact=True)
+    pd.testing.assert_frame_equal(model.difficulties, expected.difficulties, check_exact=True)
+
+
+def test_reruns_do_not_drift(tmp_path):
+    counts = skill_counts()
+    path = tmp_path / "skill_model.json"
+    first = SkillModel().fit(counts)
+    assert first.converged
+    first.save(str(path))
+
+    for _ in range(3):
+        model = SkillModel().fit(counts, previous=SkillModel.load(str(path)))
+        assert model.iterations == 0 and model.converged
+        assert_same_fit(model, first)
+        model.save(str(path))
+
+
+def test_row_order_and_dtypes_do_not_matter():
+    counts = skill_counts()
+    shuffled = counts.sample(frac=1, random_state=1).astype({'world': np.uint8, 'level': np.uint8,
+                                                             'successes': np.int16, 'plays': np.int16})
+    shuffled['user'] = shuffled['user'].astype('category')
+    assert SkillModel().fingerprint(shuffled) == SkillModel().fingerprint(counts)
+    model, expected = SkillModel().fit(shuffled), SkillModel().fit(counts)
+    np.testing.assert_array_equal(model.skills['skill'], expected.skills['skill'])
+    np.testing.assert_array_equal(model.difficulties['skill_difficulty'], expected.difficulties['skill_difficulty'])
+
+
+def episodes(n, seed):
+    """Épisodes d'un joueur sur un niveau, réussis selon un modèle de Rasch"""
+    rng = np.random.default_rng(seed)
+    user, world, level = rng.integers(0, 40, n), rng.integers(1, 9, n), rng.integers(1, 5, n)
+    logit = np.linspace(-1.5, 1.5, 40)[user] - (world + level / 4 - 3) / 2
+    return pd.DataFrame({'user': [f"player_{u}" for u in user], 'world': world, 'level': level,
+                         'successes': (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(np.int64), 'plays': 1})
+
+
+def per_pair(df):
+    return df.groupby(['user', 'world', 'level'], as_index=False)[['successes', 'plays']].sum()
+
+
+def assert_close_fit(model, expected, atol):
+    pd.testing.assert_frame_equal(model.skills, expected.skills, check_exact=False, rtol=0, atol=atol)
+    pd.testing.assert_frame_equal(model.difficulties, expected.difficulties, check_exact=False, rtol=0, atol=atol)
+
+
+def test_warm_start_after_new_episodes():
+    before = episodes(3000, seed=0)
+    after = pd.concat([before, episodes(300, seed=1)])
+    previous = SkillModel().fit(per_pair(before))
+
+    warm = SkillModel().fit(per_pair(after), previous=previous)
+    cold = SkillModel().fit(per_pair(after))
+    assert warm.converged and cold.converged
+    assert 0 < warm.iterations < cold.iterations
+    assert_close_fit(warm, cold, atol=10 * cold.tol)
+
+    # Départ à froid explicite : même résultat au bit près qu'un ajustement sans `previous`
+    assert_same_fit(SkillModel().fit(per_pair(after), previous=previous, cold_start=True), cold)
+
+
+def test_warm_start_with_new_players_and_levels():
+    before = episodes(2000, seed=0)
+    before = before[(before['world'] < 8) & (before['user'] != "player_3")]
+    after = pd.concat([before, episodes(500, seed=2)])
+    previous = SkillModel().fit(per_pair(before))
+    assert "player_3" not in set(previous.skills['user'])
+
+    warm = SkillModel().fit(per_pair(after), previous=previous)
+    assert warm.converged
+    assert_close_fit(warm, SkillModel().fit(per_pair(after)), atol=10 * warm.tol)
+
+
+def test_penalty_is_part_of_the_key(tmp_path):
+    counts = skill_counts()
+    path = tmp_path / "skill_model.json"
+    SkillModel(l2=1.0).fit(counts).save(str(path))
+    model = SkillModel().fit(counts, previous=SkillModel.load(str(path)))
+    assert model.iterations > 0
+    assert_close_fit(model, SkillModel().fit(counts), atol=10 * model.tol)
@@ -0,0 +1,49 @@
+"""Le cache de rendu ne dépend que des colonnes tracées par chaque figure"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("seaborn")
+
+from visualization import DataVisualizer, metrics_hash
+
+
+def level_metrics():
+    world, level = np.divmod(np.arange(32), 4)
+    success = np.linspace(0.1, 0.9, 32)
+    return pd.DataFrame({'world': world + 1, 'level': level + 1, 'total_attempts': 10,
+                         'success_rate': success, 'difficulty_score': 1 - success})
+
+
+def test_hash_ignores_unplotted_columns():
+    metrics = {'level_metrics': level_metrics()}
+    digest = metrics_hash('difficulty_heatmap', metrics, 300, 'png')
+
+    extended = metrics['level_metrics'].assign(success_low=0.0, difficulty_category='Moyen')
+    extended['total_attempts'] += 1
+    assert metrics_hash('difficulty_heatmap', {'level_metrics': extended}, 300, 'png') == digest
+    # L'ordre des colonnes et l'index de la table ne changent pas la figure
+    reordered = extended[extended.columns[::-1]].set_axis(np.arange(32) + 100)
+    assert metrics_hash('difficulty_heatmap', {'level_metrics': reordered}, 300, 'png') == digest
+
+    changed = metrics['level_metrics'].copy()
+    changed.loc[3, 'difficulty_score'] = 0.5
+    assert metrics_hash('difficulty_heatmap', {'level_metrics': changed}, 300, 'png') != digest
+    assert metrics_hash('difficulty_heatmap', metrics, 150, 'png') != digest
+
+
+def test_render_all_reuses_figures(tmp_path):
+    metrics = {'level_metrics': level_metrics()}
+    results = DataVisualizer(metrics, dpi=20).render_all(str(tmp_path))
+    assert list(results) == ['difficulty_heatmap']
+    assert results['difficulty_heatmap']['rendered']
+
+    metrics['level_metrics']['success_low'] = 0.0
+    results = DataVisualizer(metrics, dpi=20).render_all(str(tmp_path))
+    assert not results['difficulty_heatmap']['rendered']
+
+
+def test_missing_columns_skip_figure():
+    metrics = {'level_metrics': level_metrics().drop(columns='difficulty_score'), 'death_bins': pd.DataFrame()}
+    assert DataVisualizer(metrics).available_figures() == []